@@ -0,0 +1,2 @@
+from .kalman_filter import KF, EKF
+from .complementary_filter import ComplementaryFilter
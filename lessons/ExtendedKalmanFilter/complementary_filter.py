@@ -0,0 +1,122 @@
+"""
+Complementary filter of the attitude estimation notebook.
+
+The measurements are the (4, T) IMU arrays of the notebook, rows
+[theta from the accelerometer, phi from the accelerometer, p, q], or
+(4, T, n) for `n` independent IMUs. `dt` and `tau` can be scalars or
+one value per filter.
+"""
+import numpy as np
+
+# largest growth of the scaled terms in make_estimates before a block
+# is restarted, far from the float64 overflow
+_MAX_SCALE = 1e100
+
+# above this many filters a plain step loop, already vectorized over the
+# filters, makes fewer passes over memory than the block form
+_BLOCK_FILTERS = 200
+
+
+class ComplementaryFilter:
+
+    def __init__(self, dt, tau, n=1):
+        self.dt = np.broadcast_to(np.asarray(dt, dtype=np.float64), (n,))
+        self.tau = np.broadcast_to(np.asarray(tau, dtype=np.float64), (n,))
+        self.n = n
+        self.estimated_theta = np.zeros(n)
+        self.estimated_phi = np.zeros(n)
+
+    @property
+    def alpha(self):
+        return self.tau / (self.tau + self.dt)
+
+    def update(self, z):
+        """One step with z = [theta_acc, phi_acc, p, q], each a scalar or (n,)."""
+        alpha = self.alpha
+
+        self.estimated_theta = alpha * (self.estimated_theta + z[3] * self.dt) + (1.0 - alpha) * z[0]
+        self.estimated_phi = alpha * (self.estimated_phi + z[2] * self.dt) + (1.0 - alpha) * z[1]
+
+    def make_estimates(self, measurements):
+        """
+        Filters the whole recorded measurement array from zero attitude.
+        Returns the [theta, phi] estimates, (2, T) or (2, T, n) like the
+        measurements.
+        """
+        measurements = np.asarray(measurements, dtype=np.float64)
+        batched = measurements.ndim == 3
+        if not batched:
+            measurements = measurements[:, :, None]
+
+        alpha = self.alpha
+        # the filter is the linear recurrence x[k] = alpha * x[k-1] + u[k]
+        u = np.empty((2,) + measurements.shape[1:])
+        u[0] = alpha * self.dt * measurements[3] + (1.0 - alpha) * measurements[0]
+        u[1] = alpha * self.dt * measurements[2] + (1.0 - alpha) * measurements[1]
+
+        estimates = _linear_recurrence(alpha, u)
+        self.estimated_theta = estimates[0, -1].copy()
+        self.estimated_phi = estimates[1, -1].copy()
+        return estimates if batched else estimates[:, :, 0]
+
+
+def _linear_recurrence(alpha, u):
+    """
+    x[k] = alpha * x[k-1] + u[k] with x[-1] = 0 along axis 1 of u, for
+    every column of alpha at once.
+
+    For few filters it is evaluated in blocks without a step loop:
+    within a block x[k] = alpha^k * cumsum(u[j] / alpha^j), the blocks
+    are short enough that alpha^-j stays finite and are chained through
+    the last value of the previous block.
+    """
+    x = np.empty_like(u)
+    steps = u.shape[1]
+    if u.shape[2] > _BLOCK_FILTERS:
+        previous = np.zeros((u.shape[0], u.shape[2]))
+        for i in range(steps):
+            previous *= alpha
+            previous += u[:, i]
+            x[:, i] = previous
+        return x
+
+    # tau = 0 only trusts the accelerometer, those columns are x = u
+    zero = alpha == 0.0
+    alpha = np.where(zero, 1.0, alpha)
+    block = steps if alpha.min() >= 1.0 else max(1, int(np.log(_MAX_SCALE) / -np.log(alpha.min())))
+
+    previous = np.zeros((u.shape[0], u.shape[2]))
+    for start in range(0, steps, block):
+        stop = min(start + block, steps)
+        k = np.arange(stop - start, dtype=np.float64)[:, None]
+        block_x = x[:, start:stop]
+        np.multiply(u[:, start:stop], alpha ** -k, out=block_x)
+        np.cumsum(block_x, axis=1, out=block_x)
+        block_x += alpha * previous[:, None]
+        block_x *= alpha ** k
+        previous = block_x[:, -1]
+    x[:, :, zero] = u[:, :, zero]
+    return x
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(0)
+    dt = 0.01
+    steps = 2000
+
+    for n in (1, 100, 10000):
+        measurements = rng.normal(0.0, 0.1, (4, steps, n))
+        cf = ComplementaryFilter(dt, dt * 10, n)
+
+        t0 = time.time()
+        for i in range(steps):
+            cf.update(measurements[:, i])
+        stepwise = n * steps / (time.time() - t0)
+
+        t0 = time.time()
+        cf.make_estimates(measurements)
+        offline = n * steps / (time.time() - t0)
+
+        print('n={0:<6} update: {1:>14,.0f} make_estimates: {2:>14,.0f} filter-steps/s'.format(n, stepwise, offline))
@@ -0,0 +1,303 @@
+"""
+Kalman filters of the estimation lessons, usable outside the notebooks.
+
+`KF` is the linear filter of the 1D vertical motion notebook with state
+[z_dot, z] and a position measurement; `EKF` is the extended filter of
+the 2D notebook with state [phi, y_dot, y] and a range measurement
+y / cos(phi).
+
+Every filter object runs `n` independent filters at once. The means
+are stacked as an (n, k) array and the covariances as (n, k, k), and
+the noise parameters can be scalars or one value per filter:
+
+    kf = KF(measurement_noise=np.linspace(0.05, 0.5, 1000), process_noise_v=0.1, process_noise_p=0.1,
+            dt=0.01, n=1000)
+    kf.initial_values(mu_0, sigma_0)
+    for u, z in zip(controls, measurements):
+        kf.predict(u)
+        kf.update(z)
+
+`make_estimates` is the offline mode: it filters a whole recorded
+(T,) or (T, n) measurement array in one call and returns the (T, n, k)
+estimates.
+"""
+import numpy as np
+
+
+def _per_filter(n, *values):
+    return [np.broadcast_to(np.asarray(v, dtype=np.float64), (n,)) for v in values]
+
+
+def _diagonal(*variances):
+    n = variances[0].shape[0]
+    k = len(variances)
+    matrix = np.zeros((n, k, k))
+    for i, variance in enumerate(variances):
+        matrix[:, i, i] = variance
+    return matrix
+
+
+def _transpose(matrix):
+    return np.swapaxes(matrix, -1, -2)
+
+
+class KF:
+    # the covariance does not depend on the state, see make_estimates
+    linear = True
+
+    def __init__(self,
+                 measurement_noise,  # Uncertainty that is present in every measurement
+                 process_noise_v,  # Uncertainty of the velocity
+                 process_noise_p,  # Uncertainty of the position
+                 dt,  # dt time between samples
+                 n=1  # number of independent filters
+                 ):
+        measurement_noise, process_noise_v, process_noise_p = _per_filter(n, measurement_noise,
+                                                                          process_noise_v, process_noise_p)
+        self.n = n
+        self.dt = dt
+
+        # Process noise
+        self.q_t = _diagonal(process_noise_v ** 2, process_noise_p ** 2)
+
+        # Measurement noise
+        self.r_t = _diagonal(measurement_noise ** 2)
+
+        # Default velocity, position - [0,0], complete certainty
+        self.mu = np.zeros((n, 2))
+        self.sigma = np.zeros((n, 2, 2))
+
+        self.mu_bar = self.mu
+        self.sigma_bar = self.sigma
+
+    @property
+    def a(self):
+        return np.array([[1.0, 0.0],
+                         [self.dt, 1.0]])
+
+    @property
+    def b(self):
+        return np.array([self.dt, 0.0])
+
+    def g(self, mu, u):
+        """State transition function, u = z_dot_dot."""
+        return np.matmul(mu, self.a.T) + self.b * np.reshape(u, (-1, 1))
+
+    def g_prime(self, mu):
+        return self.a
+
+    def h(self, mu):
+        return mu[:, 1:]
+
+    def h_prime(self, mu):
+        return np.array([[0.0, 1.0]])
+
+    def initial_values(self, mu_0, sigma_0):
+        """Sets the initial state, shared by all filters or one per filter."""
+        k = self.mu.shape[1]
+        self.mu = np.broadcast_to(np.asarray(mu_0, dtype=np.float64).reshape(-1, k), (self.n, k)).copy()
+        self.sigma = np.broadcast_to(np.asarray(sigma_0, dtype=np.float64).reshape(-1, k, k),
+                                     (self.n, k, k)).copy()
+
+    def predict(self, u):
+        G = self.g_prime(self.mu)
+        mu_bar = self.g(self.mu, u)
+        sigma_bar = np.matmul(G, np.matmul(self.sigma, _transpose(G))) + self.q_t
+
+        self.mu_bar = mu_bar
+        self.sigma_bar = sigma_bar
+
+        return mu_bar, sigma_bar
+
+    def update(self, z):
+        H = self.h_prime(self.mu_bar)
+        m = H.shape[-2]
+        z = np.reshape(z, (-1, m))
+
+        sigma_h = np.matmul(self.sigma_bar, _transpose(H))
+        S = np.matmul(H, sigma_h) + self.r_t
+        if m == 1:
+            K = sigma_h / S
+        else:
+            K = np.matmul(sigma_h, np.linalg.inv(S))
+
+        innovation = z - self.h(self.mu_bar)
+        mu = self.mu_bar + np.matmul(K, innovation[:, :, None])[:, :, 0]
+        sigma = self.sigma_bar - np.matmul(K, np.matmul(H, self.sigma_bar))
+
+        self.mu = mu
+        self.sigma = sigma
+
+        return mu, sigma
+
+    def step(self, u, z):
+        self.predict(u)
+        return self.update(z)
+
+    def make_estimates(self, measurements, controls=0.0, covariance=False):
+        """
+        Filters a whole recorded measurement array, (T,) or (T, n),
+        starting from the current state. `controls` is a scalar or a
+        (T,) or (T, n) array.
+
+        Returns the (T, n, k) means, and the (T, n, k, k) covariances
+        if `covariance` is set.
+        """
+        measurements = np.asarray(measurements, dtype=np.float64)
+        steps = measurements.shape[0]
+        measurements = measurements.reshape(steps, -1)
+        controls = np.asarray(controls, dtype=np.float64)
+        if controls.ndim == 1:
+            controls = controls[:, None]
+        controls = np.broadcast_to(controls, (steps, self.n))
+        k = self.mu.shape[1]
+        estimates = np.empty((steps, self.n, k))
+        sigmas = np.empty((steps, self.n, k, k)) if covariance else None
+
+        if self.linear and self._shared_covariance():
+            self._make_estimates_shared(measurements, controls, estimates, sigmas)
+            return (estimates, sigmas) if covariance else estimates
+
+        for i in range(steps):
+            self.predict(controls[i])
+            self.update(measurements[i])
+            estimates[i] = self.mu
+            if covariance:
+                sigmas[i] = self.sigma
+        return (estimates, sigmas) if covariance else estimates
+
+    def _shared_covariance(self):
+        return bool((self.sigma == self.sigma[0]).all() and (self.q_t == self.q_t[0]).all() and
+                    (self.r_t == self.r_t[0]).all())
+
+    def _make_estimates_shared(self, measurements, controls, estimates, sigmas):
+        # In a linear filter the covariance and the gain do not depend on
+        # the measurements. When all filters start from the same
+        # covariance with the same noise, it is propagated once for the
+        # whole batch and only the means are updated per filter.
+        A = self.a
+        b = self.b
+        H = self.h_prime(None)
+        q_t = self.q_t[0]
+        r_t = self.r_t[0]
+        sigma = self.sigma[0]
+        identity = np.identity(sigma.shape[0])
+
+        mu = self.mu
+        for i in range(measurements.shape[0]):
+            sigma_bar = A @ sigma @ A.T + q_t
+            sigma_h = sigma_bar @ H.T
+            K = sigma_h @ np.linalg.inv(H @ sigma_h + r_t)
+            sigma = (identity - K @ H) @ sigma_bar
+
+            mu_bar = mu @ A.T + b * np.reshape(controls[i], (-1, 1))
+            innovation = np.reshape(measurements[i], (-1, H.shape[0])) - mu_bar @ H.T
+            mu = mu_bar + innovation @ K.T
+
+            estimates[i] = mu
+            if sigmas is not None:
+                sigmas[i] = sigma
+
+        self.mu_bar = mu_bar
+        self.sigma_bar = np.broadcast_to(sigma_bar, self.sigma.shape).copy()
+        self.mu = mu
+        self.sigma = np.broadcast_to(sigma, self.sigma.shape).copy()
+
+
+class EKF(KF):
+    linear = False
+
+    def __init__(self,
+                 motion_error,  # Motion noise
+                 angle_sigma,  # Angle sigma
+                 velocity_sigma,  # Velocity uncertainty
+                 position_sigma,  # Position uncertainty
+                 dt,  # dt time between samples
+                 n=1  # number of independent filters
+                 ):
+        motion_error, angle_sigma, velocity_sigma, position_sigma = _per_filter(n, motion_error, angle_sigma,
+                                                                                velocity_sigma, position_sigma)
+        self.n = n
+        self.dt = dt
+
+        # Sensor measurement covariance
+        self.r_t = _diagonal(motion_error ** 2)
+
+        # Motion model noise for angle, velocity and position
+        self.q_t = _diagonal(angle_sigma ** 2, velocity_sigma ** 2, position_sigma ** 2)
+
+        self.mu = np.zeros((n, 3))
+        self.sigma = np.zeros((n, 3, 3))
+
+        self.mu_bar = self.mu
+        self.sigma_bar = self.sigma
+
+    def g(self, mu, u):
+        """Transition model, the new input u is the roll angle."""
+        current_phi, current_y_dot, current_y = mu.T
+
+        new_phi = np.broadcast_to(np.asarray(u, dtype=np.float64).reshape(-1), current_phi.shape)
+        new_y_dot = current_y_dot - np.sin(current_phi) * self.dt
+        new_y = current_y + current_y_dot * self.dt
+
+        return np.stack([new_phi, new_y_dot, new_y], axis=-1)
+
+    def g_prime(self, mu):
+        current_phi = mu[:, 0]
+
+        g_prime = np.zeros((mu.shape[0], 3, 3))
+        g_prime[:, 1, 0] = -np.cos(current_phi) * self.dt
+        g_prime[:, 1, 1] = 1.0
+        g_prime[:, 2, 1] = self.dt
+        g_prime[:, 2, 2] = 1.0
+        return g_prime
+
+    # The notebook models the measurement as -y / cos(phi) and compares
+    # it with -z, the filter below is the same without the signs.
+    def h(self, mu_bar):
+        predicted_phi, predicted_y = mu_bar[:, 0], mu_bar[:, 2]
+        return (predicted_y / np.cos(predicted_phi))[:, None]
+
+    def h_prime(self, mu_bar):
+        predicted_phi, predicted_y = mu_bar[:, 0], mu_bar[:, 2]
+        cos_phi = np.cos(predicted_phi)
+
+        h_prime = np.zeros((mu_bar.shape[0], 1, 3))
+        h_prime[:, 0, 0] = predicted_y * np.sin(predicted_phi) / cos_phi ** 2
+        h_prime[:, 0, 2] = 1.0 / cos_phi
+        return h_prime
+
+
+if __name__ == "__main__":
+    import time
+
+    def benchmark(name, n, steps, run):
+        t0 = time.time()
+        run()
+        elapsed = time.time() - t0
+        print('{0:<28} n={1:<6} {2:>12,.0f} filter-steps/s'.format(name, n, n * steps / elapsed))
+
+    rng = np.random.default_rng(0)
+    dt = 0.01
+    steps = 1000
+    t = np.arange(steps) * dt
+    z_path = 0.5 * np.cos(2 * t) - 0.5
+
+    for n in (1, 100, 10000):
+        measurements = z_path[:, None] + 0.1 * rng.standard_normal((steps, n))
+
+        kf = KF(0.1, 0.1, 0.1, dt, n)
+
+        def stepwise():
+            for z in measurements:
+                kf.predict(0.0)
+                kf.update(z)
+
+        benchmark('KF predict/update', n, steps, stepwise)
+        benchmark('KF make_estimates', n, steps, lambda: KF(0.1, 0.1, 0.1, dt, n).make_estimates(measurements))
+        benchmark('KF make_estimates (per filter noise)', n, steps,
+                  lambda: KF(np.linspace(0.05, 0.5, n), 0.1, 0.1, dt, n).make_estimates(measurements))
+
+        ekf = EKF(0.1, 0.01, 0.1, 0.1, dt, n)
+        ekf.initial_values([0.0, 1.0, 1.0], np.identity(3) * 0.01)
+        benchmark('EKF make_estimates', n, steps, lambda: ekf.make_estimates(1.0 + measurements, 0.01))
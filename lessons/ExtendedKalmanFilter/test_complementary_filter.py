@@ -0,0 +1,48 @@
+from unittest import TestCase
+
+import numpy as np
+from lessons.ExtendedKalmanFilter import ComplementaryFilter
+
+
+class TestComplementaryFilter(TestCase):
+
+    def setUp(self):
+        self.measurements = np.random.default_rng(0).normal(0.0, 0.1, (4, 3000, 3))
+
+    def test_make_estimates_matches_updates(self):
+        dt = 0.01
+        tau = np.array([0.0, dt, dt * 100])
+        cf = ComplementaryFilter(dt, tau, n=3)
+        estimates = cf.make_estimates(self.measurements)
+
+        stepwise = ComplementaryFilter(dt, tau, n=3)
+        expect = np.zeros((2, 3000, 3))
+        for i in range(3000):
+            stepwise.update(self.measurements[:, i])
+            expect[:, i] = stepwise.estimated_theta, stepwise.estimated_phi
+        self.assertTrue(np.allclose(estimates, expect))
+        self.assertTrue((estimates[:, :, 0] == self.measurements[:2, :, 0]).all())
+        self.assertTrue(np.allclose(cf.estimated_phi, stepwise.estimated_phi))
+
+    def test_single_filter(self):
+        cf = ComplementaryFilter(0.01, 0.1)
+        estimates = cf.make_estimates(self.measurements[:, :, 1])
+        self.assertEqual(estimates.shape, (2, 3000))
+        batched = ComplementaryFilter(0.01, 0.1, n=3).make_estimates(self.measurements)
+        self.assertTrue(np.allclose(estimates, batched[:, :, 1]))
+
+    def test_many_filters(self):
+        measurements = np.random.default_rng(1).normal(0.0, 0.1, (4, 100, 500))
+        tau = np.linspace(0.0, 1.0, 500)
+        estimates = ComplementaryFilter(0.01, tau, n=500).make_estimates(measurements)
+        for i in (0, 250, 499):
+            expect = ComplementaryFilter(0.01, tau[i]).make_estimates(measurements[:, :, i])
+            self.assertTrue(np.allclose(estimates[:, :, i], expect))
+
+    def test_hover_estimate_is_unbiased(self):
+        # the notebook also weighted the accelerometer by tau / (tau + dt),
+        # which converges to tau / dt times the true angle
+        measurements = np.zeros((4, 2000))
+        measurements[:2] = 0.2
+        estimates = ComplementaryFilter(0.01, 0.1).make_estimates(measurements)
+        self.assertTrue(np.allclose(estimates[:, -1], 0.2))
@@ -0,0 +1,107 @@
+from unittest import TestCase
+
+import numpy as np
+from lessons.ExtendedKalmanFilter import KF, EKF
+
+
+def notebook_kf_step(mu, sigma, u, z, measurement_noise, process_noise_v, process_noise_p, dt):
+    # predict and update of the KF notebook, one filter with column vectors
+    a = np.array([[1.0, 0.0], [dt, 1.0]])
+    b = np.array([[dt], [0.0]])
+    q_t = np.array([[process_noise_v ** 2, 0.0], [0.0, process_noise_p ** 2]])
+    r_t = np.array([measurement_noise ** 2])
+
+    mu_bar = np.matmul(a, mu) + b * u
+    sigma_bar = np.matmul(a, np.matmul(sigma, a.T)) + q_t
+
+    H = np.array([[0.0, 1.0]])
+    S = np.matmul(np.matmul(H, sigma_bar), H.T) + r_t
+    K = np.matmul(np.matmul(sigma_bar, H.T), np.linalg.inv(S))
+    mu = mu_bar + np.matmul(K, (z - np.matmul(H, mu_bar)))
+    sigma = np.matmul((np.identity(2) - np.matmul(K, H)), sigma_bar)
+    return mu, sigma
+
+
+def notebook_ekf_step(mu, sigma, u, z, motion_error, angle_sigma, velocity_sigma, position_sigma, dt):
+    # predict and update of the EKF notebook, one filter
+    r_t = np.array([[motion_error ** 2]])
+    q_t = np.diag([angle_sigma ** 2, velocity_sigma ** 2, position_sigma ** 2])
+
+    phi, y_dot, y = mu
+    mu_bar = np.array([u, y_dot - np.sin(phi) * dt, y + y_dot * dt])
+    G = np.array([[0.0, 0.0, 0.0], [-np.cos(phi) * dt, 1.0, 0.0], [0.0, dt, 1.0]])
+    sigma_bar = np.matmul(G, np.matmul(sigma, G.T)) + q_t
+
+    phi, y_dot, y = mu_bar
+    H = np.array([[-y * np.sin(phi) / np.cos(phi) ** 2, 0.0, -1 / np.cos(phi)]])
+    S = np.matmul(np.matmul(H, sigma_bar), H.T) + r_t
+    K = np.matmul(np.matmul(sigma_bar, H.T), np.linalg.inv(S))
+    mu = mu_bar + np.matmul(K, (-z - np.array([-y / np.cos(phi)])))
+    sigma = np.matmul((np.identity(3) - np.matmul(K, H)), sigma_bar)
+    return mu, sigma
+
+
+class TestKF(TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.dt = 0.01
+        self.t = np.arange(300) * self.dt
+        self.measurements = (0.5 * np.cos(2 * self.t) - 0.5)[:, None] + 0.05 * rng.standard_normal((300, 3))
+        self.noise = np.array([0.05, 0.1, 0.5])
+        self.mu_0 = np.array([1.0, 0.0])
+        self.sigma_0 = np.diag([0.01, 0.01])
+
+    def test_batch_matches_notebook(self):
+        kf = KF(self.noise, 0.1, 0.2, self.dt, n=3)
+        kf.initial_values(self.mu_0, self.sigma_0)
+        for z in self.measurements[:20]:
+            kf.step(0.5, z)
+
+        for i in range(3):
+            mu = self.mu_0[:, None]
+            sigma = self.sigma_0
+            for z in self.measurements[:20, i]:
+                mu, sigma = notebook_kf_step(mu, sigma, 0.5, z, self.noise[i], 0.1, 0.2, self.dt)
+            self.assertTrue(np.allclose(kf.mu[i], mu[:, 0]))
+            self.assertTrue(np.allclose(kf.sigma[i], sigma))
+
+    def test_make_estimates_matches_steps(self):
+        controls = np.sin(self.t)
+        for noise in (0.1, self.noise):
+            stepwise = KF(noise, 0.1, 0.2, self.dt, n=3)
+            stepwise.initial_values(self.mu_0, self.sigma_0)
+            offline = KF(noise, 0.1, 0.2, self.dt, n=3)
+            offline.initial_values(self.mu_0, self.sigma_0)
+
+            estimates, sigmas = offline.make_estimates(self.measurements, controls, covariance=True)
+            self.assertEqual(estimates.shape, (300, 3, 2))
+            for i, (u, z) in enumerate(zip(controls, self.measurements)):
+                stepwise.step(u, z)
+                self.assertTrue(np.allclose(estimates[i], stepwise.mu))
+                self.assertTrue(np.allclose(sigmas[i], stepwise.sigma))
+            self.assertTrue(np.allclose(offline.sigma, stepwise.sigma))
+
+
+class TestEKF(TestCase):
+
+    def test_batch_matches_notebook(self):
+        rng = np.random.default_rng(1)
+        dt = 0.01
+        phi = 0.05 * np.sin(np.arange(100) * dt)
+        measurements = 1.0 + 0.01 * rng.standard_normal((100, 2))
+        position_sigma = np.array([0.01, 0.1])
+        mu_0 = np.array([0.1, 1.0, 1.0])
+        sigma_0 = np.identity(3) * 0.01
+
+        ekf = EKF(0.1, 0.01, 0.1, position_sigma, dt, n=2)
+        ekf.initial_values(mu_0, sigma_0)
+        estimates = ekf.make_estimates(measurements, phi)
+
+        for i in range(2):
+            mu = mu_0
+            sigma = sigma_0
+            for u, z in zip(phi, measurements[:, i]):
+                mu, sigma = notebook_ekf_step(mu, sigma, u, z, 0.1, 0.01, 0.1, position_sigma[i], dt)
+            self.assertTrue(np.allclose(estimates[-1, i], mu))
+            self.assertTrue(np.allclose(ekf.sigma[i], sigma))
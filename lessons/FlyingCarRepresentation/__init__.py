@@ -0,0 +1 @@
+from .euler_rotaion import EulerRotation, Rotation, rotate_batch
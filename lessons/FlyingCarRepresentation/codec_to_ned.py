@@ -1,13 +1,26 @@
+from functools import lru_cache
+
 import utm
 import numpy as np
 
+
+@lru_cache(maxsize=64)
+def home_utm(lon, lat):
+    """
+    Returns (easting, northing, zone_number, zone_letter) of the home
+    position. The projection is cached, so converting many positions
+    against the same home only projects the home once.
+    """
+    return utm.from_latlon(lat, lon)
+
+
 def global_to_local(global_position, global_home):
     
     # Get easting and northing of global_home
     # Get easting and northing of global_position
     # Create local_position from global and home positions                                     
 
-    (east_home, north_home, _, _) = utm.from_latlon(global_home[1], global_home[0])
+    (east_home, north_home, _, _) = home_utm(float(global_home[0]), float(global_home[1]))
     (east, north, _, _) = utm.from_latlon(global_position[1], global_position[0])
 
     local_position = np.array([north - north_home, east - east_home, -global_position[2]])
@@ -21,11 +34,49 @@ def local_to_global(local_position, global_home):
     # Create global_position of (lat, lon, alt)
     
                                
-    (east_home, north_home, zone_number, zone_letter) = utm.from_latlon(global_home[1], global_home[0])
+    (east_home, north_home, zone_number, zone_letter) = home_utm(float(global_home[0]), float(global_home[1]))
     (lat, lon) = utm.to_latlon(east_home + local_position[1], north_home + local_position[0], zone_number, zone_letter)
     
     return np.array([lon, lat, -local_position[2]])
 
+
+def global_to_local_batch(global_positions, global_home):
+    """
+    Vectorized `global_to_local` for an (N, 3) array of
+    (lon, lat, alt) rows. Returns an (N, 3) array of (north, east, down).
+
+    Every position is projected into the UTM zone of `global_home`,
+    which is what the scalar version gives whenever a position lies in
+    the same zone as home.
+    """
+    global_positions = np.asarray(global_positions, dtype=np.float64)
+    east_home, north_home, zone_number, zone_letter = home_utm(float(global_home[0]), float(global_home[1]))
+    east, north, _, _ = utm.from_latlon(global_positions[:, 1], global_positions[:, 0],
+                                        force_zone_number=zone_number, force_zone_letter=zone_letter)
+
+    local_positions = np.empty(global_positions.shape)
+    local_positions[:, 0] = north - north_home
+    local_positions[:, 1] = east - east_home
+    local_positions[:, 2] = -global_positions[:, 2]
+    return local_positions
+
+
+def local_to_global_batch(local_positions, global_home):
+    """
+    Vectorized `local_to_global` for an (N, 3) array of
+    (north, east, down) rows. Returns an (N, 3) array of (lon, lat, alt).
+    """
+    local_positions = np.asarray(local_positions, dtype=np.float64)
+    east_home, north_home, zone_number, zone_letter = home_utm(float(global_home[0]), float(global_home[1]))
+    lat, lon = utm.to_latlon(east_home + local_positions[:, 1], north_home + local_positions[:, 0],
+                             zone_number, zone_letter)
+
+    global_positions = np.empty(local_positions.shape)
+    global_positions[:, 0] = lon
+    global_positions[:, 1] = lat
+    global_positions[:, 2] = -local_positions[:, 2]
+    return global_positions
+
 if __name__ == '__main__':
     np.set_printoptions(precision=2)
 
@@ -44,4 +95,16 @@ if __name__ == '__main__':
     geodetic_current_coordinates = local_to_global(NED_coordinates, geodetic_home_coordinates)
 
     print(geodetic_current_coordinates)
-    # Should print [-122.106982   37.40037    50.      ]
\ No newline at end of file
+    # Should print [-122.106982   37.40037    50.      ]
+
+    # convert one million points at once
+    import time
+
+    local = np.random.uniform(-5000, 5000, (1000000, 3))
+    t0 = time.time()
+    geodetic = local_to_global_batch(local, geodetic_home_coordinates)
+    t1 = time.time()
+    back = global_to_local_batch(geodetic, geodetic_home_coordinates)
+    t2 = time.time()
+    print('local_to_global_batch {0:.3f} s, global_to_local_batch {1:.3f} s, max error {2:.2e} m'.format(
+        t1 - t0, t2 - t1, np.abs(back - local).max()))
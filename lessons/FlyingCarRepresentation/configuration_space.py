@@ -35,7 +35,7 @@ def create_grid(data, drone_altitude, safety_distance):
     north_size = int(np.ceil(north_max - north_min))
     east_size = int(np.ceil(east_max - east_min))
     # Initialize an empty grid
-    grid = np.zeros((north_size, east_size))
+    grid = np.zeros((north_size, east_size), dtype=np.uint8)
     # Center offset for grid
     north_min_center = np.min(data[:, 0])
     east_min_center = np.min(data[:, 1])
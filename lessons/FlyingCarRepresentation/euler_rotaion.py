@@ -62,3 +62,104 @@ class EulerRotation:
             f = self._rotation_map[dimension]
             t = np.dot(f(value), t)
         return t
+
+
+def _axis_matrices(axis, angles):
+    """Returns the (N, 3, 3) stack of rotations of `angles` (radians) about `axis`."""
+    c = np.cos(angles)
+    s = np.sin(angles)
+    r = np.zeros((len(angles), 3, 3))
+    if axis == Rotation.ROLL:
+        r[:, 0, 0] = 1
+        r[:, 1, 1] = c
+        r[:, 1, 2] = -s
+        r[:, 2, 1] = s
+        r[:, 2, 2] = c
+    elif axis == Rotation.PITCH:
+        r[:, 0, 0] = c
+        r[:, 0, 2] = s
+        r[:, 1, 1] = 1
+        r[:, 2, 0] = -s
+        r[:, 2, 2] = c
+    else:
+        r[:, 0, 0] = c
+        r[:, 0, 1] = -s
+        r[:, 1, 0] = s
+        r[:, 1, 1] = c
+        r[:, 2, 2] = 1
+    return r
+
+
+def _zyx_matrices(phi, theta, psi):
+    """Fused R = Rz(psi) Ry(theta) Rx(phi) for arrays of angles (radians)."""
+    cr, sr = np.cos(phi), np.sin(phi)
+    cp, sp = np.cos(theta), np.sin(theta)
+    cy, sy = np.cos(psi), np.sin(psi)
+    r = np.empty((len(phi), 3, 3))
+    r[:, 0, 0] = cy * cp
+    r[:, 0, 1] = cy * sp * sr - sy * cr
+    r[:, 0, 2] = cy * sp * cr + sy * sr
+    r[:, 1, 0] = sy * cp
+    r[:, 1, 1] = sy * sp * sr + cy * cr
+    r[:, 1, 2] = sy * sp * cr - cy * sr
+    r[:, 2, 0] = -sp
+    r[:, 2, 1] = cp * sr
+    r[:, 2, 2] = cp * cr
+    return r
+
+
+ZYX = (Rotation.ROLL, Rotation.PITCH, Rotation.YAW)
+
+
+def rotate_batch(angles, order, degrees=True):
+    """
+    Batched `EulerRotation.rotate`.
+
+    `angles` is an (N, k) array where column `i` holds the angles of
+    the rotation `order[i]`; `order` is a sequence of k `Rotation`
+    kinds applied in sequence, exactly like the tuples given to
+    `EulerRotation`. Returns the (N, 3, 3) stack of rotation matrices.
+
+    The common roll, pitch, yaw order (`ZYX`, i.e. Rz Ry Rx) uses a
+    fused closed form; any other order is one matmul chain over the
+    per-axis stacks.
+
+    Ex:
+
+        rotate_batch(np.array([[25, 75, 90]]), ZYX)[0]
+        # same as EulerRotation([(Rotation.ROLL, 25), (Rotation.PITCH, 75), (Rotation.YAW, 90)]).rotate()
+    """
+    angles = np.asarray(angles, dtype=np.float64).reshape(-1, len(order))
+    if degrees:
+        angles = np.deg2rad(angles)
+    if tuple(order) == ZYX:
+        return _zyx_matrices(angles[:, 0], angles[:, 1], angles[:, 2])
+
+    t = np.broadcast_to(np.eye(3), (len(angles), 3, 3))
+    for i, axis in enumerate(order):
+        t = np.matmul(_axis_matrices(axis, angles[:, i]), t)
+    return np.ascontiguousarray(t)
+
+
+if __name__ == "__main__":
+    import time
+
+    n = 100000
+    angles = np.random.uniform(-180, 180, (n, 3))
+
+    t0 = time.time()
+    scalar = np.array([EulerRotation(list(zip(ZYX, a))).rotate() for a in angles[:10000]])
+    t_scalar = (time.time() - t0) * n / 10000
+
+    t0 = time.time()
+    fused = rotate_batch(angles, ZYX)
+    t_fused = time.time() - t0
+
+    order = (Rotation.YAW, Rotation.PITCH, Rotation.ROLL)
+    t0 = time.time()
+    rotate_batch(angles, order)
+    t_chain = time.time() - t0
+
+    print('{0} rotations: EulerRotation {1:.2f} s (extrapolated), fused ZYX {2:.4f} s, matmul chain {3:.4f} s'.format(
+        n, t_scalar, t_fused, t_chain))
+    print('max difference', np.abs(fused[:10000] - scalar).max())
@@ -33,3 +33,140 @@ def quaternion_to_euler(quaternion):
     yaw = np.arctan2(2.0 * (a * d + b * c), 1.0 - 2.0 * (c ** 2 + d ** 2))
 
     return [roll, pitch, yaw]
+
+
+# Array versions. Quaternions are (..., 4) float arrays [a, b, c, d]
+# (scalar first), euler angles (..., 3) arrays [roll, pitch, yaw] in
+# radians and vectors (..., 3) arrays; leading dimensions broadcast.
+
+def euler_to_quaternion_batch(angles):
+    angles = np.asarray(angles, dtype=np.float64)
+    half = angles / 2.0
+    sr, sp, sy = np.sin(half[..., 0]), np.sin(half[..., 1]), np.sin(half[..., 2])
+    cr, cp, cy = np.cos(half[..., 0]), np.cos(half[..., 1]), np.cos(half[..., 2])
+
+    q = np.empty(angles.shape[:-1] + (4,))
+    q[..., 0] = cr * cp * cy + sr * sp * sy
+    q[..., 1] = sr * cp * cy - cr * sp * sy
+    q[..., 2] = cr * sp * cy + sr * cp * sy
+    q[..., 3] = cr * cp * sy - sr * sp * cy
+    return q
+
+
+def quaternion_to_euler_batch(quaternions):
+    q = np.asarray(quaternions, dtype=np.float64)
+    a, b, c, d = q[..., 0], q[..., 1], q[..., 2], q[..., 3]
+
+    angles = np.empty(q.shape[:-1] + (3,))
+    angles[..., 0] = np.arctan2(2.0 * (a * b + c * d), 1.0 - 2.0 * (b ** 2 + c ** 2))
+    angles[..., 1] = np.arcsin(np.clip(2.0 * (a * c - d * b), -1.0, 1.0))
+    angles[..., 2] = np.arctan2(2.0 * (a * d + b * c), 1.0 - 2.0 * (c ** 2 + d ** 2))
+    return angles
+
+
+def quaternion_multiply(p, q):
+    """Hamilton product p * q."""
+    p = np.asarray(p, dtype=np.float64)
+    q = np.asarray(q, dtype=np.float64)
+    a1, b1, c1, d1 = p[..., 0], p[..., 1], p[..., 2], p[..., 3]
+    a2, b2, c2, d2 = q[..., 0], q[..., 1], q[..., 2], q[..., 3]
+
+    r = np.empty(np.broadcast(p, q).shape)
+    r[..., 0] = a1 * a2 - b1 * b2 - c1 * c2 - d1 * d2
+    r[..., 1] = a1 * b2 + b1 * a2 + c1 * d2 - d1 * c2
+    r[..., 2] = a1 * c2 - b1 * d2 + c1 * a2 + d1 * b2
+    r[..., 3] = a1 * d2 + b1 * c2 - c1 * b2 + d1 * a2
+    return r
+
+
+def quaternion_conjugate(q):
+    q = np.array(q, dtype=np.float64)
+    q[..., 1:] *= -1.0
+    return q
+
+
+def quaternion_norm(q):
+    return np.sqrt(np.sum(np.square(q), axis=-1))
+
+
+def quaternion_normalize(q):
+    q = np.asarray(q, dtype=np.float64)
+    return q / quaternion_norm(q)[..., None]
+
+
+def quaternion_inverse(q):
+    q = np.asarray(q, dtype=np.float64)
+    return quaternion_conjugate(q) / np.sum(np.square(q), axis=-1)[..., None]
+
+
+def rotate_vectors(q, v):
+    """
+    Rotates the vectors `v` by the unit quaternions `q` (q v q*).
+
+    For quaternions made by `euler_to_quaternion_batch` this is the
+    same as multiplying by Rz(yaw) Ry(pitch) Rx(roll).
+    """
+    q = np.asarray(q, dtype=np.float64)
+    v = np.asarray(v, dtype=np.float64)
+    w = q[..., :1]
+    u = q[..., 1:]
+    # v' = v + 2 w (u x v) + 2 u x (u x v)
+    t = 2.0 * np.cross(u, v)
+    return v + w * t + np.cross(u, t)
+
+
+def slerp(q0, q1, t):
+    """
+    Spherical linear interpolation between unit quaternions `q0` and
+    `q1` at fractions `t` (scalar or array, broadcast against the
+    leading dimensions). Always takes the shorter arc.
+    """
+    q0 = np.asarray(q0, dtype=np.float64)
+    q1 = np.asarray(q1, dtype=np.float64)
+    t = np.asarray(t, dtype=np.float64)[..., None]
+
+    dot = np.sum(q0 * q1, axis=-1, keepdims=True)
+    q1 = np.where(dot < 0.0, -q1, q1)
+    dot = np.abs(dot)
+
+    # nearly parallel quaternions: fall back to normalized lerp
+    close = dot > 0.9995
+    theta = np.arccos(np.clip(dot, -1.0, 1.0))
+    sin_theta = np.where(close, 1.0, np.sin(theta))
+    w0 = np.where(close, 1.0 - t, np.sin((1.0 - t) * theta) / sin_theta)
+    w1 = np.where(close, t, np.sin(t * theta) / sin_theta)
+    return quaternion_normalize(w0 * q0 + w1 * q1)
+
+
+if __name__ == "__main__":
+    import time
+
+    n = 100000
+    angles = np.random.uniform(-np.pi / 2, np.pi / 2, (n, 3))
+
+    t0 = time.time()
+    scalar = np.array([euler_to_quaternion(a) for a in angles])
+    t1 = time.time()
+    batch = euler_to_quaternion_batch(angles)
+    t2 = time.time()
+    print('euler_to_quaternion: scalar {0:.3f} s, batch {1:.4f} s, max difference {2:.1e}'.format(
+        t1 - t0, t2 - t1, np.abs(scalar - batch).max()))
+
+    t0 = time.time()
+    scalar = np.array([quaternion_to_euler(q) for q in batch])
+    t1 = time.time()
+    euler = quaternion_to_euler_batch(batch)
+    t2 = time.time()
+    print('quaternion_to_euler: scalar {0:.3f} s, batch {1:.4f} s, max difference {2:.1e}'.format(
+        t1 - t0, t2 - t1, np.abs(scalar - euler).max()))
+
+    vectors = np.random.randn(n, 3)
+    t0 = time.time()
+    quaternion_multiply(batch, batch[::-1])
+    t1 = time.time()
+    rotate_vectors(batch, vectors)
+    t2 = time.time()
+    slerp(batch, batch[::-1], np.random.rand(n))
+    t3 = time.time()
+    print('{0} quaternions: multiply {1:.4f} s, rotate {2:.4f} s, slerp {3:.4f} s'.format(
+        n, t1 - t0, t2 - t1, t3 - t2))
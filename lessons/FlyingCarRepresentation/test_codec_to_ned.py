@@ -0,0 +1,22 @@
+from unittest import TestCase
+
+import numpy as np
+from lessons.FlyingCarRepresentation.codec_to_ned import global_to_local, local_to_global, \
+    global_to_local_batch, local_to_global_batch
+
+
+class TestCodecToNed(TestCase):
+    def setUp(self):
+        self.home = [-122.108432, 37.400154, 20]
+        self.local = np.random.RandomState(0).uniform(-3000, 3000, (50, 3))
+
+    def test_local_to_global_batch(self):
+        expect = np.array([local_to_global(p, self.home) for p in self.local])
+        self.assertTrue(np.allclose(local_to_global_batch(self.local, self.home), expect, rtol=0, atol=1e-9))
+
+    def test_global_to_local_batch(self):
+        geodetic = local_to_global_batch(self.local, self.home)
+        expect = np.array([global_to_local(p, self.home) for p in geodetic])
+        result = global_to_local_batch(geodetic, self.home)
+        self.assertTrue(np.allclose(result, expect, rtol=0, atol=1e-6))
+        self.assertTrue(np.allclose(result, self.local, rtol=0, atol=1e-3))
@@ -2,6 +2,7 @@ from unittest import TestCase
 
 from lessons.FlyingCarRepresentation import EulerRotation
 from lessons.FlyingCarRepresentation import Rotation
+from lessons.FlyingCarRepresentation import rotate_batch
 
 import numpy as np
 
@@ -34,3 +35,19 @@ class TestEulerRotation(TestCase):
         self.assertTrue(
             (np.around(rotation, decimals=2) == np.around(expect, decimals=2)).all()
         )
+
+    def test_rotate_batch(self):
+        order = [r[0] for r in self.rotations]
+        angles = np.array([[r[1] for r in self.rotations], [10, -20, 30], [0, 0, 0]])
+        rotations = rotate_batch(angles, order)
+        self.assertEqual(rotations.shape, (3, 3, 3))
+        for a, rotation in zip(angles, rotations):
+            expect = EulerRotation(list(zip(order, a))).rotate()
+            self.assertTrue(np.allclose(rotation, expect))
+
+    def test_rotate_batch_any_order(self):
+        order = [Rotation.YAW, Rotation.ROLL, Rotation.YAW, Rotation.PITCH]
+        angles = np.random.RandomState(0).uniform(-180, 180, (5, 4))
+        for a, rotation in zip(angles, rotate_batch(angles, order)):
+            expect = EulerRotation(list(zip(order, a))).rotate()
+            self.assertTrue(np.allclose(rotation, expect))
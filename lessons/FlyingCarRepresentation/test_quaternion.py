@@ -1,7 +1,10 @@
 from unittest import TestCase
 
 import numpy as np
-from lessons.FlyingCarRepresentation.quaternions import euler_to_quaternion, quaternion_to_euler
+from lessons.FlyingCarRepresentation.quaternions import euler_to_quaternion, quaternion_to_euler, \
+    euler_to_quaternion_batch, quaternion_to_euler_batch, quaternion_multiply, quaternion_conjugate, \
+    quaternion_inverse, rotate_vectors, slerp
+from lessons.FlyingCarRepresentation.euler_rotaion import rotate_batch, ZYX
 
 
 class TestQuaternion(TestCase):
@@ -19,3 +22,37 @@ class TestQuaternion(TestCase):
         self.assertTrue(
             (expect == np.around(e, decimals=3)).all()
         )
+
+    def test_batch_matches_scalar(self):
+        angles = np.random.RandomState(0).uniform(-1.5, 1.5, (20, 3))
+        q = euler_to_quaternion_batch(angles)
+        self.assertTrue(np.allclose(q, [euler_to_quaternion(a) for a in angles]))
+        self.assertTrue(np.allclose(quaternion_to_euler_batch(q), [quaternion_to_euler(x) for x in q]))
+        self.assertTrue(np.allclose(quaternion_to_euler_batch(q), angles))
+
+    def test_rotate_vectors_matches_rotation_matrix(self):
+        rng = np.random.RandomState(1)
+        angles = rng.uniform(-np.pi, np.pi, (20, 3))
+        vectors = rng.randn(20, 3)
+        expect = np.einsum('nij,nj->ni', rotate_batch(angles, ZYX, degrees=False), vectors)
+        self.assertTrue(np.allclose(rotate_vectors(euler_to_quaternion_batch(angles), vectors), expect))
+
+    def test_multiply_composes_rotations(self):
+        rng = np.random.RandomState(2)
+        p = euler_to_quaternion_batch(rng.uniform(-np.pi, np.pi, (10, 3)))
+        q = euler_to_quaternion_batch(rng.uniform(-np.pi, np.pi, (10, 3)))
+        v = rng.randn(10, 3)
+        self.assertTrue(np.allclose(rotate_vectors(quaternion_multiply(p, q), v),
+                                    rotate_vectors(p, rotate_vectors(q, v))))
+        identity = quaternion_multiply(2.0 * q, quaternion_inverse(2.0 * q))
+        self.assertTrue(np.allclose(identity, [1.0, 0.0, 0.0, 0.0]))
+        self.assertTrue(np.allclose(quaternion_conjugate(q), quaternion_inverse(q)))
+
+    def test_slerp(self):
+        q0 = euler_to_quaternion_batch(np.array([[0.0, 0.0, 0.0]]))
+        q1 = euler_to_quaternion_batch(np.array([[0.0, 0.0, np.deg2rad(90)]]))
+        t = np.array([0.0, 0.5, 1.0])
+        q = slerp(q0, q1, t)
+        yaw = np.rad2deg(quaternion_to_euler_batch(q)[:, 2])
+        self.assertTrue(np.allclose(yaw, [0.0, 45.0, 90.0]))
+        self.assertTrue(np.allclose(slerp(q1, -q1, 0.3), q1))
@@ -38,7 +38,7 @@ def create_voxmap(data, voxel_size=5):
     east_size = int(np.ceil((east_max - east_min))) // voxel_size
     alt_size = int(alt_max) // voxel_size
 
-    voxmap = np.zeros((north_size, east_size, alt_size), dtype=np.bool)
+    voxmap = np.zeros((north_size, east_size, alt_size), dtype=bool)
 
     for i in range(data.shape[0]):
         # continue
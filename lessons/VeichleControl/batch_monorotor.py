@@ -0,0 +1,219 @@
+"""
+Vectorized Monte Carlo simulation of the monorotor control lessons.
+
+`BatchMonorotor` advances N independent monorotors at once, with their
+states stored as one (N, 2) array of [z, z_dot] rows. The batched
+controllers mirror the lesson controllers (open loop, P, PD, PD with
+feed forward and PID) but accept arrays of gains and masses, one entry
+per vehicle, so a whole parameter sweep runs as a single simulation:
+
+    k_p, k_d, mass_error = parameter_grid(k_p=np.linspace(5, 35, 100),
+                                          k_d=np.linspace(0, 10, 100),
+                                          mass_error=np.linspace(0.7, 1.3, 10))
+    drones = BatchMonorotor(len(k_p))
+    controller = BatchPDController(k_p, k_d, drones.m * mass_error)
+    result = simulate(drones, controller, t, z_path, z_dot_path)
+"""
+import numpy as np
+
+
+class BatchMonorotor:
+
+    def __init__(self, n, m=1.0):
+        self.n = n
+        self.m = np.broadcast_to(np.asarray(m, dtype=np.float64), (n,)).copy()
+        self.g = 9.81
+
+        self.thrust = np.zeros(n)
+
+        # one [z, z_dot] row per vehicle
+        # column-major, so the z and z_dot columns are contiguous
+        self.X = np.zeros((n, 2), order='F')
+
+    @property
+    def z(self):
+        return self.X[:, 0]
+
+    @property
+    def z_dot(self):
+        return self.X[:, 1]
+
+    @property
+    def z_dot_dot(self):
+        f_net = self.m * self.g - self.thrust
+        return f_net / self.m
+
+    def advance_state(self, dt):
+        """Euler step of every vehicle, in place."""
+        z_dot_dot = self.z_dot_dot
+        self.X[:, 0] += self.X[:, 1] * dt
+        self.X[:, 1] += z_dot_dot * dt
+        return self.X
+
+
+class BatchOpenLoopController:
+
+    def __init__(self, vehicle_mass, initial_state=None):
+        self.vehicle_mass = np.asarray(vehicle_mass, dtype=np.float64)
+        n = self.vehicle_mass.size
+        if initial_state is None:
+            initial_state = np.zeros((n, 2))
+        # the controller's BELIEF about the state of every vehicle
+        self.vehicle_state = np.array(initial_state, dtype=np.float64)
+        self.g = 9.81
+
+    def thrust_control(self, target_z, dt):
+        current_z = self.vehicle_state[:, 0]
+        current_z_dot = self.vehicle_state[:, 1]
+        delta_z = target_z - current_z
+        target_z_dot = delta_z / dt
+
+        delta_z_dot = target_z_dot - current_z_dot
+        target_z_dot_dot = delta_z_dot / dt
+
+        target_f_net = target_z_dot_dot * self.vehicle_mass
+        thrust = self.vehicle_mass * self.g - target_f_net
+
+        self.vehicle_state[:, 0] += delta_z
+        self.vehicle_state[:, 1] += delta_z_dot
+        return thrust
+
+
+class BatchPIDController:
+    """
+    PID controller with optional feed forward acceleration. Gains and
+    mass can be scalars or one value per vehicle.
+    """
+
+    def __init__(self, k_p, k_d, k_i, m):
+        self.k_p = np.asarray(k_p, dtype=np.float64)
+        self.k_d = np.asarray(k_d, dtype=np.float64)
+        self.k_i = np.asarray(k_i, dtype=np.float64)
+        self.vehicle_mass = np.asarray(m, dtype=np.float64)
+        self.g = 9.81
+        self.integrated_error = 0.0
+
+    def thrust_control(self, z_target, z_actual, z_dot_target, z_dot_actual, dt=0.1, z_dot_dot_ff=0.0):
+        e = z_target - z_actual
+        self.integrated_error = self.integrated_error + e
+        e_dot = z_dot_target - z_dot_actual
+        u_bar = self.k_p * e + self.k_d * e_dot + self.k_i * self.integrated_error * dt + z_dot_dot_ff
+        return self.vehicle_mass * (self.g - u_bar)
+
+
+class BatchPDController(BatchPIDController):
+    """PD controller; pass `z_dot_dot_ff` to use the feed forward term."""
+
+    def __init__(self, k_p, k_d, m):
+        super().__init__(k_p, k_d, 0.0, m)
+
+    def thrust_control(self, z_target, z_actual, z_dot_target, z_dot_actual, dt=0.1, z_dot_dot_ff=0.0):
+        e = z_target - z_actual
+        e_dot = z_dot_target - z_dot_actual
+        u_bar = self.k_p * e + self.k_d * e_dot + z_dot_dot_ff
+        return self.vehicle_mass * (self.g - u_bar)
+
+
+class BatchPController(BatchPDController):
+
+    def __init__(self, k_p, m):
+        super().__init__(k_p, 0.0, m)
+
+    def thrust_control(self, z_target, z_actual, z_dot_target=0.0, z_dot_actual=0.0, dt=0.1, z_dot_dot_ff=0.0):
+        e = z_target - z_actual
+        u_bar = self.k_p * e
+        return self.vehicle_mass * (self.g - u_bar)
+
+
+def parameter_grid(**ranges):
+    """
+    Returns the flattened cartesian product of the given 1D ranges,
+    one array per keyword, in keyword order.
+    """
+    grids = np.meshgrid(*[np.asarray(r, dtype=np.float64) for r in ranges.values()], indexing='ij')
+    return [g.ravel() for g in grids]
+
+
+def simulate(drones, controller, t, z_path, z_dot_path=None, z_dot_dot_path=None,
+             position_sigma=0.0, velocity_sigma=0.0, seed=0, recorder=None):
+    """
+    Runs every vehicle in `drones` along the same target trajectory.
+
+    `position_sigma` and `velocity_sigma` (scalars or per-vehicle
+    arrays) add Gaussian noise to the state the controller sees. Open
+    loop controllers only receive `z_path`. Feed forward is used if
+    `z_dot_dot_path` is given.
+
+    Returns a dict with the final states and the max / RMS position
+    error of every vehicle. The full history is not kept; pass a
+    `recorder` with a `record(X)` method to store it.
+    """
+    dt = t[1] - t[0]
+    rng = np.random.default_rng(seed)
+    n = drones.n
+    position_sigma = np.asarray(position_sigma, dtype=np.float64)
+    velocity_sigma = np.asarray(velocity_sigma, dtype=np.float64)
+    # drawing the noise costs more than the dynamics, skip it when unused
+    position_noise = bool(position_sigma.any())
+    velocity_noise = bool(velocity_sigma.any())
+    open_loop = isinstance(controller, BatchOpenLoopController)
+
+    max_error = np.zeros(n)
+    squared_error = np.zeros(n)
+    for i, z_target in enumerate(z_path):
+        if recorder is not None:
+            recorder.record(drones.X)
+
+        if open_loop:
+            thrust = controller.thrust_control(z_target, dt)
+        else:
+            z_actual = drones.z
+            z_dot_actual = drones.z_dot
+            if position_noise:
+                z_actual = z_actual + position_sigma * rng.standard_normal(n)
+            if velocity_noise:
+                z_dot_actual = z_dot_actual + velocity_sigma * rng.standard_normal(n)
+            z_dot_target = 0.0 if z_dot_path is None else z_dot_path[i]
+            z_dot_dot_ff = 0.0 if z_dot_dot_path is None else z_dot_dot_path[i]
+            thrust = controller.thrust_control(z_target, z_actual, z_dot_target, z_dot_actual,
+                                               dt, z_dot_dot_ff)
+
+        drones.thrust = thrust
+        drones.advance_state(dt)
+
+        error = np.abs(drones.z - z_target)
+        np.maximum(max_error, error, out=max_error)
+        squared_error += error ** 2
+
+    return {
+        'final_state': drones.X.copy(),
+        'max_error': max_error,
+        'rms_error': np.sqrt(squared_error / len(z_path)),
+    }
+
+
+if __name__ == "__main__":
+    import time
+
+    # 100 x 100 x 10 = 100k (k_p, k_d, mass error) combinations of a PD
+    # controller following the cosine trajectory of the feed forward lesson
+    k_p, k_d, mass_error = parameter_grid(k_p=np.linspace(5, 35, 100),
+                                          k_d=np.linspace(0, 10, 100),
+                                          mass_error=np.linspace(0.7, 1.3, 10))
+    t = np.linspace(0.0, 6.0, 1000)
+    omega = 5.0
+    z_path = 0.5 * np.cos(omega * t) - 0.5
+    z_dot_path = -0.5 * omega * np.sin(omega * t)
+    z_dot_dot_path = -0.5 * omega ** 2 * np.cos(omega * t)
+
+    drones = BatchMonorotor(len(k_p))
+    controller = BatchPDController(k_p, k_d, drones.m * mass_error)
+
+    t0 = time.time()
+    result = simulate(drones, controller, t, z_path, z_dot_path, z_dot_dot_path, position_sigma=0.001)
+    elapsed = time.time() - t0
+
+    best = np.argmin(result['rms_error'])
+    print('{0} vehicles x {1} steps in {2:.2f} s'.format(len(k_p), len(t), elapsed))
+    print('best: k_p={0:.1f} k_d={1:.1f} mass_error={2:.2f} rms error={3:.4f} m'.format(
+        k_p[best], k_d[best], mass_error[best], result['rms_error'][best]))
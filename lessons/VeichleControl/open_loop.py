@@ -16,6 +16,7 @@
 import numpy as np 
 import matplotlib.pyplot as plt
 import matplotlib.pylab as pylab
+from simulation_recorder import SimulationRecorder
 # from simplified_monorotor import Monorotor
 # import plotting
 # import testing
@@ -183,15 +184,15 @@ perceived_mass = drone_mass * MASS_ERROR
 controller = OpenLoopController(perceived_mass, drone_start_state)
 
 # 2. Run the simulation
-drone_state_history = []
+drone_state_history = SimulationRecorder(len(z_path), drone.X.shape, fields=('z', 'z_dot'))
 for target_z in z_path:
-    drone_state_history.append(drone.X)
+    drone_state_history.record(drone.X)
     thrust = controller.thrust_control(target_z, dt)
     drone.thrust = thrust
     drone.advance_state(dt)
 
 # 3. Generate plots
-z_actual = [h[0] for h in drone_state_history] 
+z_actual = drone_state_history['z']
 # plotting.compare_planned_to_actual(z_actual, z_path, t)
 
 
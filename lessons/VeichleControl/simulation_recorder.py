@@ -0,0 +1,69 @@
+import numpy as np
+
+
+class SimulationRecorder:
+    """
+    Fixed-size state history for the lesson simulators.
+
+    Instead of appending `drone.X` to a list and converting it
+    afterwards, the recorder preallocates one contiguous
+    (steps, *state_shape) array and copies every state into the next
+    row. Memory use is known up front, and the history is ready for
+    analysis as it is:
+
+        recorder = SimulationRecorder(len(z_path), drone.X.shape, fields=('z', 'z_dot'))
+        for target_z in z_path:
+            recorder.record(drone.X)
+            ...
+        z_actual = recorder['z']
+
+    With `filename` the buffer is a memory-mapped `.npy` file instead of
+    RAM, for runs whose history does not fit in memory; it can be
+    reopened later with `np.load(filename, mmap_mode='r')`.
+
+    `fields` optionally names the entries of the last state axis so
+    they can be read back as `recorder[name]`.
+    """
+
+    def __init__(self, steps, state_shape, dtype=np.float64, filename=None, fields=None):
+        if np.isscalar(state_shape):
+            state_shape = (state_shape,)
+        shape = (steps,) + tuple(state_shape)
+        if filename is None:
+            self._buffer = np.empty(shape, dtype=dtype)
+        else:
+            self._buffer = np.lib.format.open_memmap(filename, mode='w+', dtype=dtype, shape=shape)
+        self.filename = filename
+        self.count = 0
+        self._fields = {name: i for i, name in enumerate(fields or ())}
+
+    @property
+    def capacity(self):
+        return self._buffer.shape[0]
+
+    @property
+    def nbytes(self):
+        return self._buffer.nbytes
+
+    @property
+    def history(self):
+        """The recorded states so far, as a (count, *state_shape) view."""
+        return self._buffer[:self.count]
+
+    def record(self, state):
+        """Copies `state` into the next row of the buffer."""
+        if self.count >= self.capacity:
+            raise IndexError('recorder is full ({0} steps)'.format(self.capacity))
+        self._buffer[self.count] = state
+        self.count += 1
+
+    def __getitem__(self, name):
+        return self.history[..., self._fields[name]]
+
+    def __len__(self):
+        return self.count
+
+    def flush(self):
+        """Writes a memory-mapped history to disk."""
+        if self.filename is not None:
+            self._buffer.flush()
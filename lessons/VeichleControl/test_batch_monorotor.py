@@ -0,0 +1,54 @@
+from unittest import TestCase
+
+import numpy as np
+from lessons.VeichleControl.batch_monorotor import BatchMonorotor, BatchOpenLoopController, \
+    BatchPIDController, BatchPDController, parameter_grid, simulate
+
+
+def scalar_pid(k_p, k_d, k_i, mass_error, t, z_path, z_dot_path):
+    # the Monorotor / PIDController loop of the lessons, one vehicle at a time
+    g = 9.81
+    m = 1.0
+    X = np.array([0.0, 0.0])
+    integrated_error = 0.0
+    dt = t[1] - t[0]
+    for z_target, z_dot_target in zip(z_path, z_dot_path):
+        e = z_target - X[0]
+        integrated_error += e
+        e_dot = z_dot_target - X[1]
+        u_bar = k_p * e + k_d * e_dot + k_i * integrated_error * dt
+        thrust = m * mass_error * (g - u_bar)
+        X = X + np.array([X[1], (m * g - thrust) / m]) * dt
+    return X
+
+
+class TestBatchMonorotor(TestCase):
+
+    def setUp(self):
+        self.t = np.linspace(0.0, 2.0, 500)
+        self.z_path = 0.5 * np.cos(2 * self.t) - 0.5
+        self.z_dot_path = -np.sin(2 * self.t)
+
+    def test_pid_matches_scalar(self):
+        k_p, k_i, mass_error = parameter_grid(k_p=[10.0, 20.0], k_i=[0.0, 2.5], mass_error=[0.9, 1.5])
+        drones = BatchMonorotor(len(k_p))
+        controller = BatchPIDController(k_p, 5.0, k_i, drones.m * mass_error)
+        result = simulate(drones, controller, self.t, self.z_path, self.z_dot_path)
+        for i in range(len(k_p)):
+            expect = scalar_pid(k_p[i], 5.0, k_i[i], mass_error[i], self.t, self.z_path, self.z_dot_path)
+            self.assertTrue(np.allclose(result['final_state'][i], expect))
+
+    def test_pd_is_pid_without_integral(self):
+        a = BatchMonorotor(3)
+        b = BatchMonorotor(3)
+        result_a = simulate(a, BatchPDController([1.0, 5.0, 20.0], 3.0, 1.2), self.t, self.z_path, self.z_dot_path)
+        result_b = simulate(b, BatchPIDController([1.0, 5.0, 20.0], 3.0, 0.0, 1.2), self.t, self.z_path,
+                            self.z_dot_path)
+        self.assertTrue(np.allclose(result_a['final_state'], result_b['final_state']))
+
+    def test_open_loop_drifts_with_mass_error(self):
+        drones = BatchMonorotor(2)
+        controller = BatchOpenLoopController(drones.m * np.array([1.0, 1.01]))
+        result = simulate(drones, controller, self.t, self.z_path)
+        self.assertLess(result['max_error'][0], 0.01)
+        self.assertGreater(result['max_error'][1], 10 * result['max_error'][0])
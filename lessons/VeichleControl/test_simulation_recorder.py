@@ -0,0 +1,41 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+from lessons.VeichleControl.simulation_recorder import SimulationRecorder
+from lessons.VeichleControl.batch_monorotor import BatchMonorotor, BatchPDController, simulate
+
+
+class TestSimulationRecorder(TestCase):
+
+    def test_record_copies_state(self):
+        recorder = SimulationRecorder(3, 2, fields=('z', 'z_dot'))
+        state = np.array([1.0, 2.0])
+        recorder.record(state)
+        state[0] = 5.0
+        recorder.record(state)
+        self.assertEqual(len(recorder), 2)
+        self.assertEqual(recorder.history.shape, (2, 2))
+        self.assertTrue((recorder['z'] == [1.0, 5.0]).all())
+        self.assertTrue((recorder['z_dot'] == [2.0, 2.0]).all())
+        recorder.record(state)
+        self.assertRaises(IndexError, recorder.record, state)
+
+    def test_memory_mapped_batch_history(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        filename = os.path.join(directory, 'history.npy')
+
+        t = np.linspace(0.0, 1.0, 100)
+        z_path = -np.ones_like(t)
+        drones = BatchMonorotor(4)
+        recorder = SimulationRecorder(len(t), drones.X.shape, filename=filename, fields=('z', 'z_dot'))
+        simulate(drones, BatchPDController(20.0, 5.0, 1.0), t, z_path, recorder=recorder)
+        recorder.flush()
+
+        history = np.load(filename, mmap_mode='r')
+        self.assertEqual(history.shape, (100, 4, 2))
+        self.assertTrue((history[:, :, 0] == recorder['z']).all())
+        self.assertTrue((history[0] == 0.0).all())
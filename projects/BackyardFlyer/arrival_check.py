@@ -0,0 +1,93 @@
+# copy of FCND-Motion-Planning/arrival_check.py, the projects do not import each other
+import math
+
+
+def as_floats(vector):
+    """Python floats of a telemetry vector, without numpy temporaries."""
+    return vector.tolist() if hasattr(vector, 'tolist') else vector
+
+
+class ArrivalCheck:
+    """
+    Arrival and transition checks for the telemetry callbacks.
+
+    The target is held as plain floats and the telemetry arrays
+    (`local_position`, `local_velocity`) are only read, never sliced,
+    copied or written, so a check costs a few float operations instead
+    of the numpy temporaries of `np.linalg.norm(v[0:2])` or
+    `abs(target - position)`, and never negates the drone's own
+    `local_position` the way an in-place NED to altitude conversion does.
+
+        check = ArrivalCheck(tolerance=0.1)
+        check.set_target(10.0, 0.0, 3.0)
+        if check.reached(self.local_position):
+            ...
+
+    Positions are north, east, down as the drone reports them; targets
+    are north, east, altitude as they are commanded.
+
+    With `decimation` > 1, `due()` is True on one of every `decimation`
+    calls, so a callback can skip its checks on the other messages when
+    the telemetry rate is higher than the state machine needs.
+    """
+
+    def __init__(self, tolerance=0.1, decimation=1):
+        self.tolerance = tolerance
+        self.decimation = max(int(decimation), 1)
+        self._calls = 0
+        self.north = 0.0
+        self.east = 0.0
+        self.altitude = 0.0
+
+    def set_target(self, north, east, altitude):
+        self.north = float(north)
+        self.east = float(east)
+        self.altitude = float(altitude)
+
+    @property
+    def target(self):
+        return self.north, self.east, self.altitude
+
+    def due(self):
+        """Counts a callback, True when the checks should run on this one."""
+        self._calls += 1
+        if self._calls >= self.decimation:
+            self._calls = 0
+            return True
+        return False
+
+    def reached(self, position, tolerance=None):
+        """True when every axis of `position` (NED) is within the tolerance of the target."""
+        if tolerance is None:
+            tolerance = self.tolerance
+        north, east, down = as_floats(position)[:3]
+        return (abs(north - self.north) < tolerance and abs(east - self.east) < tolerance
+                and abs(-down - self.altitude) < tolerance)
+
+    def horizontal_distance(self, position):
+        north, east = as_floats(position)[:2]
+        return math.hypot(north - self.north, east - self.east)
+
+    def within(self, position, radius):
+        """True when `position` is horizontally within `radius` of the target."""
+        north, east = as_floats(position)[:2]
+        dn = north - self.north
+        de = east - self.east
+        return dn * dn + de * de < radius * radius
+
+    def climbed(self, position, fraction=0.95):
+        """True once the altitude of `position` is above `fraction` of the target altitude."""
+        return -as_floats(position)[2] > fraction * self.altitude
+
+
+def slower_than(velocity, speed):
+    """True when the horizontal speed of `velocity` (NED) is below `speed`."""
+    vn, ve = as_floats(velocity)[:2]
+    return vn * vn + ve * ve < speed * speed
+
+
+def landed(global_position, global_home, local_position, altitude=0.1, down=0.01):
+    """True when the drone is within `altitude` of home and `down` of the local origin."""
+    return (as_floats(global_position)[2] - as_floats(global_home)[2] < altitude
+            and abs(as_floats(local_position)[2]) < down)
+
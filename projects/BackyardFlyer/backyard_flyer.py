@@ -8,6 +8,9 @@ from udacidrone import Drone
 from udacidrone.connection import MavlinkConnection, WebSocketConnection  # noqa: F401
 from udacidrone.messaging import MsgID
 
+from arrival_check import ArrivalCheck, landed
+from waypoint_dispatcher import WaypointDispatcher
+
 
 class States(Enum):
     MANUAL = 0
@@ -23,7 +26,8 @@ class BackyardFlyer(Drone):
     def __init__(self, connection):
         super().__init__(connection)
         self.target_position = np.array([0.0, 0.0, 0.0])
-        self.all_waypoints = []
+        self.all_waypoints = WaypointDispatcher(acceptance_radius=0.1, lookahead_radius=2.0)
+        self.arrival = ArrivalCheck(tolerance=0.1)
         self.in_mission = True
         self.check_state = {}
 
@@ -41,16 +45,16 @@ class BackyardFlyer(Drone):
         This triggers when `MsgID.LOCAL_POSITION` is received and self.local_position contains new data
         """
         if self.flight_state == States.TAKEOFF:
-            # coordinate conversion 
-            altitude = -1.0 * self.local_position[2]
             # check if altitude is within 95% of target
-            if altitude > 0.95 * self.target_position[2]:
+            if self.arrival.climbed(self.local_position):
                 # self.landing_transition()
                 self.waypoint_transition()
         elif self.flight_state == States.WAYPOINT:
-            if self.has_reached_target() and len(self.all_waypoints) > 0:
-                self.waypoint_transition()
-            elif self.has_reached_target() and len(self.all_waypoints) == 0:
+            if len(self.all_waypoints) > 0:
+                # fly through the corners, command the next leg inside the lookahead radius
+                if self.all_waypoints.reached(self.local_position):
+                    self.waypoint_transition()
+            elif self.has_reached_target():
                 self.landing_transition()
 
     def velocity_callback(self):
@@ -59,7 +63,7 @@ class BackyardFlyer(Drone):
         This triggers when `MsgID.LOCAL_VELOCITY` is received and self.local_velocity contains new data
         """
         if self.flight_state == States.LANDING:
-            if ((self.global_position[2] - self.global_home[2] < 0.1) and abs(self.local_position[2]) < 0.01):
+            if landed(self.global_position, self.global_home, self.local_position):
                 self.disarming_transition()
 
     def state_callback(self):
@@ -80,19 +84,15 @@ class BackyardFlyer(Drone):
         """
         check drone has reached target waypoint and return True or False.
         """
-        current_local_position = self.local_position
-        current_local_position[2] = -1.0 * current_local_position[2]
-        return (abs(self.target_position - current_local_position) < 0.1).all()
+        return self.arrival.reached(self.local_position)
 
-    def calculate_box(self):
+    @staticmethod
+    def calculate_box():
         """
 
         1. Return waypoints to fly a box
         """
-        if len(self.all_waypoints) > 1:
-            return self.all_waypoints.pop()
-        else:
-            return self.all_waypoints.pop()
+        return [[10.0, 0.0, 3.0], [10.0, 10.0, 3.0], [0.0, 10.0, 3.0], [0.0, 0.0, 3.0]]
 
     def arming_transition(self):
         """
@@ -121,12 +121,9 @@ class BackyardFlyer(Drone):
         """
         print("takeoff transition")
         target_altitude = 3.0
-        # put waypoints reverse order to use pop operation for list
-        self.all_waypoints.append(np.array([0.0, 0.0, 3.0]))
-        self.all_waypoints.append(np.array([0.0, 10.0, 3.0]))
-        self.all_waypoints.append(np.array([10.0, 10.0, 3.0]))
-        self.all_waypoints.append(np.array([10.0, 0.0, 3.0]))
+        self.all_waypoints.replace(self.calculate_box())
         self.target_position[2] = target_altitude
+        self.arrival.set_target(self.local_position[0], self.local_position[1], target_altitude)
         self.takeoff(target_altitude)
         self.flight_state = States.TAKEOFF
 
@@ -137,7 +134,8 @@ class BackyardFlyer(Drone):
         2. Transition to WAYPOINT state
         """
         print("waypoint transition")
-        self.target_position = self.calculate_box()
+        self.target_position = self.all_waypoints.next()
+        self.arrival.set_target(*self.target_position)
         self.cmd_position(*self.target_position, 0.0)
         self.flight_state = States.WAYPOINT
 
@@ -0,0 +1,147 @@
+"""
+Synthetic city maps in the colliders.csv format, for scale testing.
+
+The city is a square grid of blocks separated by streets. Every block is
+split into lots, each lot holds a building with probability `density`,
+and building heights are drawn from a log-normal distribution. The map
+is produced one row of blocks at a time and streamed to disk, so maps
+far larger than memory can be written:
+
+    python city_generator.py --obstacles 3845000 --output city_1000x.csv
+"""
+import argparse
+import math
+
+import numpy as np
+
+COLLIDERS_HEADER = 'posX,posY,posZ,halfSizeX,halfSizeY,halfSizeZ'
+
+
+class CityParams:
+    """
+    Layout parameters of a synthetic city (all lengths in metres).
+
+    Raises ValueError if the extent cannot hold a single block and its
+    street, or if `lot_margin` leaves no room for a building in a lot.
+    """
+
+    def __init__(self, extent=1000.0, block_size=80.0, street_width=20.0, lots_per_side=4,
+                 density=0.7, median_height=15.0, height_sigma=0.8, max_height=200.0,
+                 lot_margin=1.0):
+        if extent < block_size + street_width:
+            raise ValueError('extent {0} is smaller than one block and street ({1})'.format(
+                extent, block_size + street_width))
+        if lot_margin >= block_size / lots_per_side / 2.0:
+            raise ValueError('lot_margin {0} leaves no room for buildings in {1} m lots'.format(
+                lot_margin, block_size / lots_per_side))
+        self.extent = extent
+        self.block_size = block_size
+        self.street_width = street_width
+        self.lots_per_side = lots_per_side
+        self.density = density
+        self.median_height = median_height
+        self.height_sigma = height_sigma
+        self.max_height = max_height
+        self.lot_margin = lot_margin
+
+    @property
+    def pitch(self):
+        return self.block_size + self.street_width
+
+    @property
+    def blocks_per_side(self):
+        return max(1, int(self.extent // self.pitch))
+
+    def expected_obstacles(self):
+        return self.blocks_per_side ** 2 * self.lots_per_side ** 2 * self.density
+
+    def scaled_to(self, num_obstacles):
+        """Returns a copy whose extent gives about `num_obstacles` buildings."""
+        per_block = self.lots_per_side ** 2 * self.density
+        blocks_per_side = max(1, int(math.ceil(math.sqrt(num_obstacles / per_block))))
+        params = CityParams(**vars(self))
+        params.extent = blocks_per_side * self.pitch
+        return params
+
+
+def generate_city(params, seed=0):
+    """
+    Yields the obstacles of the city as (k, 6) arrays of colliders rows,
+    one row of blocks at a time. The city is centred on the origin.
+    """
+    rng = np.random.RandomState(seed)
+    n_blocks = params.blocks_per_side
+    lots = params.lots_per_side
+    lot_size = params.block_size / lots
+    half = lot_size / 2.0 - params.lot_margin
+    origin = -n_blocks * params.pitch / 2.0 + params.street_width / 2.0
+
+    # lot centres inside one block
+    offsets = (np.arange(lots) + 0.5) * lot_size
+    lot_north, lot_east = np.meshgrid(offsets, offsets, indexing='ij')
+    lot_north = lot_north.ravel()
+    lot_east = lot_east.ravel()
+
+    block_east = origin + np.arange(n_blocks) * params.pitch
+    east = (block_east[:, None] + lot_east[None, :]).ravel()
+    north_in_row = np.tile(lot_north, n_blocks)
+
+    for row in range(n_blocks):
+        north = origin + row * params.pitch + north_in_row
+        keep = rng.rand(north.size) < params.density
+        count = int(keep.sum())
+        height = np.minimum(params.median_height * rng.lognormal(0.0, params.height_sigma, count),
+                            params.max_height)
+        chunk = np.empty((count, 6))
+        chunk[:, 0] = north[keep]
+        chunk[:, 1] = east[keep]
+        chunk[:, 2] = height / 2.0
+        chunk[:, 3] = half
+        chunk[:, 4] = half
+        chunk[:, 5] = height / 2.0
+        yield chunk
+
+
+def write_colliders(filename, chunks, lat0=37.792480, lon0=-122.397450):
+    """
+    Streams obstacle chunks to a colliders-format file and returns the
+    number of obstacles written.
+    """
+    written = 0
+    with open(filename, 'w') as f:
+        f.write('lat0 {0:.6f}, lon0 {1:.6f}\n'.format(lat0, lon0))
+        f.write(COLLIDERS_HEADER + '\n')
+        for chunk in chunks:
+            np.savetxt(f, chunk, fmt='%.4f', delimiter=',')
+            written += len(chunk)
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--output', type=str, default='city.csv', help='output colliders file')
+    parser.add_argument('--obstacles', type=int, default=None,
+                        help='approximate number of buildings (overrides --extent)')
+    parser.add_argument('--extent', type=float, default=1000.0, help='side length of the city in metres')
+    parser.add_argument('--block-size', type=float, default=80.0, help='side length of a block')
+    parser.add_argument('--street-width', type=float, default=20.0, help='width of the streets')
+    parser.add_argument('--lots', type=int, default=4, help='lots per block side')
+    parser.add_argument('--density', type=float, default=0.7, help='probability that a lot is built')
+    parser.add_argument('--median-height', type=float, default=15.0, help='median building height')
+    parser.add_argument('--height-sigma', type=float, default=0.8, help='log-normal sigma of the heights')
+    parser.add_argument('--max-height', type=float, default=200.0, help='tallest building')
+    parser.add_argument('--lot-margin', type=float, default=1.0, help='gap between a building and its lot edge')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    parser.add_argument('--lat0', type=float, default=37.792480, help='home latitude')
+    parser.add_argument('--lon0', type=float, default=-122.397450, help='home longitude')
+    args = parser.parse_args()
+
+    params = CityParams(args.extent, args.block_size, args.street_width, args.lots, args.density,
+                        args.median_height, args.height_sigma, args.max_height, args.lot_margin)
+    if args.obstacles is not None:
+        params = params.scaled_to(args.obstacles)
+
+    print('Writing a {0:.0f} m city, about {1:.0f} obstacles, to {2}'.format(
+        params.extent, params.expected_obstacles(), args.output))
+    count = write_colliders(args.output, generate_city(params, args.seed), args.lat0, args.lon0)
+    print('{0} obstacles written'.format(count))
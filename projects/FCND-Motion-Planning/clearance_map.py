@@ -0,0 +1,145 @@
+import numpy as np
+
+from planning_utils import create_grid
+
+
+def distance_transform(obstacles):
+    """
+    Returns the Euclidean distance (in cells) from every cell of a
+    2D boolean obstacle grid to the nearest obstacle cell.
+
+    Obstacle cells have distance 0. If the grid holds no obstacle at all
+    every cell is set to `np.inf`.
+
+    This is the separable lower-envelope algorithm of Felzenszwalb and
+    Huttenlocher. Both passes loop over one axis only and are vectorized
+    over the other one, so the cost is O(cells) numpy work.
+    """
+    obstacles = np.asarray(obstacles, dtype=bool)
+    n, m = obstacles.shape
+    if not obstacles.any():
+        return np.full((n, m), np.inf)
+
+    # any value larger than the grid diagonal works as "no obstacle"
+    far = float(n + m)
+
+    # 1. distance to the nearest obstacle along each column
+    column = np.empty((n, m))
+    column[0] = np.where(obstacles[0], 0.0, far)
+    for i in range(1, n):
+        column[i] = np.where(obstacles[i], 0.0, column[i - 1] + 1.0)
+    for i in range(n - 2, -1, -1):
+        column[i] = np.minimum(column[i], column[i + 1] + 1.0)
+    np.minimum(column, far, out=column)
+
+    # 2. lower envelope of the parabolas along each row
+    squared = _lower_envelope(column ** 2)
+    return np.sqrt(squared)
+
+
+def _lower_envelope(f):
+    """
+    Computes min_q ((p - q)^2 + f[:, q]) for every row of `f` at once.
+    """
+    rows, m = f.shape
+    r = np.arange(rows)
+    positions = np.arange(m, dtype=float)
+
+    v = np.zeros((rows, m), dtype=np.intp)
+    z = np.empty((rows, m + 1))
+    z[:, 0] = -np.inf
+    z[:, 1] = np.inf
+    k = np.zeros(rows, dtype=np.intp)
+
+    for q in range(1, m):
+        fq = f[:, q] + q * q
+        vk = v[r, k]
+        s = (fq - (f[r, vk] + positions[vk] ** 2)) / (2.0 * (q - vk))
+        pop = s <= z[r, k]
+        while pop.any():
+            k[pop] -= 1
+            vk = v[r, k]
+            s_new = (fq - (f[r, vk] + positions[vk] ** 2)) / (2.0 * (q - vk))
+            s = np.where(pop, s_new, s)
+            pop &= s <= z[r, k]
+        k += 1
+        v[r, k] = q
+        z[r, k] = s
+        z[r, k + 1] = np.inf
+
+    squared = np.empty((rows, m))
+    k[:] = 0
+    for q in range(m):
+        advance = z[r, k + 1] < q
+        while advance.any():
+            k[advance] += 1
+            advance &= z[r, k + 1] < q
+        vk = v[r, k]
+        squared[:, q] = (q - vk) ** 2 + f[r, vk]
+    return squared
+
+
+class ClearanceMap:
+    """
+    Distance-to-obstacle field for a 2.5D obstacle map at one altitude.
+
+    The obstacle footprints are rasterized once, without any horizontal
+    inflation, and the Euclidean distance transform is computed lazily
+    the first time it is needed and then cached. Any safety distance is
+    then a threshold over that field:
+
+        clearance = ClearanceMap(data, TARGET_ALTITUDE, vertical_margin=7)
+        for safety_distance in (3, 5, 7):
+            grid = clearance.grid(safety_distance)
+
+    `vertical_margin` plays the role `safety_distance` has in the
+    altitude test of `create_grid`: an obstacle is part of the map if
+    its top lies above `drone_altitude - vertical_margin`. Pass the
+    largest safety distance you intend to sweep so that every grid is at
+    least as conservative as the `create_grid` one.
+
+    Thresholding a Euclidean field inflates obstacles with rounded
+    corners, where `create_grid` inflates them with square boxes.
+    """
+
+    def __init__(self, data, drone_altitude, vertical_margin=0):
+        self.drone_altitude = drone_altitude
+        self.vertical_margin = vertical_margin
+        footprint, self.north_offset, self.east_offset = create_grid(
+            data, drone_altitude - vertical_margin, 0)
+        self.footprint = footprint.astype(bool)
+        self._distance = None
+
+    @property
+    def shape(self):
+        return self.footprint.shape
+
+    @property
+    def distance(self):
+        """Distance in metres from each cell to the nearest obstacle."""
+        if self._distance is None:
+            self._distance = distance_transform(self.footprint)
+        return self._distance
+
+    def grid(self, safety_distance):
+        """
+        Returns a grid in the `create_grid` format (1 = blocked) for the
+        given safety distance.
+        """
+        return (self.distance <= safety_distance).astype(np.uint8)
+
+    def cost_map(self, safety_distance, influence=10.0, weight=1.0):
+        """
+        Returns a per-cell step cost multiplier for `a_star`.
+
+        Free cells closer than `safety_distance + influence` to an
+        obstacle cost up to `1 + weight` times a step in open space,
+        falling off linearly with clearance. Blocked cells get `np.inf`.
+        The multiplier is never below 1, so the usual heuristics stay
+        admissible.
+        """
+        distance = self.distance
+        excess = np.clip(distance - safety_distance, 0.0, influence)
+        cost = 1.0 + weight * (1.0 - excess / influence)
+        cost[distance <= safety_distance] = np.inf
+        return cost
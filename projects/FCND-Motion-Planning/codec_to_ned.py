@@ -0,0 +1,79 @@
+# copy of lessons/FlyingCarRepresentation/codec_to_ned.py, the projects do not import the lessons
+from functools import lru_cache
+
+import utm
+import numpy as np
+
+
+@lru_cache(maxsize=64)
+def home_utm(lon, lat):
+    """
+    Returns (easting, northing, zone_number, zone_letter) of the home
+    position. The projection is cached, so converting many positions
+    against the same home only projects the home once.
+    """
+    return utm.from_latlon(lat, lon)
+
+
+def global_to_local(global_position, global_home):
+    
+    # Get easting and northing of global_home
+    # Get easting and northing of global_position
+    # Create local_position from global and home positions                                     
+
+    (east_home, north_home, _, _) = home_utm(float(global_home[0]), float(global_home[1]))
+    (east, north, _, _) = utm.from_latlon(global_position[1], global_position[0])
+
+    local_position = np.array([north - north_home, east - east_home, -global_position[2]])
+    
+    return local_position
+
+def local_to_global(local_position, global_home):
+    
+    # get easting, northing, zone letter and number of global_home
+    # get (lat, lon) from local_position and converted global_home
+    # Create global_position of (lat, lon, alt)
+    
+                               
+    (east_home, north_home, zone_number, zone_letter) = home_utm(float(global_home[0]), float(global_home[1]))
+    (lat, lon) = utm.to_latlon(east_home + local_position[1], north_home + local_position[0], zone_number, zone_letter)
+    
+    return np.array([lon, lat, -local_position[2]])
+
+
+def global_to_local_batch(global_positions, global_home):
+    """
+    Vectorized `global_to_local` for an (N, 3) array of
+    (lon, lat, alt) rows. Returns an (N, 3) array of (north, east, down).
+
+    Every position is projected into the UTM zone of `global_home`,
+    which is what the scalar version gives whenever a position lies in
+    the same zone as home.
+    """
+    global_positions = np.asarray(global_positions, dtype=np.float64)
+    east_home, north_home, zone_number, zone_letter = home_utm(float(global_home[0]), float(global_home[1]))
+    east, north, _, _ = utm.from_latlon(global_positions[:, 1], global_positions[:, 0],
+                                        force_zone_number=zone_number, force_zone_letter=zone_letter)
+
+    local_positions = np.empty(global_positions.shape)
+    local_positions[:, 0] = north - north_home
+    local_positions[:, 1] = east - east_home
+    local_positions[:, 2] = -global_positions[:, 2]
+    return local_positions
+
+
+def local_to_global_batch(local_positions, global_home):
+    """
+    Vectorized `local_to_global` for an (N, 3) array of
+    (north, east, down) rows. Returns an (N, 3) array of (lon, lat, alt).
+    """
+    local_positions = np.asarray(local_positions, dtype=np.float64)
+    east_home, north_home, zone_number, zone_letter = home_utm(float(global_home[0]), float(global_home[1]))
+    lat, lon = utm.to_latlon(east_home + local_positions[:, 1], north_home + local_positions[:, 0],
+                             zone_number, zone_letter)
+
+    global_positions = np.empty(local_positions.shape)
+    global_positions[:, 0] = lon
+    global_positions[:, 1] = lat
+    global_positions[:, 2] = -local_positions[:, 2]
+    return global_positions
@@ -0,0 +1,393 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from udacidrone.connection import Connection
+from udacidrone.messaging import MsgID
+import udacidrone.messaging.message_types as mt
+
+from mavlink_simulator import mavlink, MASK_IGNORE_POSITION, MASK_IGNORE_VELOCITY, MASK_IGNORE_ACCELERATION, \
+    MASK_IGNORE_YAW_RATE, MASK_IS_TAKEOFF, MASK_IS_LAND, PX4_MODE_MANUAL, PX4_MODE_OFFBOARD
+from motion_planning import MotionPlanning
+from route_cache import RouteCache
+
+# SET_ATTITUDE_TARGET / ATTITUDE_TARGET type masks
+ATTITUDE_IGNORE_RATES = 0x07
+ATTITUDE_IGNORE_THRUST = 0x40
+ATTITUDE_IGNORE_ATTITUDE = 0x80
+
+_NO_ATTITUDE = [1.0, 0.0, 0.0, 0.0]
+
+
+def _quaternion(roll, pitch, yaw):
+    """(w, x, y, z) quaternion of ZYX Euler angles in radians."""
+    cr, sr = np.cos(roll / 2), np.sin(roll / 2)
+    cp, sp = np.cos(pitch / 2), np.sin(pitch / 2)
+    cy, sy = np.cos(yaw / 2), np.sin(yaw / 2)
+    return [float(cr * cp * cy + sr * sp * sy), float(sr * cp * cy - cr * sp * sy),
+            float(cr * sp * cy + sr * cp * sy), float(cr * cp * sy - sr * sp * cy)]
+
+
+class LatencyStats:
+    """
+    Callback latency of one vehicle: running count, mean and max, and
+    the last `window` samples for percentiles.
+    """
+
+    def __init__(self, window=4096):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._samples = np.zeros(window)
+
+    def add(self, latency):
+        self._samples[self.count % len(self._samples)] = latency
+        self.count += 1
+        self.total += latency
+        if latency > self.max:
+            self.max = latency
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q):
+        if not self.count:
+            return 0.0
+        return float(np.percentile(self._samples[:min(self.count, len(self._samples))], q))
+
+    def as_dict(self):
+        return {'messages': self.count, 'mean': self.mean, 'p99': self.percentile(99), 'max': self.max}
+
+
+class AsyncMavlinkConnection(Connection):
+    """
+    Non-blocking counterpart of udacidrone's `MavlinkConnection`, run as
+    an asyncio task (`await connection.run()`) so that many vehicles
+    can share one event loop.
+
+    Incoming MAVLink messages are turned into the usual udacidrone
+    messages and dispatched to the drone's callbacks right away; the
+    time from reading a message off the socket to the end of its
+    callbacks is recorded in `latency`. Commands can be issued from the
+    event loop or from executor threads (e.g. a planner). Attitude,
+    rate and moment commands go out as SET_ATTITUDE_TARGET; the local
+    simulator (`mavlink_simulator`) only flies position and velocity
+    targets and ignores them.
+    """
+
+    def __init__(self, host='127.0.0.1', port=5760):
+        super().__init__(threaded=False)
+        self.host = host
+        self.port = port
+        self.latency = LatencyStats()
+        self.target_system = 1
+        self.target_component = 1
+
+        self._mav = mavlink.MAVLink(self, srcSystem=255, srcComponent=0)
+        self._mav.robust_parsing = True
+        # send_waypoints writes straight to the connection's _master
+        self._master = self
+        self._writer = None
+        self._loop = None
+        self._loop_thread = None
+        self._running = False
+
+    @property
+    def open(self):
+        return self._running
+
+    @property
+    def loop(self):
+        """The event loop `run()` is running on, None before it starts."""
+        return self._loop
+
+    async def run(self):
+        """Connects and dispatches messages until `stop()` or disconnect."""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        self._running = True
+        try:
+            while self._running:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                received = time.perf_counter()
+                for msg in self._mav.parse_buffer(data) or ():
+                    self._dispatch(msg)
+                    self.latency.add(time.perf_counter() - received)
+        finally:
+            self._running = False
+            self._writer.close()
+
+    def start(self):
+        asyncio.run(self.run())
+
+    def dispatch_loop(self):
+        self.start()
+
+    def stop(self):
+        self._running = False
+        if self._writer is not None:
+            self._call(self._writer.close)
+
+    def write(self, data):
+        if self._writer is not None:
+            self._call(self._writer.write, bytes(data))
+
+    def _call(self, fn, *args):
+        if threading.get_ident() == self._loop_thread:
+            fn(*args)
+        else:
+            self._loop.call_soon_threadsafe(fn, *args)
+
+    def _dispatch(self, msg):
+        kind = msg.get_type()
+        now = time.time()
+        if kind == 'HEARTBEAT':
+            armed = (msg.base_mode & mavlink.MAV_MODE_FLAG_SAFETY_ARMED) != 0
+            guided = (msg.base_mode & mavlink.MAV_MODE_FLAG_CUSTOM_MODE_ENABLED) != 0 and \
+                (msg.custom_mode >> 16) != PX4_MODE_MANUAL
+            self.notify_message_listeners(MsgID.STATE, mt.StateMessage(now, armed, guided))
+        elif kind == 'GLOBAL_POSITION_INT':
+            self.notify_message_listeners(MsgID.GLOBAL_POSITION,
+                                          mt.GlobalFrameMessage(now, msg.lat / 1e7, msg.lon / 1e7, msg.alt / 1000))
+            self.notify_message_listeners(MsgID.LOCAL_VELOCITY,
+                                          mt.LocalFrameMessage(now, msg.vx / 100, msg.vy / 100, msg.vz / 100))
+        elif kind == 'LOCAL_POSITION_NED':
+            self.notify_message_listeners(MsgID.LOCAL_POSITION, mt.LocalFrameMessage(now, msg.x, msg.y, msg.z))
+        elif kind == 'HOME_POSITION':
+            self.notify_message_listeners(MsgID.GLOBAL_HOME,
+                                          mt.GlobalFrameMessage(now, msg.latitude / 1e7, msg.longitude / 1e7,
+                                                                msg.altitude / 1000))
+
+    def _command(self, command, *params):
+        params = (list(params) + [0.0] * 7)[:7]
+        self._mav.command_long_send(self.target_system, self.target_component, command, 0, *params)
+
+    def _position_target(self, mask, n, e, d, vn=0.0, ve=0.0, vd=0.0, heading=0.0):
+        self._mav.set_position_target_local_ned_send(0, self.target_system, self.target_component,
+                                                     mavlink.MAV_FRAME_LOCAL_NED, mask, n, e, d, vn, ve, vd,
+                                                     0.0, 0.0, 0.0, heading, 0.0)
+
+    def arm(self):
+        self._command(mavlink.MAV_CMD_COMPONENT_ARM_DISARM, 1)
+
+    def disarm(self):
+        self._command(mavlink.MAV_CMD_COMPONENT_ARM_DISARM, 0)
+
+    def take_control(self):
+        self._command(mavlink.MAV_CMD_DO_SET_MODE, mavlink.MAV_MODE_FLAG_CUSTOM_MODE_ENABLED, PX4_MODE_OFFBOARD)
+
+    def release_control(self):
+        self._command(mavlink.MAV_CMD_DO_SET_MODE, mavlink.MAV_MODE_FLAG_CUSTOM_MODE_ENABLED, PX4_MODE_MANUAL)
+
+    def cmd_position(self, n, e, d, heading):
+        # d is the target altitude, as in udacidrone
+        mask = MASK_IGNORE_VELOCITY | MASK_IGNORE_ACCELERATION | MASK_IGNORE_YAW_RATE
+        self._position_target(mask, n, e, -d, heading=heading)
+
+    def cmd_velocity(self, vn, ve, vd, heading):
+        mask = MASK_IGNORE_POSITION | MASK_IGNORE_ACCELERATION | MASK_IGNORE_YAW_RATE
+        self._position_target(mask, 0.0, 0.0, 0.0, vn, ve, vd, heading)
+
+    def takeoff(self, n, e, d):
+        mask = MASK_IS_TAKEOFF | MASK_IGNORE_VELOCITY | MASK_IGNORE_ACCELERATION | MASK_IGNORE_YAW_RATE
+        self._position_target(mask, n, e, -d)
+
+    def land(self, n, e):
+        mask = MASK_IS_LAND | MASK_IGNORE_VELOCITY | MASK_IGNORE_ACCELERATION | MASK_IGNORE_YAW_RATE
+        self._position_target(mask, n, e, 0.0)
+
+    def set_home_position(self, lat, lon, alt):
+        self._command(mavlink.MAV_CMD_DO_SET_HOME, 0, 0, 0, 0, lat, lon, alt)
+
+    def cmd_attitude(self, roll, pitch, yaw, thrust):
+        self._attitude_target(ATTITUDE_IGNORE_RATES, _quaternion(roll, pitch, yaw), 0.0, 0.0, 0.0, thrust)
+
+    def cmd_attitude_rate(self, roll_rate, pitch_rate, yaw_rate, thrust):
+        self._attitude_target(ATTITUDE_IGNORE_ATTITUDE, _NO_ATTITUDE, roll_rate, pitch_rate, yaw_rate, thrust)
+
+    def cmd_moment(self, roll_moment, pitch_moment, yaw_moment, thrust):
+        # the Udacity simulator reads the body rates of a rate-only target as moments in its control mode
+        self._attitude_target(ATTITUDE_IGNORE_ATTITUDE, _NO_ATTITUDE, roll_moment, pitch_moment, yaw_moment, thrust)
+
+    # the *_target methods report a controller's targets (POSITION_TARGET_LOCAL_NED,
+    # ATTITUDE_TARGET) for display, `t` is the time in seconds
+
+    def local_position_target(self, n, e, d, t=0):
+        self._mav.position_target_local_ned_send(int(t * 1000), mavlink.MAV_FRAME_LOCAL_NED,
+                                                 MASK_IGNORE_VELOCITY | MASK_IGNORE_ACCELERATION | MASK_IGNORE_YAW_RATE,
+                                                 n, e, d, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+    def local_velocity_target(self, vn, ve, vd, t=0):
+        self._mav.position_target_local_ned_send(int(t * 1000), mavlink.MAV_FRAME_LOCAL_NED,
+                                                 MASK_IGNORE_POSITION | MASK_IGNORE_ACCELERATION | MASK_IGNORE_YAW_RATE,
+                                                 0.0, 0.0, 0.0, vn, ve, vd, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+    def local_acceleration_target(self, an, ae, ad, t=0):
+        self._mav.position_target_local_ned_send(int(t * 1000), mavlink.MAV_FRAME_LOCAL_NED,
+                                                 MASK_IGNORE_POSITION | MASK_IGNORE_VELOCITY | MASK_IGNORE_YAW_RATE,
+                                                 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, an, ae, ad, 0.0, 0.0)
+
+    def attitude_target(self, roll, pitch, yaw, t=0):
+        self._mav.attitude_target_send(int(t * 1000), ATTITUDE_IGNORE_RATES | ATTITUDE_IGNORE_THRUST,
+                                       _quaternion(roll, pitch, yaw), 0.0, 0.0, 0.0, 0.0)
+
+    def body_rate_target(self, p, q, r, t=0):
+        self._mav.attitude_target_send(int(t * 1000), ATTITUDE_IGNORE_ATTITUDE | ATTITUDE_IGNORE_THRUST,
+                                       _NO_ATTITUDE, p, q, r, 0.0)
+
+    def _attitude_target(self, mask, q, roll_rate, pitch_rate, yaw_rate, thrust):
+        self._mav.set_attitude_target_send(0, self.target_system, self.target_component, mask, q,
+                                           roll_rate, pitch_rate, yaw_rate, thrust)
+
+
+class AsyncMotionPlanning(MotionPlanning):
+    """
+    `MotionPlanning` that runs `plan_path` in an executor instead of in
+    the state callback. The state machine waits in ARMING until the plan
+    is ready, and the event loop keeps reading and dispatching telemetry
+    in the meantime.
+
+    A* is pure Python and holds the GIL while it runs, so a thread pool
+    does not make the search run beside the callbacks: the interpreter
+    switches between the loop and the planner thread every
+    `sys.getswitchinterval()` (5 ms by default), which bounds how long
+    a callback waits, but searches still take CPU time from the loop.
+
+    Vehicles flying the same map should share one `RouteCache` and one
+    `grids` dict (see `MotionPlanning`), so the map is built once and
+    repeated routes are not searched again. Neither is thread-safe;
+    plan them on a single-worker executor, which costs nothing under
+    the GIL and lets every plan see the routes of the ones before it.
+    """
+
+    def __init__(self, connection, executor, **kwargs):
+        super().__init__(connection, **kwargs)
+        self.executor = executor
+        self._plan = None
+
+    def plan_path(self):
+        if self._plan is None:
+            self._plan = self.connection.loop.run_in_executor(self.executor, super().plan_path)
+
+    def state_callback(self):
+        if self._plan is not None:
+            if not self._plan.done():
+                return
+            # raises here if the search failed
+            self._plan.result()
+        super().state_callback()
+
+
+class FleetRunner:
+    """
+    Hosts many `Drone` state machines on one asyncio event loop, one
+    `AsyncMavlinkConnection` each:
+
+        runner = FleetRunner()
+        for port in ports:
+            runner.add(BackyardFlyer(AsyncMavlinkConnection(port=port)))
+        runner.run(timeout=120)
+        print(runner.report())
+
+    Vehicles that plan get `runner.executor` (see `AsyncMotionPlanning`).
+    `report()` gives the callback latency of every vehicle and the CPU
+    time of the process over the run.
+    """
+
+    def __init__(self, executor=None):
+        self.executor = executor or ThreadPoolExecutor()
+        self.drones = []
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+
+    def add(self, drone):
+        self.drones.append(drone)
+        return drone
+
+    def run(self, timeout=None):
+        asyncio.run(self.run_async(timeout))
+
+    async def run_async(self, timeout=None):
+        """Runs until every connection closes, or stops them after `timeout` seconds."""
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        tasks = [asyncio.ensure_future(drone.connection.run()) for drone in self.drones]
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=timeout)
+            for drone in self.drones:
+                drone.connection.stop()
+            if pending:
+                await asyncio.wait(pending)
+        finally:
+            self.wall_time = time.perf_counter() - wall_start
+            self.cpu_time = time.process_time() - cpu_start
+
+    def report(self):
+        vehicles = [drone.connection.latency.as_dict() for drone in self.drones]
+        messages = sum(v['messages'] for v in vehicles)
+        return {
+            'vehicles': vehicles,
+            'messages': messages,
+            'wall_time': self.wall_time,
+            'cpu_time': self.cpu_time,
+            'cpu_usage': self.cpu_time / self.wall_time if self.wall_time else 0.0,
+            'max_latency': max((v['max'] for v in vehicles), default=0.0),
+            'mean_latency': sum(v['mean'] * v['messages'] for v in vehicles) / messages if messages else 0.0,
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+    import contextlib
+    import io
+    import subprocess
+    import sys
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--vehicles', type=int, default=10, help='number of vehicles')
+    parser.add_argument('--port', type=int, default=5760, help='port of the first vehicle')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help="host address, i.e. '127.0.0.1'")
+    parser.add_argument('--flyer', choices=['backyard', 'planning'], default='backyard', help='state machine to run')
+    parser.add_argument('--timeout', type=float, default=120.0, help='wall clock limit in seconds')
+    parser.add_argument('--simulate', type=float, default=None, metavar='SPEED',
+                        help='start a local mavlink_simulator at this real time multiple')
+    args = parser.parse_args()
+
+    simulator = None
+    if args.simulate:
+        simulator = subprocess.Popen([sys.executable, 'mavlink_simulator.py', '--vehicles', str(args.vehicles),
+                                      '--port', str(args.port), '--host', args.host,
+                                      '--speed', str(args.simulate)], stdout=subprocess.DEVNULL)
+        time.sleep(1)
+
+    runner = FleetRunner(ThreadPoolExecutor(1) if args.flyer == 'planning' else None)
+    # one map and one route cache for the whole fleet
+    route_cache = RouteCache()
+    grids = {}
+    for i in range(args.vehicles):
+        connection = AsyncMavlinkConnection(args.host, args.port + i)
+        if args.flyer == 'planning':
+            runner.add(AsyncMotionPlanning(connection, runner.executor, route_cache=route_cache, grids=grids))
+        else:
+            from backyard_flyer_solution import BackyardFlyer
+            runner.add(BackyardFlyer(connection))
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            runner.run(args.timeout)
+    finally:
+        if simulator is not None:
+            simulator.terminate()
+
+    report = runner.report()
+    print('{0} vehicles, {1} messages in {2:.1f} s'.format(args.vehicles, report['messages'], report['wall_time']))
+    print('callback latency: mean {0:.3f} ms, max {1:.3f} ms'.format(report['mean_latency'] * 1e3,
+                                                                    report['max_latency'] * 1e3))
+    print('cpu: {0:.1f} s ({1:.0%} of one core)'.format(report['cpu_time'], report['cpu_usage']))
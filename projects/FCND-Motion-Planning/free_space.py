@@ -0,0 +1,385 @@
+import numpy as np
+
+
+class FreeSpace:
+    """
+    Index of the free cells of a planning grid (`create_grid` format,
+    0 = free), built once per grid and kept alongside it:
+
+        free_space = FreeSpace(grid)
+        goal = free_space.sample()
+        goal = free_space.nearest_free(goal_inside_a_building)
+        if not free_space.connected(start, goal):
+            ...
+
+    The free cells are kept in one array of flat indices, so a uniform
+    sample is a single random index. `labels` numbers the 8-connected
+    components of free space (the moves `a_star` can take) with positive
+    integers, 0 for blocked cells; two cells are connected by some path
+    exactly when their labels are equal and non-zero, which answers
+    reachability without a search (see `a_star(..., free_space=...)`).
+
+    `block()` and `unblock()` apply obstacle edits without rebuilding
+    the index: cells are swapped in and out of the free array, freed
+    cells join the components around them, and a component is only
+    relabeled when a new obstacle may have cut it in two. Labels stay
+    consistent but are no longer numbered in row-major order after an
+    edit.
+    """
+
+    # margin (cells) around an edit inside which a component that stays connected is known not to split
+    SPLIT_MARGIN = 8
+
+    def __init__(self, grid):
+        self.blocked = np.asarray(grid) != 0
+        self.shape = self.blocked.shape
+        free = np.flatnonzero(~self.blocked)
+        self._free = np.empty(self.blocked.size, dtype=np.intp)
+        self._free[:len(free)] = free
+        self._count = len(free)
+        # flat index -> position in _free, -1 for blocked cells
+        self._slot = np.full(self.blocked.size, -1, dtype=np.intp)
+        self._slot[free] = np.arange(len(free))
+
+        # component labels are raw labels per cell mapped through _alias, so merging is a relabel of the alias
+        self._raw = None
+        self._alias = None
+        self._labels = None
+        self._by_component = None
+        self._component_offsets = None
+
+    @property
+    def free(self):
+        """Flat indices of the free cells, in no particular order."""
+        return self._free[:self._count]
+
+    def __len__(self):
+        return self._count
+
+    def is_free(self, cell):
+        x, y = cell
+        return 0 <= x < self.shape[0] and 0 <= y < self.shape[1] and not self.blocked[x, y]
+
+    @property
+    def labels(self):
+        """(n, m) component labels, 0 for blocked cells."""
+        if self._labels is None:
+            self._build_labels()
+            self._labels = self._alias[self._raw]
+        return self._labels
+
+    @property
+    def num_components(self):
+        labels = self.labels.ravel()[self.free]
+        return len(np.unique(labels))
+
+    def component(self, cell):
+        """Label of the component of `cell`, 0 if it is blocked or off the grid."""
+        if not self.is_free(cell):
+            return 0
+        self._build_labels()
+        return int(self._alias[self._raw[cell[0], cell[1]]])
+
+    def component_size(self, label):
+        self._index_components()
+        if label + 1 >= len(self._component_offsets):
+            return 0
+        return int(self._component_offsets[label + 1] - self._component_offsets[label])
+
+    def connected(self, start, goal):
+        """True when a path of free cells joins `start` and `goal`."""
+        label = self.component(start)
+        return label != 0 and label == self.component(goal)
+
+    def sample(self, rng=None, component=None):
+        """
+        Returns a free cell drawn uniformly at random, from the whole
+        grid or from one component, as an (x, y) tuple, in constant time.
+        """
+        rng = np.random if rng is None else rng
+        if component is None:
+            if not self._count:
+                raise ValueError('the grid has no free cell')
+            index = self._free[rng.randint(self._count)]
+        else:
+            if not self.component_size(component):
+                raise ValueError('component {0} is empty'.format(component))
+            start, end = self._component_offsets[component], self._component_offsets[component + 1]
+            index = self._by_component[start + rng.randint(end - start)]
+        return divmod(int(index), self.shape[1])
+
+    def nearest_free(self, cell, component=None):
+        """
+        Returns the free cell closest to `cell` (Euclidean, in cells),
+        optionally restricted to one component, or `cell` itself if it
+        is already free. Only the square windows around `cell` out to
+        the nearest free cell are examined. Returns None if there is no
+        such cell.
+        """
+        x, y = (int(round(c)) for c in cell)
+        if component is None:
+            cells, wanted = self.blocked, False
+        else:
+            cells, wanted = self.labels, component
+        if 0 <= x < self.shape[0] and 0 <= y < self.shape[1] and cells[x, y] == wanted:
+            return x, y
+        n, m = self.shape
+        limit = max(x, n - 1 - x, y, m - 1 - y, 0)
+        for radius in range(1, limit + 1):
+            window, _, _ = self._square(cells, x, y, radius)
+            if (window == wanted).any():
+                # a closer cell may still lie out to the window's corner distance
+                window, x0, y0 = self._square(cells, x, y, int(np.ceil(radius * np.sqrt(2))))
+                xs, ys = np.nonzero(window == wanted)
+                xs = xs + x0
+                ys = ys + y0
+                best = np.argmin((xs - x) ** 2 + (ys - y) ** 2)
+                return int(xs[best]), int(ys[best])
+        return None
+
+    @staticmethod
+    def _square(cells, x, y, radius):
+        x0 = max(x - radius, 0)
+        y0 = max(y - radius, 0)
+        return cells[x0:max(x + radius + 1, 0), y0:max(y + radius + 1, 0)], x0, y0
+
+    def _index_components(self):
+        if self._by_component is None:
+            free = self.free
+            labels = self.labels.ravel()[free]
+            order = np.argsort(labels, kind='stable')
+            self._by_component = free[order]
+            counts = np.bincount(labels, minlength=len(self._alias))
+            self._component_offsets = np.concatenate(([0], np.cumsum(counts)))
+
+    def _build_labels(self):
+        if self._raw is None:
+            self._raw = label_components(self.blocked)
+            self._alias = np.arange(int(self._raw.max()) + 1)
+
+    def _changed(self):
+        self._labels = None
+        self._by_component = None
+        self._component_offsets = None
+
+    def _new_labels(self, count):
+        first = len(self._alias)
+        self._alias = np.concatenate((self._alias, np.arange(first, first + count)))
+        return first
+
+    def block(self, cells):
+        """
+        Marks the (k, 2) array of `cells` as blocked. Returns the number
+        of cells that were free.
+        """
+        xs, ys = self._cells(cells, blocked=False)
+        if not len(xs):
+            return 0
+        flat = np.ravel_multi_index((xs, ys), self.shape)
+        labelled = self._raw is not None
+        if labelled:
+            touched = np.unique(self._alias[self._raw[xs, ys]])
+            self._raw[xs, ys] = 0
+        self.blocked[xs, ys] = True
+        for index in flat.tolist():
+            # swap with the last free cell
+            slot = self._slot[index]
+            last = self._free[self._count - 1]
+            self._free[slot] = last
+            self._slot[last] = slot
+            self._slot[index] = -1
+            self._count -= 1
+        if labelled:
+            self._split(xs, ys, touched)
+        self._changed()
+        return len(xs)
+
+    def unblock(self, cells):
+        """
+        Marks the (k, 2) array of `cells` as free. Returns the number of
+        cells that were blocked.
+        """
+        xs, ys = self._cells(cells, blocked=True)
+        if not len(xs):
+            return 0
+        flat = np.ravel_multi_index((xs, ys), self.shape)
+        self.blocked[xs, ys] = False
+        self._free[self._count:self._count + len(flat)] = flat
+        self._slot[flat] = np.arange(self._count, self._count + len(flat))
+        self._count += len(flat)
+        if self._raw is not None:
+            self._join(xs, ys)
+        self._changed()
+        return len(xs)
+
+    def apply(self, changes):
+        """Applies a `ChangeSet` of an `ObstacleMap`."""
+        self.unblock(changes.freed)
+        self.block(changes.blocked)
+
+    def _cells(self, cells, blocked):
+        cells = np.asarray(cells, dtype=np.intp).reshape(-1, 2)
+        inside = ((cells >= 0) & (cells < self.shape)).all(axis=1)
+        cells = np.unique(cells[inside], axis=0)
+        if len(cells):
+            cells = cells[self.blocked[cells[:, 0], cells[:, 1]] == blocked]
+        return cells[:, 0], cells[:, 1]
+
+    def _window(self, xs, ys, margin):
+        return (slice(max(int(xs.min()) - margin, 0), int(xs.max()) + margin + 1),
+                slice(max(int(ys.min()) - margin, 0), int(ys.max()) + margin + 1))
+
+    def _join(self, xs, ys):
+        """Gives freed cells the label of the components they touch, merging those."""
+        window = self._window(xs, ys, 1)
+        local = label_components(self.blocked[window])
+        raw = self._raw[window]
+        fresh = np.zeros(local.shape, dtype=bool)
+        fresh[xs - window[0].start, ys - window[1].start] = True
+        for label in np.unique(local[fresh]).tolist():
+            part = local == label
+            old = np.unique(self._alias[raw[part & ~fresh]])
+            if old.size:
+                target = int(old[0])
+                if old.size > 1:
+                    self._alias[np.isin(self._alias, old[1:])] = target
+            else:
+                target = self._new_labels(1)
+            raw[part & fresh] = target
+
+    def _split(self, xs, ys, touched):
+        """Relabels the components in `touched` that new blocked cells may have cut."""
+        window = self._window(xs, ys, self.SPLIT_MARGIN)
+        local = label_components(self.blocked[window])
+        labels = self._alias[self._raw[window]]
+        # the free cells around the new obstacle cells
+        ring = np.zeros(local.shape, dtype=bool)
+        bx = xs - window[0].start
+        by = ys - window[1].start
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                ring[np.clip(bx + dx, 0, ring.shape[0] - 1), np.clip(by + dy, 0, ring.shape[1] - 1)] = True
+        ring &= local > 0
+        suspect = []
+        for label in touched.tolist():
+            around = ring & (labels == label)
+            # still one piece around the edit means still one piece overall
+            if len(np.unique(local[around])) > 1:
+                suspect.append(label)
+        if not suspect:
+            return
+        members = np.isin(self._alias[self._raw], suspect)
+        mxs, mys = np.nonzero(members)
+        region = self._window(mxs, mys, 0)
+        pieces = label_components(~members[region])
+        first = self._new_labels(int(pieces.max()))
+        raw = self._raw[region]
+        inside = pieces > 0
+        raw[inside] = pieces[inside] + first - 1
+
+
+def label_components(blocked):
+    """
+    Labels the 8-connected components of the free cells of a boolean
+    `blocked` grid with 1, 2, ... in row-major order of their first
+    cell, and blocked cells with 0.
+
+    The free cells are split into horizontal runs; runs on neighbouring
+    rows are joined when they overlap or touch diagonally. The runs,
+    the joins and the merging of the joined runs are all whole-array
+    operations, there is no per-cell Python loop.
+    """
+    blocked = np.asarray(blocked, dtype=bool)
+    n, m = blocked.shape
+    labels = np.zeros((n, m), dtype=np.int32)
+    free = ~blocked
+    if not free.any():
+        return labels
+
+    # runs of free cells, [start, end) on each row, in row-major order
+    padded = np.zeros((n, m + 2), dtype=np.int8)
+    padded[:, 1:-1] = free
+    edges = np.diff(padded, axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+
+    # run b on row r + 1 touches run a on row r when end_b >= start_a and start_b <= end_a;
+    # those runs are consecutive, find the first and one past the last by binary search
+    width = m + 2
+    keyed_starts = rows * width + starts
+    keyed_ends = rows * width + ends
+    first = np.searchsorted(keyed_ends, (rows + 1) * width + starts, side='left')
+    last = np.searchsorted(keyed_starts, (rows + 1) * width + ends, side='right')
+    counts = np.maximum(last - first, 0)
+    a = np.repeat(np.arange(len(rows)), counts)
+    b = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(first, counts)
+
+    parent = _merge(len(rows), a, b)
+    _, run_labels = np.unique(parent, return_inverse=True)
+    labels.ravel()[np.flatnonzero(free)] = np.repeat(run_labels.astype(np.int32) + 1, ends - starts)
+    return labels
+
+
+def _merge(count, a, b):
+    """
+    Merges the nodes 0 .. count - 1 along the edges (a[i], b[i]), returns
+    the smallest node of each node's set. Every round hooks the larger
+    root of each edge onto the smaller one and then shortens the trees
+    by pointer jumping.
+    """
+    parent = np.arange(count)
+    while a.size:
+        root_a = parent[a]
+        root_b = parent[b]
+        low = np.minimum(root_a, root_b)
+        high = np.maximum(root_a, root_b)
+        joined = low != high
+        if not joined.any():
+            break
+        np.minimum.at(parent, high[joined], low[joined])
+        while True:
+            jumped = parent[parent]
+            if (jumped == parent).all():
+                break
+            parent = jumped
+        # edges inside one set are done
+        a = a[joined]
+        b = b[joined]
+    return parent
+
+
+if __name__ == "__main__":
+    import time
+
+    from planning_utils import create_grid
+
+    data = np.loadtxt('colliders.csv', delimiter=',', dtype=np.float64, skiprows=2)
+    grid, _, _ = create_grid(data, 5, 7)
+
+    t0 = time.perf_counter()
+    free_space = FreeSpace(grid)
+    labels = free_space.labels
+    built = time.perf_counter() - t0
+    print('{0} free cells, {1} components, index built in {2:.1f} ms'.format(
+        len(free_space), free_space.num_components, built * 1000))
+
+    rng = np.random.RandomState(0)
+    t0 = time.perf_counter()
+    for _ in range(10000):
+        free_space.sample(rng)
+    print('sample: {0:.2f} us'.format((time.perf_counter() - t0) / 10000 * 1e6))
+
+    t0 = time.perf_counter()
+    for _ in range(10):
+        np.where(grid == 0)
+    print('np.where(grid == 0): {0:.2f} ms'.format((time.perf_counter() - t0) / 10 * 1000))
+
+    t0 = time.perf_counter()
+    for _ in range(100):
+        x, y = free_space.sample(rng)
+        free_space.block(np.argwhere(np.ones((10, 10))) + [x - 5, y - 5])
+    edits = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    label_components(free_space.blocked)
+    print('10 x 10 obstacle: {0:.2f} ms incremental, {1:.2f} ms full relabel'.format(
+        edits / 100 * 1000, (time.perf_counter() - t0) * 1000))
@@ -0,0 +1,90 @@
+import numpy as np
+import utm
+
+from codec_to_ned import global_to_local_batch, local_to_global_batch
+
+
+class GeoFrame:
+    """
+    Local NED frame anchored at a global home position.
+
+    The UTM projection of the home position (easting, northing, zone
+    number and letter) is computed once, when the frame is created, and
+    reused by every conversion. All positions are projected into the
+    home zone. Global positions are (lon, lat, alt) and local positions
+    (north, east, down), like `udacidrone.frame_utils`.
+
+    After `set_grid_offsets` the frame also converts to and from cells
+    of the planning grid returned by `create_grid`.
+    """
+
+    def __init__(self, global_home, north_offset=0, east_offset=0):
+        self.global_home = np.array(global_home, dtype=np.float64)
+        (self.east_home, self.north_home,
+         self.zone_number, self.zone_letter) = utm.from_latlon(self.global_home[1], self.global_home[0])
+        self.north_offset = north_offset
+        self.east_offset = east_offset
+
+    def set_grid_offsets(self, north_offset, east_offset):
+        self.north_offset = north_offset
+        self.east_offset = east_offset
+
+    def to_local(self, global_position):
+        """Converts one (lon, lat, alt) position to (north, east, down)."""
+        east, north, _, _ = utm.from_latlon(global_position[1], global_position[0],
+                                            self.zone_number, self.zone_letter)
+        return np.array([north - self.north_home, east - self.east_home,
+                         -(global_position[2] - self.global_home[2])])
+
+    def to_global(self, local_position):
+        """Converts one (north, east, down) position to (lon, lat, alt)."""
+        lat, lon = utm.to_latlon(self.east_home + local_position[1], self.north_home + local_position[0],
+                                 self.zone_number, self.zone_letter)
+        return np.array([lon, lat, self.global_home[2] - local_position[2]])
+
+    def to_local_batch(self, global_positions):
+        """Converts an (N, 3) array of (lon, lat, alt) rows to (north, east, down)."""
+        local_positions = global_to_local_batch(global_positions, self.global_home)
+        # relative to the home altitude, like `to_local`
+        local_positions[:, 2] += self.global_home[2]
+        return local_positions
+
+    def to_global_batch(self, local_positions):
+        """Converts an (N, 3) array of (north, east, down) rows to (lon, lat, alt)."""
+        global_positions = local_to_global_batch(local_positions, self.global_home)
+        global_positions[:, 2] += self.global_home[2]
+        return global_positions
+
+    def local_to_grid(self, local_position):
+        """Returns the (north, east) grid cell containing a local position."""
+        return (int(local_position[0] - self.north_offset),
+                int(local_position[1] - self.east_offset))
+
+    def grid_to_local(self, cell, altitude=0.0):
+        """Returns the local (north, east, down) position of a grid cell."""
+        return np.array([cell[0] + self.north_offset, cell[1] + self.east_offset, -altitude])
+
+    def global_to_grid(self, global_position):
+        """Returns the grid cell containing a (lon, lat, alt) position."""
+        return self.local_to_grid(self.to_local(global_position))
+
+    def grid_to_global(self, cell, altitude=0.0):
+        """Returns the (lon, lat, alt) position of a grid cell."""
+        return self.to_global(self.grid_to_local(cell, altitude))
+
+    def global_to_grid_batch(self, global_positions):
+        """Returns the grid cells of an (N, 3) array of (lon, lat, alt) rows as an (N, 2) int array."""
+        local_positions = self.to_local_batch(global_positions)
+        cells = np.empty((len(local_positions), 2), dtype=np.int64)
+        cells[:, 0] = (local_positions[:, 0] - self.north_offset).astype(np.int64)
+        cells[:, 1] = (local_positions[:, 1] - self.east_offset).astype(np.int64)
+        return cells
+
+    def grid_to_global_batch(self, cells, altitude=0.0):
+        """Returns the (lon, lat, alt) positions of an (N, 2) array of grid cells."""
+        cells = np.asarray(cells)
+        local_positions = np.empty((len(cells), 3))
+        local_positions[:, 0] = cells[:, 0] + self.north_offset
+        local_positions[:, 1] = cells[:, 1] + self.east_offset
+        local_positions[:, 2] = -np.asarray(altitude, dtype=np.float64)
+        return self.to_global_batch(local_positions)
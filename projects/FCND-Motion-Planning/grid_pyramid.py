@@ -0,0 +1,201 @@
+import numpy as np
+
+from planner_stats import PlannerStats
+from planning_utils import a_star, heuristic
+
+
+def max_pool(grid, factor=2):
+    """
+    Returns the grid scaled down by `factor`, where a coarse cell is
+    blocked if any of its children is. The last row and column of
+    coarse cells may cover fewer children when the grid size is not a
+    multiple of `factor`.
+    """
+    grid = np.asarray(grid) != 0
+    n, m = grid.shape
+    rows = -(-n // factor)
+    columns = -(-m // factor)
+    padded = np.zeros((rows * factor, columns * factor), dtype=bool)
+    padded[:n, :m] = grid
+    return padded.reshape(rows, factor, columns, factor).max(axis=(1, 3)).astype(np.uint8)
+
+
+def dilate(mask, radius):
+    """Grows a boolean mask by `radius` cells in every direction (8-connected)."""
+    mask = mask.copy()
+    for _ in range(radius):
+        grown = mask.copy()
+        grown[1:] |= mask[:-1]
+        grown[:-1] |= mask[1:]
+        mask = grown.copy()
+        grown[:, 1:] |= mask[:, :-1]
+        grown[:, :-1] |= mask[:, 1:]
+        mask = grown
+    return mask
+
+
+class GridPyramid:
+    """
+    Coarse-to-fine planner over a stack of max-pooled grids.
+
+    `levels[0]` is the planning grid, every further level is `factor`
+    times smaller (see `max_pool`). Because a coarse cell is free only
+    when all of its children are, a path on a coarse level is also a
+    corridor of free cells on the finer ones:
+
+        pyramid = GridPyramid(grid, num_levels=2)
+        path, cost = pyramid.plan(start, goal, stats=stats, free_space=free_space)
+
+    `plan` searches the coarsest level on which start and goal are both
+    free, then on each finer level restricts A* to the cells within
+    `band` coarse cells of the coarser path, so the full-resolution
+    search only expands cells near the eventual route. Narrow passages
+    disappear on coarse levels; when a level has no path the search
+    starts again one level finer, and at full resolution without any
+    band, so `plan` finds a path whenever `a_star` does. The paths are
+    close to, but not always as short as, the ones of a flat search:
+    the coarser the top level, the more corridors it closes and the
+    larger the detours it can force. On the colliders map two levels
+    keep the flat path costs and more levels mostly add detours.
+    """
+
+    def __init__(self, grid, num_levels=2, factor=2):
+        self.factor = factor
+        self.levels = [np.asarray(grid, dtype=np.uint8)]
+        for _ in range(num_levels - 1):
+            self.levels.append(max_pool(self.levels[-1], factor))
+
+    def cell(self, cell, level):
+        """The cell of `level` containing the full resolution `cell`."""
+        scale = self.factor ** level
+        return cell[0] // scale, cell[1] // scale
+
+    def plan(self, start, goal, band=2, h=heuristic, stats=None, free_space=None, level_stats=None):
+        """
+        Returns (path, cost) from `start` to `goal` on the full resolution
+        grid. With the grid's `FreeSpace`, unreachable goals fail at once.
+
+        `plan` runs several searches and prints only the outcome of the
+        whole plan. `stats` receives the counters summed over all of
+        them (`peak_queue_size` is the largest of any search); pass a
+        dict as `level_stats` to also get a `PlannerStats` per pyramid
+        level searched, keyed by level (0 = full resolution).
+        """
+        path, cost = self._plan(start, goal, band, h, stats, free_space, level_stats)
+        if stats is not None:
+            stats.path_found = bool(path)
+        if path:
+            print('Found a path.')
+        else:
+            print('**********************')
+            print('Failed to find a path!')
+            print('**********************')
+        return path, cost
+
+    def _plan(self, start, goal, band, h, stats, free_space, level_stats):
+        if free_space is not None and not free_space.connected(start, goal):
+            return self._search(self.levels[0], 0, start, goal, h, stats, level_stats, free_space)
+        for level in range(len(self.levels) - 1, 0, -1):
+            coarse_start = self.cell(start, level)
+            coarse_goal = self.cell(goal, level)
+            grid = self.levels[level]
+            if grid[coarse_start] or grid[coarse_goal]:
+                continue
+            path, _ = self._search(grid, level, coarse_start, coarse_goal, h, stats, level_stats)
+            if not path:
+                continue
+            for finer in range(level - 1, -1, -1):
+                path, cost = self._refine(path, finer, start, goal, band, h, stats, level_stats)
+                if not path:
+                    break
+            if path:
+                return path, cost
+        # no coarse path, or a band without one: search the whole grid
+        return self._search(self.levels[0], 0, start, goal, h, stats, level_stats, free_space)
+
+    def _refine(self, coarse_path, level, start, goal, band, h, stats, level_stats):
+        """Searches `level` within `band` cells of the path one level up."""
+        grid = self.levels[level]
+        coarse = np.zeros(self.levels[level + 1].shape, dtype=bool)
+        xs, ys = np.array(coarse_path).T
+        coarse[xs, ys] = True
+        corridor = dilate(coarse, band)
+        corridor = np.repeat(np.repeat(corridor, self.factor, axis=0), self.factor, axis=1)
+        corridor = corridor[:grid.shape[0], :grid.shape[1]]
+        restricted = np.where(corridor, grid, 1).astype(np.uint8)
+        return self._search(restricted, level, self.cell(start, level), self.cell(goal, level), h, stats,
+                            level_stats)
+
+    @staticmethod
+    def _search(grid, level, start, goal, h, stats, level_stats, free_space=None):
+        """One silent a_star search, its counters added to `stats` and `level_stats[level]`."""
+        if stats is None and level_stats is None:
+            return a_star(grid, h, start, goal, free_space=free_space, verbose=False)
+        search = PlannerStats()
+        result = a_star(grid, h, start, goal, stats=search, free_space=free_space, verbose=False)
+        targets = [stats] if stats is not None else []
+        if level_stats is not None:
+            targets.append(level_stats.setdefault(level, PlannerStats()))
+        for total in targets:
+            total.nodes_expanded += search.nodes_expanded
+            total.nodes_pushed += search.nodes_pushed
+            total.heuristic_calls += search.heuristic_calls
+            total.peak_queue_size = max(total.peak_queue_size, search.peak_queue_size)
+            total.path_found = search.path_found
+            for name, elapsed in search.phase_times.items():
+                total.phase_times[name] = total.phase_times.get(name, 0.0) + elapsed
+        return result
+
+
+if __name__ == "__main__":
+    import argparse
+    import contextlib
+    import io
+    import time
+
+    from free_space import FreeSpace
+    from planning_utils import create_grid
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pairs', type=int, default=3, help='number of cross-map queries')
+    parser.add_argument('--levels', type=int, default=2, help='pyramid levels')
+    parser.add_argument('--band', type=int, default=2, help='band around the coarse path, in coarse cells')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    data = np.loadtxt('colliders.csv', delimiter=',', dtype=np.float64, skiprows=2)
+    grid, _, _ = create_grid(data, 5, 7)
+    free_space = FreeSpace(grid)
+    rng = np.random.RandomState(args.seed)
+
+    t0 = time.perf_counter()
+    pyramid = GridPyramid(grid, args.levels)
+    print('pyramid built in {0:.1f} ms, level shapes {1}'.format(
+        (time.perf_counter() - t0) * 1000, [level.shape for level in pyramid.levels]))
+
+    # long queries: start and goal in the same component, at least half the map apart
+    n, m = grid.shape
+    pairs = []
+    while len(pairs) < args.pairs:
+        start = free_space.sample(rng)
+        goal = free_space.sample(rng, free_space.component(start))
+        if np.hypot(goal[0] - start[0], goal[1] - start[1]) > 0.5 * max(n, m):
+            pairs.append((start, goal))
+
+    print('{0:>12}{1:>12}{2:>10}{3:>13}{4:>18}{5:>12}'.format(
+        'start', 'goal', 'flat (s)', 'pyramid (s)', 'expanded', 'cost ratio'))
+    for start, goal in pairs:
+        flat_stats = PlannerStats()
+        pyramid_stats = PlannerStats()
+        t0 = time.perf_counter()
+        _, flat_cost = a_star(grid, heuristic, start, goal, stats=flat_stats, verbose=False)
+        flat_time = time.perf_counter() - t0
+        # plan prints its outcome, keep the table readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            t0 = time.perf_counter()
+            _, pyramid_cost = pyramid.plan(start, goal, band=args.band, stats=pyramid_stats)
+            pyramid_time = time.perf_counter() - t0
+        print('{0:>12}{1:>12}{2:>10.2f}{3:>13.2f}{4:>18}{5:>12.3f}'.format(
+            str(start), str(goal), flat_time, pyramid_time,
+            '{0}/{1}'.format(pyramid_stats.nodes_expanded, flat_stats.nodes_expanded),
+            pyramid_cost / flat_cost))
@@ -0,0 +1,363 @@
+import os
+import selectors
+import socket
+import time
+
+import numpy as np
+
+# udacidrone talks MAVLink 2, the dialect has to be chosen before the import
+os.environ.setdefault('MAVLINK20', '1')
+from pymavlink import mavutil  # noqa: E402
+
+from geo_frame import GeoFrame  # noqa: E402
+
+mavlink = mavutil.mavlink
+
+# (longitude, latitude, altitude) of the map center in colliders.csv
+HOME = (-122.397450, 37.792480, 0.0)
+
+# flight modes of PointMassFleet
+IDLE = 0
+POSITION = 1
+VELOCITY = 2
+LANDING = 3
+
+# SET_POSITION_TARGET_LOCAL_NED type_mask bits
+MASK_IGNORE_POSITION = 0x007
+MASK_IGNORE_VELOCITY = 0x038
+MASK_IGNORE_ACCELERATION = 0x1C0
+MASK_IGNORE_YAW_RATE = 0x800
+MASK_IS_TAKEOFF = 0x1000
+MASK_IS_LAND = 0x2000
+MASK_TAKEOFF_LAND = 0x3000
+
+# PX4 main modes carried in the heartbeat custom_mode
+PX4_MODE_MANUAL = 1
+PX4_MODE_OFFBOARD = 6
+
+
+class PointMassFleet:
+    """
+    Point-mass dynamics of `n` vehicles, stepped together as (n, 3)
+    NED position and velocity arrays.
+
+    Every vehicle flies to its position (or velocity) target with a
+    critically damped PD law, limited to `max_accel` and `max_speed`.
+    Vehicles only move while armed and cannot go below the ground
+    (down = 0); a landing vehicle descends on the spot and is on the
+    ground once it touches down.
+    """
+
+    def __init__(self, n, dt=0.01, max_speed=10.0, max_accel=5.0, k_p=2.0):
+        self.n = n
+        self.dt = dt
+        self.max_speed = max_speed
+        self.max_accel = max_accel
+        self.k_p = k_p
+        self.k_d = 2.0 * np.sqrt(k_p)
+
+        self.time = 0.0
+        self.position = np.zeros((n, 3))
+        self.velocity = np.zeros((n, 3))
+        self.target = np.zeros((n, 3))
+        self.mode = np.full(n, IDLE)
+        self.armed = np.zeros(n, dtype=bool)
+        self.guided = np.zeros(n, dtype=bool)
+
+    @property
+    def altitude(self):
+        return -self.position[:, 2]
+
+    def goto(self, i, north, east, down):
+        self.target[i] = north, east, min(down, 0.0)
+        self.mode[i] = POSITION
+
+    def takeoff(self, i, altitude):
+        self.goto(i, self.position[i, 0], self.position[i, 1], -abs(altitude))
+
+    def fly_velocity(self, i, vn, ve, vd):
+        self.target[i] = vn, ve, vd
+        self.mode[i] = VELOCITY
+
+    def land(self, i):
+        # aim below the ground so that the vehicle touches down instead
+        # of approaching it asymptotically
+        self.target[i] = self.position[i, 0], self.position[i, 1], 1.0
+        self.mode[i] = LANDING
+
+    def step(self):
+        """Advances every vehicle by dt."""
+        position = self.mode != VELOCITY
+        accel = np.where(position[:, None],
+                         self.k_p * (self.target - self.position) - self.k_d * self.velocity,
+                         self.k_p * (self.target - self.velocity))
+        accel[~self.armed | (self.mode == IDLE)] = 0.0
+        _clip_norm(accel, self.max_accel)
+
+        self.velocity += accel * self.dt
+        _clip_norm(self.velocity, self.max_speed)
+        self.velocity[~self.armed] = 0.0
+        self.position += self.velocity * self.dt
+
+        ground = self.position[:, 2] >= 0.0
+        self.position[ground, 2] = 0.0
+        self.velocity[ground & (self.velocity[:, 2] > 0.0), 2] = 0.0
+        landed = ground & (self.mode == LANDING)
+        self.velocity[landed] = 0.0
+        self.mode[landed] = IDLE
+
+        self.time += self.dt
+
+    def run(self, duration):
+        for _ in range(int(round(duration / self.dt))):
+            self.step()
+
+
+def _clip_norm(vectors, limit):
+    norm = np.linalg.norm(vectors, axis=1)
+    over = norm > limit
+    vectors[over] *= (limit / norm[over])[:, None]
+
+
+class _Client:
+    """One TCP connection to a vehicle, with its own MAVLink parser."""
+
+    def __init__(self, sock, vehicle):
+        self.sock = sock
+        self.vehicle = vehicle
+        self.outgoing = bytearray()
+        self.mav = mavlink.MAVLink(self, srcSystem=1, srcComponent=1)
+        # send_waypoints writes raw msgpack (or waypoint frames) to the same socket, skip it
+        self.mav.robust_parsing = True
+
+    def write(self, data):
+        self.outgoing += data
+
+
+class MavlinkSimulator:
+    """
+    Local stand-in for the Udacity simulator, speaking the part of
+    MAVLink that udacidrone uses, for headless load tests of the
+    flyers.
+
+    Vehicle `i` listens on TCP port `port + i` (port 0 picks free ports,
+    see `ports`), so `MavlinkConnection('tcp:127.0.0.1:<port>')` connects
+    to it as it would to the simulator. The vehicles share one
+    `PointMassFleet`, advanced `speed` times faster than real time, and
+    one selector loop serves every connection.
+
+    Sent: HEARTBEAT (armed / guided state) and HOME_POSITION at 1 Hz,
+    GLOBAL_POSITION_INT and LOCAL_POSITION_NED at `telemetry_rate` Hz,
+    both in simulated time.
+    Handled: arm / disarm, mode changes (guided when switched to a
+    custom offboard mode), takeoff, land, set home, and
+    SET_POSITION_TARGET_LOCAL_NED position, velocity, takeoff and land
+    targets.
+    """
+
+    def __init__(self, vehicles=1, port=5760, host='127.0.0.1', speed=1.0, telemetry_rate=20.0, home=HOME):
+        self.fleet = PointMassFleet(vehicles)
+        self.speed = speed
+        self.telemetry_period = 1.0 / telemetry_rate
+        self.frame = GeoFrame(home)
+        self.home = np.tile(np.asarray(home, dtype=np.float64), (vehicles, 1))
+
+        self.selector = selectors.DefaultSelector()
+        self.clients = []
+        self.ports = []
+        for i in range(vehicles):
+            server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            server.bind((host, port + i if port else 0))
+            server.listen()
+            server.setblocking(False)
+            self.selector.register(server, selectors.EVENT_READ, i)
+            self.ports.append(server.getsockname()[1])
+
+        self.messages_sent = 0
+        self.messages_received = 0
+        self._running = False
+        self._next_telemetry = 0.0
+        self._next_heartbeat = 0.0
+
+    def serve_forever(self, duration=None):
+        """
+        Runs the simulation until `stop()` is called, or for `duration`
+        simulated seconds.
+        """
+        fleet = self.fleet
+        self._running = True
+        wall_start = time.monotonic()
+        sim_start = fleet.time
+        while self._running:
+            self._poll(timeout=fleet.dt / self.speed)
+
+            sim_target = sim_start + (time.monotonic() - wall_start) * self.speed
+            if duration is not None:
+                sim_target = min(sim_target, sim_start + duration)
+            while fleet.time + fleet.dt <= sim_target:
+                fleet.step()
+                if fleet.time >= self._next_telemetry:
+                    self._send_telemetry()
+                    self._next_telemetry += self.telemetry_period
+            self._flush()
+
+            if duration is not None and fleet.time + fleet.dt > sim_start + duration:
+                break
+        self._running = False
+
+    def stop(self):
+        self._running = False
+
+    def close(self):
+        for key in list(self.selector.get_map().values()):
+            self.selector.unregister(key.fileobj)
+            key.fileobj.close()
+        self.clients = []
+        self.selector.close()
+
+    def _poll(self, timeout):
+        for key, events in self.selector.select(timeout):
+            if isinstance(key.data, int):
+                sock, _ = key.fileobj.accept()
+                sock.setblocking(False)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                client = _Client(sock, key.data)
+                self.clients.append(client)
+                self.selector.register(sock, selectors.EVENT_READ, client)
+                continue
+            client = key.data
+            try:
+                data = client.sock.recv(65536)
+            except OSError:
+                data = b''
+            if not data:
+                self._drop(client)
+                continue
+            for msg in client.mav.parse_buffer(data) or ():
+                self.messages_received += 1
+                self._handle(client.vehicle, msg)
+
+    def _drop(self, client):
+        self.selector.unregister(client.sock)
+        client.sock.close()
+        self.clients.remove(client)
+
+    def _flush(self):
+        for client in list(self.clients):
+            if not client.outgoing:
+                continue
+            try:
+                sent = client.sock.send(client.outgoing)
+            except BlockingIOError:
+                continue
+            except OSError:
+                self._drop(client)
+                continue
+            del client.outgoing[:sent]
+
+    def _handle(self, i, msg):
+        fleet = self.fleet
+        kind = msg.get_type()
+        if kind == 'COMMAND_LONG':
+            command = msg.command
+            if command == mavlink.MAV_CMD_COMPONENT_ARM_DISARM:
+                fleet.armed[i] = msg.param1 > 0.5
+                if not fleet.armed[i]:
+                    fleet.mode[i] = IDLE
+            elif command == mavlink.MAV_CMD_DO_SET_MODE:
+                fleet.guided[i] = _is_guided(int(msg.param1), int(msg.param2))
+            elif command == mavlink.MAV_CMD_NAV_TAKEOFF:
+                fleet.takeoff(i, msg.param7)
+            elif command == mavlink.MAV_CMD_NAV_LAND:
+                fleet.land(i)
+            elif command == mavlink.MAV_CMD_DO_SET_HOME:
+                if msg.param1 > 0.5:
+                    self.home[i] = self._global_positions()[i]
+                else:
+                    self.home[i] = msg.param6, msg.param5, msg.param7
+        elif kind == 'SET_MODE':
+            fleet.guided[i] = _is_guided(msg.base_mode, msg.custom_mode >> 16)
+        elif kind == 'SET_POSITION_TARGET_LOCAL_NED':
+            special = msg.type_mask & MASK_TAKEOFF_LAND
+            if special == MASK_IS_TAKEOFF:
+                fleet.takeoff(i, msg.z)
+            elif special == MASK_IS_LAND:
+                fleet.land(i)
+            elif not msg.type_mask & MASK_IGNORE_POSITION:
+                fleet.goto(i, msg.x, msg.y, msg.z)
+            elif not msg.type_mask & MASK_IGNORE_VELOCITY:
+                fleet.fly_velocity(i, msg.vx, msg.vy, msg.vz)
+
+    def _global_positions(self):
+        return self.frame.to_global_batch(self.fleet.position)
+
+    def _send_telemetry(self):
+        fleet = self.fleet
+        # the heartbeat schedule runs without clients too, or a late
+        # client would get one heartbeat per telemetry message until it
+        # caught up with the simulated time
+        heartbeat = fleet.time >= self._next_heartbeat
+        if heartbeat:
+            self._next_heartbeat += 1.0
+        if not self.clients:
+            return
+        time_boot_ms = int(fleet.time * 1000) & 0xFFFFFFFF
+
+        geodetic = self._global_positions()
+        position = fleet.position
+        velocity = fleet.velocity
+        for client in self.clients:
+            i = client.vehicle
+            mav = client.mav
+            if heartbeat:
+                base_mode = 0
+                if fleet.armed[i]:
+                    base_mode |= mavlink.MAV_MODE_FLAG_SAFETY_ARMED
+                if fleet.guided[i]:
+                    base_mode |= mavlink.MAV_MODE_FLAG_CUSTOM_MODE_ENABLED
+                main_mode = PX4_MODE_OFFBOARD if fleet.guided[i] else PX4_MODE_MANUAL
+                mav.heartbeat_send(mavlink.MAV_TYPE_QUADROTOR, mavlink.MAV_AUTOPILOT_PX4, base_mode,
+                                   main_mode << 16,
+                                   mavlink.MAV_STATE_ACTIVE if fleet.armed[i] else mavlink.MAV_STATE_STANDBY)
+                lon, lat, alt = self.home[i]
+                mav.home_position_send(int(lat * 1e7), int(lon * 1e7), int(alt * 1000), 0.0, 0.0, 0.0,
+                                       [1.0, 0.0, 0.0, 0.0], 0.0, 0.0, 0.0)
+                self.messages_sent += 2
+            lon, lat, alt = geodetic[i]
+            vn, ve, vd = velocity[i]
+            mav.global_position_int_send(time_boot_ms, int(lat * 1e7), int(lon * 1e7), int(alt * 1000),
+                                         int((alt - self.home[i, 2]) * 1000),
+                                         int(vn * 100), int(ve * 100), int(vd * 100), 0)
+            mav.local_position_ned_send(time_boot_ms, position[i, 0], position[i, 1], position[i, 2], vn, ve, vd)
+            self.messages_sent += 2
+
+
+def _is_guided(base_mode, main_mode):
+    return bool(base_mode & mavlink.MAV_MODE_FLAG_CUSTOM_MODE_ENABLED) and main_mode != PX4_MODE_MANUAL
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--vehicles', type=int, default=1, help='number of vehicles, one port each')
+    parser.add_argument('--port', type=int, default=5760, help='port of the first vehicle')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help="host address, i.e. '127.0.0.1'")
+    parser.add_argument('--speed', type=float, default=1.0, help='simulated seconds per wall clock second')
+    parser.add_argument('--telemetry-rate', type=float, default=20.0, help='position messages per simulated second')
+    args = parser.parse_args()
+
+    sim = MavlinkSimulator(args.vehicles, args.port, args.host, args.speed, args.telemetry_rate)
+    print('{0} vehicles on {1}:{2}-{3}, {4:g}x real time'.format(
+        args.vehicles, args.host, sim.ports[0], sim.ports[-1], args.speed))
+    t0 = time.time()
+    try:
+        sim.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        elapsed = time.time() - t0
+        sim.close()
+    print('{0:.1f} simulated s in {1:.1f} s, {2} messages sent, {3} received'.format(
+        sim.fleet.time, elapsed, sim.messages_sent, sim.messages_received))
@@ -7,10 +7,24 @@ import numpy as np
 import csv
 
 from planning_utils import a_star, heuristic, create_grid, prune_path
+from planner_stats import PlannerStats, JsonLinesSink
+from geo_frame import GeoFrame
+from waypoint_dispatcher import WaypointDispatcher
+from arrival_check import ArrivalCheck, slower_than, landed
+from waypoint_transport import WaypointUploader
+from free_space import FreeSpace
+from route_cache import RouteCache, map_hash
 from udacidrone import Drone
 from udacidrone.connection import MavlinkConnection
 from udacidrone.messaging import MsgID
-from udacidrone.frame_utils import global_to_local
+
+
+# default goal, (longitude, latitude, altitude)
+GOAL = (-122.39995, 37.79696712543327, 0)
+
+# the next waypoint is commanded within this distance of the current one,
+# so the drone flies through intermediate waypoints instead of stopping
+LOOKAHEAD_RADIUS = 3.0
 
 
 class States(Enum):
@@ -25,14 +39,39 @@ class States(Enum):
 
 class MotionPlanning(Drone):
 
-    def __init__(self, connection):
+    def __init__(self, connection, goal=GOAL, stats_sink=None, profiler=None, lookahead_radius=LOOKAHEAD_RADIUS,
+                 check_decimation=1, route_cache=None, compact_waypoints=False, grids=None):
         super().__init__(connection)
 
+        # global (lon, lat, alt) the planner searches a path to
+        self.goal = goal
+
         self.target_position = np.array([0.0, 0.0, 0.0])
         self.waypoints = []
+        self.route = WaypointDispatcher(acceptance_radius=1.0, lookahead_radius=lookahead_radius)
+        # telemetry checks, run on one of every `check_decimation` position messages
+        self.arrival = ArrivalCheck(decimation=check_decimation)
+        # with `compact_waypoints` the route goes out as waypoint_transport
+        # frames instead of the msgpack list the Udacity simulator reads
+        self.compact_waypoints = compact_waypoints
+        self.uploader = None
         self.in_mission = True
         self.check_state = {}
 
+        # planner instrumentation, see planner_stats.PlannerStats
+        self.stats_sink = stats_sink
+        self.profiler = profiler
+        self.planner_stats = None
+
+        # local frame around the map home, created in plan_path
+        self.geo_frame = None
+
+        # (altitude, safety distance) -> (grid, north offset, east offset, FreeSpace, map hash), kept across
+        # replans; like the route cache it can be shared by several drones flying the same map
+        self.grids = {} if grids is None else grids
+        # planned routes
+        self.route_cache = RouteCache() if route_cache is None else route_cache
+
         # initial state
         self.flight_state = States.MANUAL
 
@@ -42,22 +81,26 @@ class MotionPlanning(Drone):
         self.register_callback(MsgID.STATE, self.state_callback)
 
     def local_position_callback(self):
+        if self.uploader is not None and self.uploader.pending:
+            # the route goes out a frame per position message
+            self.uploader.pump()
+        if not self.arrival.due():
+            return
         if self.flight_state == States.TAKEOFF:
-            if -1.0 * self.local_position[2] > 0.95 * self.target_position[2]:
+            if self.arrival.climbed(self.local_position):
                 self.waypoint_transition()
         elif self.flight_state == States.WAYPOINT:
-            if np.linalg.norm(self.target_position[0:2] - self.local_position[0:2]) < 1.0:
-                if len(self.waypoints) > 0:
+            if self.route.reached(self.local_position):
+                if self.route:
                     self.waypoint_transition()
                 else:
-                    if np.linalg.norm(self.local_velocity[0:2]) < 1.0:
+                    if slower_than(self.local_velocity, 1.0):
                         self.landing_transition()
 
     def velocity_callback(self):
         if self.flight_state == States.LANDING:
-            if self.global_position[2] - self.global_home[2] < 0.1:
-                if abs(self.local_position[2]) < 0.01:
-                    self.disarming_transition()
+            if landed(self.global_position, self.global_home, self.local_position):
+                self.disarming_transition()
 
     def state_callback(self):
         if self.in_mission:
@@ -81,13 +124,15 @@ class MotionPlanning(Drone):
     def takeoff_transition(self):
         self.flight_state = States.TAKEOFF
         print("takeoff transition")
+        self.arrival.set_target(self.local_position[0], self.local_position[1], self.target_position[2])
         self.takeoff(self.target_position[2])
 
     def waypoint_transition(self):
         self.flight_state = States.WAYPOINT
         print("waypoint transition")
-        self.target_position = self.waypoints.pop(0)
+        self.target_position = self.route.next()
         print('target position', self.target_position)
+        self.arrival.set_target(*self.target_position[:3])
         self.cmd_position(self.target_position[0],
                           self.target_position[1],
                           self.target_position[2],
@@ -112,12 +157,21 @@ class MotionPlanning(Drone):
 
     def send_waypoints(self):
         print("Sending waypoints to simulator ...")
-        data = msgpack.dumps(self.waypoints)
-        self.connection._master.write(data)
+        if not self.compact_waypoints:
+            data = msgpack.dumps(self.waypoints)
+            self.connection._master.write(data)
+            return
+        if self.uploader is None:
+            self.uploader = WaypointUploader(self.connection._master)
+        # only the tail that changed since the last send is queued, the first frame goes out now
+        self.uploader.send(self.waypoints)
+        self.uploader.pump()
 
     def plan_path(self):
         self.flight_state = States.PLANNING
         print("Searching for a path ...")
+        stats = PlannerStats(profiler=self.profiler, sink=self.stats_sink)
+        self.planner_stats = stats
         TARGET_ALTITUDE = 5
         SAFETY_DISTANCE = 7
 
@@ -125,53 +179,81 @@ class MotionPlanning(Drone):
 
         # NOTE: read lat0, lon0 from colliders into floating point values
         # NOTE: set home position to (lon0, lat0, 0)
-        with open('colliders.csv', 'r') as f:
-            reader = csv.reader(f)
-            lat0lon0 = next(reader)
-            lat0 = float(lat0lon0[0].split()[1])
-            lon0 = float(lat0lon0[1].split()[1])
+        with stats.phase('map_load'):
+            with open('colliders.csv', 'r') as f:
+                reader = csv.reader(f)
+                lat0lon0 = next(reader)
+                lat0 = float(lat0lon0[0].split()[1])
+                lon0 = float(lat0lon0[1].split()[1])
         self.set_home_position(lon0, lat0, 0)
+        # the home projection is computed once and reused for every conversion
+        self.geo_frame = GeoFrame((lon0, lat0, 0))
 
         # NOTE: retrieve current global position
-        # NOTE: convert to current local position using global_to_local()
-        current_local_position = global_to_local(self.global_position, self.global_home)
+        # NOTE: convert to current local position using the home frame
+        current_local_position = self.geo_frame.to_local(self.global_position)
 
         print('global home {0}, position {1}, local position {2}'.format(self.global_home, self.global_position,
                                                                          self.local_position))
-        # Read in obstacle map
-        data = np.loadtxt('colliders.csv', delimiter=',', dtype='Float64', skiprows=2)
-        
-        # Define a grid for a particular altitude and safety margin around obstacles
-        grid, north_offset, east_offset = create_grid(data, TARGET_ALTITUDE, SAFETY_DISTANCE)
+        key = (TARGET_ALTITUDE, SAFETY_DISTANCE)
+        if key not in self.grids:
+            # Read in obstacle map
+            with stats.phase('map_load'):
+                data = np.loadtxt('colliders.csv', delimiter=',', dtype=np.float64, skiprows=2)
+
+            # Define a grid for a particular altitude and safety margin around obstacles
+            with stats.phase('create_grid'):
+                grid, north_offset, east_offset = create_grid(data, TARGET_ALTITUDE, SAFETY_DISTANCE)
+            self.grids[key] = (grid, north_offset, east_offset, FreeSpace(grid), map_hash(grid))
+        grid, north_offset, east_offset, free_space, version = self.grids[key]
 
-        print("Goal Sample List: ", np.where(grid == 0))
         print("North offset = {0}, east offset = {1}".format(north_offset, east_offset))
+        self.geo_frame.set_grid_offsets(north_offset, east_offset)
         # Define starting point on the grid (this is just grid center)
         # NOTE: convert start position to current position rather than map center
         # grid_start = (-north_offset, -east_offset)
-        grid_start = (int(current_local_position[0] - north_offset), int(current_local_position[1] - east_offset))
+        grid_start = self.geo_frame.local_to_grid(current_local_position)
 
         # Set goal as some arbitrary position on the grid
         # NOTE: adapt to set goal as latitude / longitude position and convert
-        goal_lat_lon = global_to_local((args.lon, args.lat, 0), self.global_home)
-        print('goal position: ', grid[int(goal_lat_lon[0] - north_offset)][int(goal_lat_lon[1] - east_offset)])
-        grid_goal = (int(goal_lat_lon[0] - north_offset), int(goal_lat_lon[1] - east_offset))
+        grid_goal = self.geo_frame.global_to_grid(self.goal)
+        # a goal inside an obstacle or its safety margin moves to the closest free cell
+        grid_goal = free_space.nearest_free(grid_goal)
+
+        # start and goal in different components of free space have no path, skip the search
+        if not free_space.connected(grid_start, grid_goal):
+            print('Goal {0} is not reachable from {1}'.format(grid_goal, grid_start))
+            stats.path_found = False
+            stats.emit(start=grid_start, goal=grid_goal, waypoints=0)
+            self.disarming_transition()
+            return
 
         # Run A* to find a path from start to goal
         # NOTE: add diagonal motions with a cost of sqrt(2) to your A* implementation
         # or move to a different search space such as a graph (not done here)
         print('Local Start and Goal: ', grid_start, grid_goal)
-        path, _ = a_star(grid, heuristic, grid_start, grid_goal)
-        # NOTE: prune path to minimize number of waypoints
-        path = prune_path(path)
+        with stats.phase('route_cache'):
+            path = self.route_cache.get(version, grid_start, grid_goal, key, grid=grid, stats=stats)
+        if path is None:
+            path, _ = a_star(grid, heuristic, grid_start, grid_goal, stats=stats, free_space=free_space)
+            # NOTE: prune path to minimize number of waypoints
+            with stats.phase('prune_path'):
+                path = prune_path(path)
+            plan_time = stats.phase_times.get('search', 0.0) + stats.phase_times['prune_path']
+            self.route_cache.put(version, grid_start, grid_goal, key, path, plan_time)
         # FIXME: (if you're feeling ambitious): Try a different approach altogether!
 
         # Convert path to waypoints
         waypoints = [[p[0] + north_offset, p[1] + east_offset, TARGET_ALTITUDE, 0] for p in path]
         # Set self.waypoints
         self.waypoints = waypoints
+        self.route.replace(waypoints)
         # NOTE: send waypoints to sim (this is just for visualization of waypoints)
-        self.send_waypoints()
+        with stats.phase('send_waypoints'):
+            self.send_waypoints()
+
+        print('Planner stats: ', stats)
+        stats.emit(start=grid_start, goal=grid_goal, waypoints=len(waypoints))
 
     def start(self):
         self.start_log("Logs", "NavLog.txt")
@@ -190,12 +272,17 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument('--port', type=int, default=5760, help='Port number')
     parser.add_argument('--host', type=str, default='127.0.0.1', help="host address, i.e. '127.0.0.1'")
-    parser.add_argument('--lat', type=float, default=37.79696712543327, help="goal latitude")
-    parser.add_argument('--lon', type=float, default=-122.39995, help="goal longitude")
+    parser.add_argument('--lat', type=float, default=GOAL[1], help="goal latitude")
+    parser.add_argument('--lon', type=float, default=GOAL[0], help="goal longitude")
+    parser.add_argument('--stats-log', type=str, default=None, help="append planner stats to this JSON-lines file")
+    parser.add_argument('--compact-waypoints', action='store_true',
+                        help="send waypoints as compact frames, for receivers that decode waypoint_transport")
     args = parser.parse_args()
 
     conn = MavlinkConnection('tcp:{0}:{1}'.format(args.host, args.port), timeout=60)
-    drone = MotionPlanning(conn)
+    stats_sink = JsonLinesSink(args.stats_log) if args.stats_log else None
+    drone = MotionPlanning(conn, goal=(args.lon, args.lat, 0), stats_sink=stats_sink,
+                           compact_waypoints=args.compact_waypoints)
     time.sleep(1)
 
     drone.start()
@@ -0,0 +1,23 @@
+from shapely.geometry import Point, Polygon
+
+
+def extract_polygons(data):
+    """Returns a (footprint polygon, height) pair for every obstacle row in `data`."""
+    polygons = []
+    for i in range(data.shape[0]):
+        north, east, alt, d_north, d_east, d_alt = data[i, :]
+        # corners in drawing order, shapely connects them one after the other
+        corners = [(north - d_north, east - d_east),
+                   (north - d_north, east + d_east),
+                   (north + d_north, east + d_east),
+                   (north + d_north, east - d_east)]
+        polygons.append((Polygon(corners), alt + d_alt))
+    return polygons
+
+
+def collides(polygons, point):
+    """True when the (north, east, altitude) `point` lies inside an obstacle."""
+    for polygon, height in polygons:
+        if height > point[2] and polygon.contains(Point(*point[:2])):
+            return True
+    return False
@@ -0,0 +1,95 @@
+import numpy as np
+
+from planning_utils import create_grid
+
+
+class OccupancyGrid:
+    """
+    Compact 2D occupancy grid (1 = blocked, 0 = free).
+
+    Cells are stored either one per byte (uint8) or bit-packed along
+    the east axis (eight per byte), which is 8x or 64x smaller than the
+    float64 grids `create_grid` used to return. Scalar lookups go through
+    a flat memoryview and return plain Python ints, which is what the
+    `grid[x, y] == 1` checks in `valid_actions` want; `lookup` does the
+    same for whole arrays of cells.
+
+    The grid converts back to a dense array with `to_array` (or
+    `np.asarray(grid)`), e.g. for `plt.imshow`.
+    """
+
+    def __init__(self, grid, packed=False):
+        cells = np.ascontiguousarray(np.asarray(grid) != 0, dtype=np.uint8)
+        self.shape = cells.shape
+        self.packed = packed
+        if packed:
+            self._data = np.packbits(cells, axis=1)
+        else:
+            self._data = cells
+        self._row_bytes = self._data.shape[1]
+        self._cells = memoryview(self._data).cast('B')
+
+    @classmethod
+    def from_obstacles(cls, data, drone_altitude, safety_distance, packed=False):
+        """
+        Same as `create_grid` but returns an `OccupancyGrid` along with
+        the north and east offsets.
+        """
+        grid, north_offset, east_offset = create_grid(data, drone_altitude, safety_distance)
+        return cls(grid, packed), north_offset, east_offset
+
+    @property
+    def nbytes(self):
+        return self._data.nbytes
+
+    def __getitem__(self, key):
+        x, y = key
+        if self.packed:
+            return (self._cells[x * self._row_bytes + (y >> 3)] >> (7 - (y & 7))) & 1
+        return self._cells[x * self._row_bytes + y]
+
+    def lookup(self, xs, ys):
+        """Returns the occupancy of the cells `(xs[i], ys[i])` as a uint8 array."""
+        xs = np.asarray(xs)
+        ys = np.asarray(ys)
+        if self.packed:
+            return (self._data[xs, ys >> 3] >> (7 - (ys & 7))) & 1
+        return self._data[xs, ys]
+
+    def to_array(self, dtype=np.float64):
+        """Returns the grid as a dense array of `dtype`."""
+        if self.packed:
+            cells = np.unpackbits(self._data, axis=1, count=self.shape[1])
+        else:
+            cells = self._data
+        return cells.astype(dtype)
+
+    def __array__(self, dtype=None, copy=None):
+        return self.to_array(np.uint8 if dtype is None else dtype)
+
+
+if __name__ == "__main__":
+    import timeit
+
+    from planning_utils import valid_actions
+
+    data = np.loadtxt('colliders.csv', delimiter=',', dtype=np.float64, skiprows=2)
+    dense, _, _ = create_grid(data, 5, 7)
+    grids = [
+        ('float64 ndarray', dense.astype(np.float64)),
+        ('uint8 ndarray', dense),
+        ('OccupancyGrid', OccupancyGrid(dense)),
+        ('OccupancyGrid packed', OccupancyGrid(dense, packed=True)),
+    ]
+
+    rng = np.random.RandomState(0)
+    cells = [(int(x), int(y)) for x, y in zip(rng.randint(1, dense.shape[0] - 1, 10000),
+                                              rng.randint(1, dense.shape[1] - 1, 10000))]
+
+    print('{0:<22}{1:>12}{2:>16}{3:>20}'.format('grid', 'bytes', 'lookup (ns)', 'valid_actions (us)'))
+    for name, grid in grids:
+        nbytes = grid.nbytes
+        lookup = min(timeit.repeat(lambda: [grid[c] == 1 for c in cells], number=10, repeat=3))
+        actions = min(timeit.repeat(lambda: [valid_actions(grid, c) for c in cells], number=1, repeat=3))
+        print('{0:<22}{1:>12}{2:>16.1f}{3:>20.2f}'.format(
+            name, nbytes, lookup / (10 * len(cells)) * 1e9, actions / len(cells) * 1e6))
@@ -0,0 +1,106 @@
+import json
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class PlannerStats:
+    """
+    Counters and per-phase wall times for one planning run.
+
+    Pass an instance to `a_star(..., stats=stats)` to collect search
+    counters, and wrap the other stages in `stats.phase(name)`:
+
+        stats = PlannerStats(sink=JsonLinesSink('planning.jsonl'))
+        with stats.phase('create_grid'):
+            grid, north_offset, east_offset = create_grid(data, 5, 7)
+        path, cost = a_star(grid, heuristic, start, goal, stats=stats)
+        stats.emit(goal=goal)
+
+    `profiler` is an optional sampling profiler with `start()` and
+    `stop()` methods (e.g. `pyinstrument.Profiler()`); it runs during
+    every phase. `sink` is an optional object with a `write(record)`
+    method that receives the stats as a dict from `emit`.
+
+    A `RouteCache` sets `cache` and `cache_saved_time` when it is asked
+    for the route.
+    """
+
+    def __init__(self, profiler=None, sink=None):
+        self.profiler = profiler
+        self.sink = sink
+        self.nodes_expanded = 0
+        self.nodes_pushed = 0
+        self.peak_queue_size = 0
+        self.heuristic_calls = 0
+        self.path_found = None
+        # route cache outcome ('hit', 'subpath' or 'miss', None without a cache) and the planning time it saved
+        self.cache = None
+        self.cache_saved_time = 0.0
+        self.phase_times = OrderedDict()
+
+    @contextmanager
+    def phase(self, name):
+        """Times the enclosed block and adds it to `phase_times[name]`."""
+        if self.profiler is not None:
+            self.profiler.start()
+        t0 = time.perf_counter()
+        try:
+            yield self
+        finally:
+            elapsed = time.perf_counter() - t0
+            if self.profiler is not None:
+                self.profiler.stop()
+            self.phase_times[name] = self.phase_times.get(name, 0.0) + elapsed
+
+    @property
+    def total_time(self):
+        return sum(self.phase_times.values())
+
+    def as_dict(self):
+        return {
+            'nodes_expanded': self.nodes_expanded,
+            'nodes_pushed': self.nodes_pushed,
+            'peak_queue_size': self.peak_queue_size,
+            'heuristic_calls': self.heuristic_calls,
+            'path_found': self.path_found,
+            'cache': self.cache,
+            'cache_saved_time': self.cache_saved_time,
+            'phase_times': dict(self.phase_times),
+            'total_time': self.total_time,
+        }
+
+    def emit(self, **fields):
+        """
+        Sends the stats, together with any extra `fields`, to the sink
+        and returns the record.
+        """
+        record = {'timestamp': time.time()}
+        record.update(fields)
+        record.update(self.as_dict())
+        if self.sink is not None:
+            self.sink.write(record)
+        return record
+
+    def __str__(self):
+        phases = ', '.join('{0}={1:.4f}s'.format(k, v) for k, v in self.phase_times.items())
+        return 'expanded={0} pushed={1} peak_queue={2} heuristic_calls={3} [{4}]'.format(
+            self.nodes_expanded, self.nodes_pushed, self.peak_queue_size, self.heuristic_calls, phases)
+
+
+class JsonLinesSink:
+    """Appends every record as one JSON line to `path`."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def write(self, record):
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(record, default=_to_json) + '\n')
+
+
+def _to_json(value):
+    # numpy scalars and arrays, tuples of numpy ints, ...
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
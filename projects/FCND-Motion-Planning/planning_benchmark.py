@@ -0,0 +1,198 @@
+"""
+Reproducible benchmark of the planning pipeline over a colliders map.
+
+For every (altitude, safety distance) pair a fixed-seed set of start and
+goal cells is drawn from the free cells of the grid, and every stage of
+the pipeline is timed:
+
+    create_grid, a_star, prune_path, create_voxmap, collides
+
+Results are written as JSON and can be compared against a stored
+baseline, in which case the script exits with status 1 if any stage got
+slower than the allowed tolerance:
+
+    python planning_benchmark.py --output baseline.json
+    python planning_benchmark.py --baseline baseline.json --output current.json
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+
+from obstacle_polygons import collides, extract_polygons
+from planner_stats import PlannerStats
+from planning_utils import create_grid, create_voxmap, a_star, heuristic, prune_path
+
+
+def load_map(filename):
+    return np.loadtxt(filename, delimiter=',', dtype=np.float64, skiprows=2)
+
+
+def sample_pairs(grid, num_pairs, max_distance, rng, max_attempts=None):
+    """
+    Returns `num_pairs` (start, goal) cell pairs drawn from the free
+    cells of `grid`, with the goal at most `max_distance` cells from the
+    start.
+
+    Raises ValueError when the grid has fewer than two free cells, or
+    when `max_attempts` draws (100 per pair by default) do not give
+    enough pairs.
+    """
+    free = np.argwhere(grid == 0)
+    if len(free) < 2:
+        raise ValueError('the grid has {0} free cell(s), at least 2 are needed'.format(len(free)))
+    if max_attempts is None:
+        max_attempts = 100 * num_pairs
+    pairs = []
+    for _ in range(max_attempts):
+        if len(pairs) == num_pairs:
+            break
+        start = free[rng.randint(len(free))]
+        near = free[np.abs(free - start).max(axis=1) <= max_distance]
+        goal = near[rng.randint(len(near))]
+        if (goal != start).any():
+            pairs.append(((int(start[0]), int(start[1])), (int(goal[0]), int(goal[1]))))
+    if len(pairs) < num_pairs:
+        raise ValueError('found {0} of {1} start/goal pairs within {2} cells in {3} attempts'.format(
+            len(pairs), num_pairs, max_distance, max_attempts))
+    return pairs
+
+
+def timed(fn, repeat):
+    """Runs `fn` `repeat` times and returns (last result, list of wall times)."""
+    times = []
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+    return result, times
+
+
+def summarize(times, **extra):
+    summary = {
+        'min': float(np.min(times)),
+        'median': float(np.median(times)),
+        'max': float(np.max(times)),
+        'repeat': len(times),
+    }
+    summary.update(extra)
+    return summary
+
+
+def run(data, altitudes, safety_distances, num_pairs, max_distance, repeat, seed,
+        voxel_size=5, num_samples=200):
+    results = {}
+
+    for altitude in altitudes:
+        for safety_distance in safety_distances:
+            tag = 'alt={0:g},safety={1:g}'.format(altitude, safety_distance)
+
+            (grid, _, _), times = timed(lambda: create_grid(data, altitude, safety_distance), repeat)
+            results['create_grid[{0}]'.format(tag)] = summarize(times)
+
+            rng = np.random.RandomState(seed)
+            search_times, prune_times = [], []
+            expanded = 0
+            for start, goal in sample_pairs(grid, num_pairs, max_distance, rng):
+                stats = PlannerStats()
+                # the first repetition counts the expanded nodes, the rest run without stats
+                counted = iter([stats])
+                (path, _), times = timed(
+                    lambda: a_star(grid, heuristic, start, goal, stats=next(counted, None), verbose=False), repeat)
+                expanded += stats.nodes_expanded
+                search_times.append(times)
+                _, times = timed(lambda: prune_path(path), repeat)
+                prune_times.append(times)
+            # total over all pairs, per repetition
+            results['a_star[{0}]'.format(tag)] = summarize(
+                np.sum(search_times, axis=0), pairs=num_pairs, nodes_expanded=expanded)
+            results['prune_path[{0}]'.format(tag)] = summarize(np.sum(prune_times, axis=0), pairs=num_pairs)
+
+    _, times = timed(lambda: create_voxmap(data, voxel_size), repeat)
+    results['create_voxmap[voxel_size={0}]'.format(voxel_size)] = summarize(times)
+
+    polygons, times = timed(lambda: extract_polygons(data), repeat)
+    results['extract_polygons'] = summarize(times)
+
+    rng = np.random.RandomState(seed)
+    points = np.column_stack([
+        rng.uniform(np.min(data[:, 0] - data[:, 3]), np.max(data[:, 0] + data[:, 3]), num_samples),
+        rng.uniform(np.min(data[:, 1] - data[:, 4]), np.max(data[:, 1] + data[:, 4]), num_samples),
+        rng.uniform(0, 10, num_samples),
+    ])
+    collisions, times = timed(lambda: sum(collides(polygons, p) for p in points), repeat)
+    results['collides[samples={0}]'.format(num_samples)] = summarize(times, collisions=int(collisions))
+
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Prints the change of every stage median against `baseline` and
+    returns the keys that got slower by more than `tolerance`.
+    """
+    regressions = []
+    print('{0:<40}{1:>12}{2:>12}{3:>9}'.format('stage', 'baseline', 'current', 'change'))
+    for key, current in results.items():
+        if key not in baseline:
+            print('{0:<40}{1:>12}{2:>12.4f}'.format(key, '-', current['median']))
+            continue
+        old = baseline[key]['median']
+        new = current['median']
+        change = (new - old) / old if old > 0 else 0.0
+        flag = ''
+        if change > tolerance:
+            regressions.append(key)
+            flag = '  REGRESSION'
+        print('{0:<40}{1:>12.4f}{2:>12.4f}{3:>+8.1%}{4}'.format(key, old, new, change, flag))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--map', type=str, default='colliders.csv', help='colliders-format obstacle file')
+    parser.add_argument('--altitudes', type=float, nargs='+', default=[5, 25], help='drone altitudes')
+    parser.add_argument('--safety-distances', type=float, nargs='+', default=[3, 7], help='safety distances')
+    parser.add_argument('--pairs', type=int, default=5, help='start/goal pairs per altitude and safety distance')
+    parser.add_argument('--max-distance', type=int, default=100, help='max start to goal distance in cells')
+    parser.add_argument('--repeat', type=int, default=3, help='repetitions per measurement')
+    parser.add_argument('--seed', type=int, default=0, help='random seed for the scenarios')
+    parser.add_argument('--output', type=str, default=None, help='write results as JSON to this file')
+    parser.add_argument('--baseline', type=str, default=None, help='compare against this results file')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative slowdown')
+    args = parser.parse_args()
+
+    data = load_map(args.map)
+    results = run(data, args.altitudes, args.safety_distances, args.pairs, args.max_distance,
+                  args.repeat, args.seed)
+
+    report = {
+        'meta': {
+            'map': args.map,
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'time': time.time(),
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print('{0} stage(s) regressed'.format(len(regressions)))
+            sys.exit(1)
+    else:
+        for key, summary in results.items():
+            print('{0:<40}{1:>12.4f}'.format(key, summary['median']))
@@ -4,11 +4,10 @@ import numpy as np
 from math import sqrt
 
 
-def create_grid(data, drone_altitude, safety_distance):
+def grid_extent(data):
     """
-    Returns a grid representation of a 2D configuration space
-    based on given obstacle data, drone altitude and safety distance
-    arguments.
+    Returns the north and east offsets and the north and east sizes
+    of the grid that covers every obstacle in `data`.
     """
 
     # minimum and maximum north coordinates
@@ -24,22 +23,73 @@ def create_grid(data, drone_altitude, safety_distance):
     north_size = int(np.ceil(north_max - north_min))
     east_size = int(np.ceil(east_max - east_min))
 
+    return int(north_min), int(east_min), north_size, east_size
+
+
+def obstacle_footprint(obstacle, safety_distance, extent):
+    """
+    Returns the inclusive (north_from, north_to, east_from, east_to)
+    cell range covered by one obstacle row inflated by `safety_distance`
+    on a grid described by `extent` (see `grid_extent`).
+    """
+    north, east, alt, d_north, d_east, d_alt = obstacle
+    north_min, east_min, north_size, east_size = extent
+    return (
+        int(np.clip(north - d_north - safety_distance - north_min, 0, north_size-1)),
+        int(np.clip(north + d_north + safety_distance - north_min, 0, north_size-1)),
+        int(np.clip(east - d_east - safety_distance - east_min, 0, east_size-1)),
+        int(np.clip(east + d_east + safety_distance - east_min, 0, east_size-1)),
+    )
+
+
+def create_grid(data, drone_altitude, safety_distance):
+    """
+    Returns a grid representation of a 2D configuration space
+    based on given obstacle data, drone altitude and safety distance
+    arguments.
+    """
+    extent = grid_extent(data)
+    north_min, east_min, north_size, east_size = extent
+
     # Initialize an empty grid
-    grid = np.zeros((north_size, east_size))
+    grid = np.zeros((north_size, east_size), dtype=np.uint8)
 
     # Populate the grid with obstacles
     for i in range(data.shape[0]):
         north, east, alt, d_north, d_east, d_alt = data[i, :]
         if alt + d_alt + safety_distance > drone_altitude:
-            obstacle = [
-                int(np.clip(north - d_north - safety_distance - north_min, 0, north_size-1)),
-                int(np.clip(north + d_north + safety_distance - north_min, 0, north_size-1)),
-                int(np.clip(east - d_east - safety_distance - east_min, 0, east_size-1)),
-                int(np.clip(east + d_east + safety_distance - east_min, 0, east_size-1)),
-            ]
+            obstacle = obstacle_footprint(data[i, :], safety_distance, extent)
             grid[obstacle[0]:obstacle[1]+1, obstacle[2]:obstacle[3]+1] = 1
 
-    return grid, int(north_min), int(east_min)
+    return grid, north_min, east_min
+
+
+def create_voxmap(data, voxel_size=5):
+    """
+    Returns a 3D boolean grid of the obstacles in `data`, where a voxel
+    of `voxel_size` metres is True when an obstacle occupies it.
+    """
+    north_min = np.floor(np.amin(data[:, 0] - data[:, 3]))
+    north_max = np.ceil(np.amax(data[:, 0] + data[:, 3]))
+    east_min = np.floor(np.amin(data[:, 1] - data[:, 4]))
+    east_max = np.ceil(np.amax(data[:, 1] + data[:, 4]))
+    alt_max = np.ceil(np.amax(data[:, 2] + data[:, 5]))
+
+    north_size = int(np.ceil(north_max - north_min)) // voxel_size
+    east_size = int(np.ceil(east_max - east_min)) // voxel_size
+    alt_size = int(alt_max) // voxel_size
+
+    voxmap = np.zeros((north_size, east_size, alt_size), dtype=bool)
+    for i in range(data.shape[0]):
+        north, east, alt, d_north, d_east, d_alt = data[i, :]
+        north_from = int(np.clip(int(north - d_north - north_min) // voxel_size, 0, north_size))
+        north_to = int(np.clip(int(north + d_north - north_min) // voxel_size, 0, north_size))
+        east_from = int(np.clip(int(east - d_east - east_min) // voxel_size, 0, east_size))
+        east_to = int(np.clip(int(east + d_east - east_min) // voxel_size, 0, east_size))
+        alt_to = int(np.clip(int(alt + d_alt) // voxel_size, 0, alt_size))
+        voxmap[north_from:north_to, east_from:east_to, 0:alt_to] = True
+
+    return voxmap
 
 
 # Assume all actions cost the same.
@@ -101,27 +151,67 @@ def valid_actions(grid, current_node):
     return valid_actions
 
 
-def a_star(grid, h, start, goal):
+def a_star(grid, h, start, goal, cost_map=None, stats=None, free_space=None, verbose=True):
+    """
+    A* search over `grid` from `start` to `goal`.
+
+    `cost_map` is an optional array of the grid's shape whose values
+    (all >= 1) multiply the cost of every action entering that cell,
+    e.g. `ClearanceMap.cost_map` to prefer routes with more clearance.
+
+    `stats` is an optional `PlannerStats` that receives the search
+    counters and the wall time of the 'search' phase.
+
+    `free_space` is an optional `FreeSpace` of the grid. When start and
+    goal lie in different components the search fails at once instead
+    of expanding every cell reachable from the start.
+
+    With `verbose=False` the outcome is not printed.
+    """
+    if free_space is not None and start != goal and not free_space.connected(start, goal):
+        if stats is not None:
+            stats.path_found = False
+        if verbose:
+            _print_failure()
+        return [], 0
+    if stats is None:
+        return _a_star(grid, h, start, goal, cost_map, None, verbose)
+    with stats.phase('search'):
+        return _a_star(grid, h, start, goal, cost_map, stats, verbose)
+
+
+def _a_star(grid, h, start, goal, cost_map, stats, verbose):
 
     path = []
     path_cost = 0
     queue = PriorityQueue()
     queue.put((0, start))
-    visited = set(start)
+    # cheapest known cost to reach each cell; cells leave the queue once, when it is final
+    costs = {start: 0.0}
+    closed = set()
 
     branch = {}
     found = False
+
+    if stats is not None:
+        h = _counted(h, stats)
+        stats.nodes_pushed += 1
+        stats.peak_queue_size = max(stats.peak_queue_size, 1)
     
     while not queue.empty():
         item = queue.get()
         current_node = item[1]
-        if current_node == start:
-            current_cost = 0.0
-        else:              
-            current_cost = branch[current_node][0]
+        if current_node in closed:
+            # a stale entry, the cell was reached more cheaply since it was queued
+            continue
+        closed.add(current_node)
+        if stats is not None:
+            stats.nodes_expanded += 1
+        current_cost = costs[current_node]
             
         if current_node == goal:        
-            print('Found a path.')
+            if verbose:
+                print('Found a path.')
             found = True
             break
         else:
@@ -129,13 +219,24 @@ def a_star(grid, h, start, goal):
                 # get the tuple representation
                 da = action.delta
                 next_node = (current_node[0] + da[0], current_node[1] + da[1])
-                branch_cost = current_cost + action.cost
-                queue_cost = branch_cost + h(next_node, goal)
+                if next_node in closed:
+                    continue
+                if cost_map is None:
+                    branch_cost = current_cost + action.cost
+                else:
+                    branch_cost = current_cost + action.cost * cost_map[next_node]
                 
-                if next_node not in visited:                
-                    visited.add(next_node)               
+                if branch_cost < costs.get(next_node, np.inf):
+                    costs[next_node] = branch_cost
                     branch[next_node] = (branch_cost, current_node, action)
+                    queue_cost = branch_cost + h(next_node, goal)
                     queue.put((queue_cost, next_node))
+                    if stats is not None:
+                        stats.nodes_pushed += 1
+                        stats.peak_queue_size = max(stats.peak_queue_size, queue.qsize())
+
+    if stats is not None:
+        stats.path_found = found
              
     if found:
         # retrace steps
@@ -146,13 +247,24 @@ def a_star(grid, h, start, goal):
             path.append(branch[n][1])
             n = branch[n][1]
         path.append(branch[n][1])
-    else:
-        print('**********************')
-        print('Failed to find a path!')
-        print('**********************') 
+    elif verbose:
+        _print_failure()
     return path[::-1], path_cost
 
 
+def _print_failure():
+    print('**********************')
+    print('Failed to find a path!')
+    print('**********************')
+
+
+def _counted(h, stats):
+    def counted_h(position, goal_position):
+        stats.heuristic_calls += 1
+        return h(position, goal_position)
+    return counted_h
+
+
 def heuristic(position, goal_position):
     return np.linalg.norm(np.array(position) - np.array(goal_position))
 
@@ -0,0 +1,218 @@
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from udacidrone.connection import Connection
+from udacidrone.messaging import MsgID
+import udacidrone.messaging.message_types as mt
+
+from tlog_reader import TLog
+
+Command = namedtuple('Command', ['time', 'name', 'args'])
+
+# TLog message type -> (message id, message factory from a log row)
+_MESSAGES = {
+    'STATE': (MsgID.STATE, lambda t, armed, guided: mt.StateMessage(t, bool(armed), bool(guided))),
+    'GLOBAL_HOME': (MsgID.GLOBAL_HOME, lambda t, lon, lat, alt: mt.GlobalFrameMessage(t, lat, lon, alt)),
+    'GLOBAL_POSITION': (MsgID.GLOBAL_POSITION, lambda t, lon, lat, alt: mt.GlobalFrameMessage(t, lat, lon, alt)),
+    'LOCAL_POSITION': (MsgID.LOCAL_POSITION, mt.LocalFrameMessage),
+    'LOCAL_VELOCITY': (MsgID.LOCAL_VELOCITY, mt.LocalFrameMessage),
+}
+
+
+def replay_messages(tlog):
+    """
+    Rebuilds the message stream of a TLog (file name or `TLog`) as a
+    time ordered list of (time, message id, message). Messages with the
+    same timestamp keep the order of their types in the log.
+
+    Building the list is the expensive part of a replay, build it once
+    and pass it to every `ReplayConnection` of a batch of missions.
+    """
+    if not isinstance(tlog, TLog):
+        tlog = TLog(tlog)
+    names = [name for name in tlog.message_types if name in _MESSAGES]
+    if not names:
+        return []
+
+    stream = []
+    times = []
+    for name in names:
+        msg_id, factory = _MESSAGES[name]
+        rows = tlog.columns(name).T.tolist()
+        stream.extend((row[0], msg_id, factory(*row)) for row in rows)
+        times.append(tlog.columns(name)[0])
+    order = np.argsort(np.concatenate(times), kind='stable')
+    return [stream[i] for i in order]
+
+
+class _WaypointSink:
+    """Stands in for the mavlink socket that `send_waypoints` writes to."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def write(self, data):
+        self.connection._record('write', data)
+
+
+class ReplayConnection(Connection):
+    """
+    Connection that feeds a recorded TLog back to a `Drone` instead of
+    talking to the simulator, so the callbacks and state machines of
+    `MotionPlanning` and `BackyardFlyer` can be run offline:
+
+        connection = ReplayConnection('Logs/TLog.txt')
+        drone = BackyardFlyer(connection)
+        drone.start()
+        print(connection.commands)
+
+    Every message of the log goes through the usual listeners (STATE,
+    GLOBAL_HOME, GLOBAL_POSITION, LOCAL_POSITION, LOCAL_VELOCITY). The
+    replay is open loop: commands do not change the telemetry, they are
+    recorded in `commands` as (log time, name, args). The replay stops
+    at the end of the log or when the drone calls `stop()`.
+
+    `speed` is a multiple of real time; None replays as fast as the
+    callbacks allow.
+
+    The `Drone` base class writes its own `Logs/TLog.txt`, replay a copy
+    of a log rather than the one in the working directory.
+    """
+
+    def __init__(self, tlog, speed=None):
+        super().__init__(threaded=False)
+        self.messages = tlog if isinstance(tlog, list) else replay_messages(tlog)
+        self.speed = speed
+        self.commands = []
+        self.time = None
+        self.messages_sent = 0
+        self._running = False
+        self._master = _WaypointSink(self)
+
+    @property
+    def open(self):
+        return self._running
+
+    def start(self):
+        self._running = True
+        if self.messages:
+            self._replay()
+        self._running = False
+
+    def dispatch_loop(self):
+        self.start()
+
+    def stop(self):
+        self._running = False
+
+    def _replay(self):
+        log_start = self.messages[0][0]
+        wall_start = time.monotonic()
+        for t, msg_id, msg in self.messages:
+            if not self._running:
+                break
+            if self.speed:
+                delay = (t - log_start) / self.speed - (time.monotonic() - wall_start)
+                if delay > 0:
+                    time.sleep(delay)
+            self.time = t
+            self.notify_message_listeners(msg_id, msg)
+            self.messages_sent += 1
+
+    def _record(self, name, *args):
+        self.commands.append(Command(self.time, name, args))
+
+    def command_names(self):
+        return [command.name for command in self.commands]
+
+    def arm(self):
+        self._record('arm')
+
+    def disarm(self):
+        self._record('disarm')
+
+    def take_control(self):
+        self._record('take_control')
+
+    def release_control(self):
+        self._record('release_control')
+
+    def cmd_attitude(self, roll, pitch, yaw, thrust):
+        self._record('cmd_attitude', roll, pitch, yaw, thrust)
+
+    def cmd_attitude_rate(self, roll_rate, pitch_rate, yaw_rate, thrust):
+        self._record('cmd_attitude_rate', roll_rate, pitch_rate, yaw_rate, thrust)
+
+    def cmd_moment(self, roll_moment, pitch_moment, yaw_moment, thrust):
+        self._record('cmd_moment', roll_moment, pitch_moment, yaw_moment, thrust)
+
+    def cmd_velocity(self, vn, ve, vd, heading):
+        self._record('cmd_velocity', vn, ve, vd, heading)
+
+    def cmd_position(self, n, e, d, heading):
+        self._record('cmd_position', n, e, d, heading)
+
+    def takeoff(self, n, e, d):
+        self._record('takeoff', n, e, d)
+
+    def land(self, n, e):
+        self._record('land', n, e)
+
+    def set_home_position(self, lat, lon, alt):
+        self._record('set_home_position', lat, lon, alt)
+
+    def local_position_target(self, n, e, d, t=0):
+        self._record('local_position_target', n, e, d, t)
+
+    def local_velocity_target(self, vn, ve, vd, t=0):
+        self._record('local_velocity_target', vn, ve, vd, t)
+
+    def local_acceleration_target(self, an, ae, ad, t=0):
+        self._record('local_acceleration_target', an, ae, ad, t)
+
+    def attitude_target(self, roll, pitch, yaw, t=0):
+        self._record('attitude_target', roll, pitch, yaw, t)
+
+    def body_rate_target(self, p, q, r, t=0):
+        self._record('body_rate_target', p, q, r, t)
+
+
+if __name__ == "__main__":
+    import argparse
+    import contextlib
+    import io
+    import os
+    import shutil
+    import tempfile
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('log', nargs='?', default='Logs/TLog.txt', help='TLog file to replay')
+    parser.add_argument('--missions', type=int, default=100, help='number of replays')
+    parser.add_argument('--speed', type=float, default=None, help='real time multiple, default as fast as possible')
+    args = parser.parse_args()
+
+    from backyard_flyer_solution import BackyardFlyer
+
+    # the drone rewrites Logs/TLog.txt and Logs/NavLog.txt, keep them out of the source tree
+    log = os.path.abspath(args.log)
+    cwd = os.getcwd()
+    directory = tempfile.mkdtemp()
+    os.makedirs(os.path.join(directory, 'Logs'))
+    os.chdir(directory)
+    try:
+        messages = replay_messages(log)
+        t0 = time.time()
+        for _ in range(args.missions):
+            connection = ReplayConnection(messages, speed=args.speed)
+            with contextlib.redirect_stdout(io.StringIO()):
+                BackyardFlyer(connection).start()
+        elapsed = time.time() - t0
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(directory)
+
+    print('{0} messages, commands: {1}'.format(len(messages), connection.command_names()))
+    print('{0} missions in {1:.2f} s, {2:.0f} missions/minute'.format(
+        args.missions, elapsed, args.missions * 60 / elapsed))
@@ -0,0 +1,255 @@
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def map_hash(grid):
+    """Content hash of a planning grid (0 = free); any obstacle edit changes it."""
+    cells = np.packbits(np.ascontiguousarray(np.asarray(grid) != 0))
+    digest = hashlib.sha1('{0}x{1}:'.format(*np.shape(grid)).encode())
+    digest.update(cells.tobytes())
+    return digest.hexdigest()
+
+
+def segment_free(grid, a, b):
+    """True when the straight segment between cells `a` and `b` only crosses free cells."""
+    steps = int(np.ceil(2 * max(abs(b[0] - a[0]), abs(b[1] - a[1])))) + 1
+    xs = np.rint(np.linspace(a[0], b[0], steps)).astype(np.intp)
+    ys = np.rint(np.linspace(a[1], b[1], steps)).astype(np.intp)
+    return not np.asarray(grid)[xs, ys].any()
+
+
+class _Route:
+
+    __slots__ = ('path', 'plan_time', 'remaining')
+
+    def __init__(self, path, plan_time):
+        self.path = [tuple(int(c) for c in cell) for cell in path]
+        self.plan_time = plan_time
+        # length of the route from each waypoint to the goal
+        points = np.array(self.path, dtype=np.float64).reshape(-1, 2)
+        legs = np.hypot(*np.diff(points, axis=0).T) if len(points) > 1 else np.zeros(0)
+        self.remaining = np.concatenate((np.cumsum(legs[::-1])[::-1], [0.0]))[:len(points)]
+
+
+class RouteCache:
+    """
+    Cache of planned routes in front of the planner.
+
+    Routes are keyed on (map hash, start cell, goal cell, planner
+    parameters), where the map hash is `map_hash(grid)`, so a route is
+    never served for a map it was not planned on. The `capacity` most
+    recently used routes are kept in memory; with a `directory` every
+    route is also written there as JSON, in one subdirectory per map
+    hash, and survives restarts:
+
+        cache = RouteCache(directory='routes')
+        version = map_hash(grid)
+        path = cache.get(version, start, goal, params, grid=grid, stats=stats)
+        if path is None:
+            path = prune_path(a_star(grid, heuristic, start, goal)[0])
+            cache.put(version, start, goal, params, path, plan_time)
+
+    When `grid` is passed to `get` and there is no route from `start`,
+    a cached route to the same goal whose waypoint lies within
+    `reuse_radius` cells of `start`, in straight line of sight, is
+    reused from that waypoint on.
+
+    The counters (`info()`) and the `cache` / `cache_saved_time` fields
+    of `PlannerStats` tell how often routes were served from the cache
+    and how much planning time that saved.
+    """
+
+    def __init__(self, capacity=256, directory=None, reuse_radius=10):
+        self.capacity = capacity
+        self.directory = directory
+        self.reuse_radius = reuse_radius
+        self._routes = OrderedDict()
+        # (map hash, goal, params) -> keys of the cached routes to that goal
+        self._by_goal = {}
+
+        self.hits = 0
+        self.subpath_hits = 0
+        self.misses = 0
+        self.saved_time = 0.0
+
+    @staticmethod
+    def key(version, start, goal, params=()):
+        return version, tuple(int(c) for c in start), tuple(int(c) for c in goal), tuple(params)
+
+    def __len__(self):
+        return len(self._routes)
+
+    def __contains__(self, key):
+        return key in self._routes
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.subpath_hits + self.misses
+        return (self.hits + self.subpath_hits) / lookups if lookups else 0.0
+
+    def info(self):
+        return {
+            'cached': len(self._routes),
+            'hits': self.hits,
+            'subpath_hits': self.subpath_hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate,
+            'saved_time': self.saved_time,
+        }
+
+    def get(self, version, start, goal, params=(), grid=None, stats=None):
+        """
+        Returns the cached path (a list of cells) from `start` to `goal`,
+        or None. `stats` is an optional `PlannerStats` that records the
+        outcome.
+        """
+        t0 = time.perf_counter()
+        key = self.key(version, start, goal, params)
+        route = self._lookup(key)
+        kind = 'hit'
+        path = None
+        if route is not None:
+            path = list(route.path)
+        elif grid is not None:
+            route, path = self._reuse(key, grid)
+            kind = 'subpath'
+        if route is None:
+            self.misses += 1
+            if stats is not None:
+                stats.cache = 'miss'
+            return None
+
+        saved = max(route.plan_time - (time.perf_counter() - t0), 0.0)
+        if kind == 'hit':
+            self.hits += 1
+        else:
+            self.subpath_hits += 1
+        self.saved_time += saved
+        if stats is not None:
+            stats.cache = kind
+            stats.cache_saved_time = saved
+            stats.path_found = True
+        return path
+
+    def put(self, version, start, goal, params, path, plan_time=0.0):
+        """Stores a path and the time it took to plan it."""
+        if not path:
+            return
+        key = self.key(version, start, goal, params)
+        route = _Route(path, plan_time)
+        self._insert(key, route)
+        if self.directory is not None:
+            self._write(key, route)
+
+    def invalidate(self, version=None):
+        """Drops the routes of one map version (all of them with None) from memory and disk."""
+        for key in [k for k in self._routes if version is None or k[0] == version]:
+            self._remove(key)
+        if self.directory is not None and os.path.isdir(self.directory):
+            versions = os.listdir(self.directory) if version is None else [version]
+            for name in versions:
+                folder = os.path.join(self.directory, name)
+                if os.path.isdir(folder):
+                    for filename in os.listdir(folder):
+                        os.remove(os.path.join(folder, filename))
+                    os.rmdir(folder)
+
+    def _lookup(self, key):
+        route = self._routes.get(key)
+        if route is not None:
+            self._routes.move_to_end(key)
+            return route
+        if self.directory is not None:
+            route = self._read(key)
+            if route is not None:
+                self._insert(key, route)
+        return route
+
+    def _reuse(self, key, grid):
+        version, start, goal, params = key
+        best = None
+        for other in self._by_goal.get((version, goal, params), ()):
+            route = self._routes[other]
+            points = np.array(route.path, dtype=np.float64)
+            distance = np.hypot(points[:, 0] - start[0], points[:, 1] - start[1])
+            # skip the goal itself, a route has to be left to reach it
+            for i in np.flatnonzero(distance[:-1] <= self.reuse_radius).tolist():
+                length = distance[i] + route.remaining[i]
+                if (best is None or length < best[0]) and segment_free(grid, start, route.path[i]):
+                    best = (length, other, i)
+        if best is None:
+            return None, None
+        _, other, i = best
+        self._routes.move_to_end(other)
+        route = self._routes[other]
+        path = route.path[i:]
+        if path[0] != start:
+            path = [start] + path
+        return route, path
+
+    def _insert(self, key, route):
+        if key in self._routes:
+            self._remove(key)
+        self._routes[key] = route
+        self._by_goal.setdefault((key[0], key[2], key[3]), []).append(key)
+        while len(self._routes) > self.capacity:
+            self._remove(next(iter(self._routes)))
+
+    def _remove(self, key):
+        del self._routes[key]
+        keys = self._by_goal[(key[0], key[2], key[3])]
+        keys.remove(key)
+        if not keys:
+            del self._by_goal[(key[0], key[2], key[3])]
+
+    def _filename(self, key):
+        name = hashlib.sha1(json.dumps(key[1:]).encode()).hexdigest()
+        return os.path.join(self.directory, key[0], name + '.json')
+
+    def _write(self, key, route):
+        filename = self._filename(key)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename, 'w') as f:
+            json.dump({'key': list(key[1:]), 'path': route.path, 'plan_time': route.plan_time}, f)
+
+    def _read(self, key):
+        try:
+            with open(self._filename(key), 'r') as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # the file name is a hash, make sure the key matches
+        if record['key'] != json.loads(json.dumps(key[1:])):
+            return None
+        return _Route(record['path'], record['plan_time'])
+
+
+if __name__ == "__main__":
+    from planning_utils import a_star, create_grid, heuristic, prune_path
+    from free_space import FreeSpace
+
+    data = np.loadtxt('colliders.csv', delimiter=',', dtype=np.float64, skiprows=2)
+    grid, _, _ = create_grid(data, 5, 7)
+    free_space = FreeSpace(grid)
+    version = map_hash(grid)
+    rng = np.random.RandomState(0)
+
+    # a few depots and drop-off points, flown over and over from starts around the depots
+    depot = free_space.sample(rng)
+    goals = [free_space.sample(rng, free_space.component(depot)) for _ in range(3)]
+    cache = RouteCache()
+    t0 = time.perf_counter()
+    for mission in range(15):
+        start = free_space.nearest_free((depot[0] + rng.randint(-3, 4), depot[1] + rng.randint(-3, 4)),
+                                        free_space.component(depot))
+        goal = goals[mission % len(goals)]
+        if cache.get(version, start, goal, grid=grid) is None:
+            t_plan = time.perf_counter()
+            path = prune_path(a_star(grid, heuristic, start, goal, free_space=free_space)[0])
+            cache.put(version, start, goal, (), path, time.perf_counter() - t_plan)
+    print('15 missions in {0:.2f} s, cache {1}'.format(time.perf_counter() - t0, cache.info()))
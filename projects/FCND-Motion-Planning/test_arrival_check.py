@@ -0,0 +1,43 @@
+from unittest import TestCase
+
+import numpy as np
+
+from arrival_check import ArrivalCheck, landed, slower_than
+
+
+class TestArrivalCheck(TestCase):
+
+    def setUp(self):
+        self.check = ArrivalCheck(tolerance=0.1)
+        self.check.set_target(10.0, 5.0, 3.0)
+
+    def test_reached_does_not_touch_telemetry(self):
+        position = np.array([10.05, 4.95, -3.02])
+        self.assertTrue(self.check.reached(position))
+        self.assertTrue(self.check.reached(position))
+        self.assertTrue((position == [10.05, 4.95, -3.02]).all())
+        self.assertFalse(self.check.reached(np.array([10.05, 4.95, 3.02])))
+        self.assertFalse(self.check.reached((10.2, 5.0, -3.0)))
+        self.assertTrue(self.check.reached((10.2, 5.0, -3.0), tolerance=0.5))
+
+    def test_matches_numpy_checks(self):
+        rng = np.random.RandomState(1)
+        target = np.array(self.check.target)
+        for position in rng.uniform([9.8, 4.8, -3.2], [10.2, 5.2, -2.8], (200, 3)):
+            current = position.copy()
+            current[2] = -current[2]
+            self.assertEqual(self.check.reached(position), (abs(target - current) < 0.1).all())
+            self.assertAlmostEqual(self.check.horizontal_distance(position), np.linalg.norm(position[:2] - target[:2]))
+            self.assertEqual(self.check.within(position, 0.15), np.linalg.norm(position[:2] - target[:2]) < 0.15)
+            self.assertEqual(slower_than(position - target, 0.2), np.linalg.norm((position - target)[:2]) < 0.2)
+
+    def test_transitions(self):
+        self.assertTrue(self.check.climbed(np.array([0.0, 0.0, -2.9])))
+        self.assertFalse(self.check.climbed(np.array([0.0, 0.0, -2.8])))
+        self.assertTrue(landed(np.array([0, 0, 0.05]), np.array([0, 0, 0.0]), np.array([0, 0, 0.005])))
+        self.assertFalse(landed(np.array([0, 0, 0.05]), np.array([0, 0, 0.0]), np.array([0, 0, -0.5])))
+
+    def test_decimation(self):
+        check = ArrivalCheck(decimation=3)
+        self.assertEqual([check.due() for _ in range(7)], [False, False, True, False, False, True, False])
+        self.assertTrue(all(ArrivalCheck().due() for _ in range(3)))
@@ -0,0 +1,57 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from city_generator import CityParams, generate_city, write_colliders
+from planning_utils import create_grid
+
+
+class TestCityGenerator(TestCase):
+
+    def setUp(self):
+        self.params = CityParams(extent=450.0, block_size=60.0, street_width=15.0, lots_per_side=3)
+
+    def test_deterministic_per_seed(self):
+        first = np.vstack(list(generate_city(self.params, seed=3)))
+        again = np.vstack(list(generate_city(self.params, seed=3)))
+        other = np.vstack(list(generate_city(self.params, seed=4)))
+        np.testing.assert_array_equal(first, again)
+        self.assertFalse(first.shape == other.shape and np.array_equal(first, other))
+
+    def test_obstacles_inside_extent(self):
+        city = np.vstack(list(generate_city(self.params)))
+        self.assertGreater(len(city), 0)
+        half_extent = self.params.extent / 2.0
+        self.assertTrue((city[:, 0] - city[:, 3] >= -half_extent).all())
+        self.assertTrue((city[:, 0] + city[:, 3] <= half_extent).all())
+        self.assertTrue((city[:, 1] - city[:, 4] >= -half_extent).all())
+        self.assertTrue((city[:, 1] + city[:, 4] <= half_extent).all())
+        self.assertTrue((city[:, 2] + city[:, 5] <= self.params.max_height).all())
+        self.assertTrue(np.allclose(city[:, 3], 60.0 / 3 / 2 - self.params.lot_margin))
+
+    def test_create_grid_round_trip(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        filename = os.path.join(directory, 'city.csv')
+        count = write_colliders(filename, generate_city(self.params))
+        data = np.loadtxt(filename, delimiter=',', dtype=np.float64, skiprows=2)
+        self.assertEqual(len(data), count)
+
+        grid, north_offset, east_offset = create_grid(data, 0, 0)
+        # every building blocks the cell at its centre, the streets stay free
+        cells = (data[:, :2] - [north_offset, east_offset]).astype(int)
+        self.assertTrue(grid[cells[:, 0], cells[:, 1]].all())
+        # an even number of blocks per side puts a street on the centre lines
+        self.assertEqual(self.params.blocks_per_side % 2, 0)
+        self.assertFalse(grid[int(-north_offset)].any())
+        self.assertFalse(grid[:, int(-east_offset)].any())
+
+    def test_invalid_params(self):
+        with self.assertRaises(ValueError):
+            CityParams(extent=50.0, block_size=60.0, street_width=15.0)
+        with self.assertRaises(ValueError):
+            CityParams(block_size=60.0, lots_per_side=3, lot_margin=10.0)
+        CityParams(extent=75.0, block_size=60.0, street_width=15.0, lots_per_side=3, lot_margin=9.5)
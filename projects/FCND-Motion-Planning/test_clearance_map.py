@@ -0,0 +1,125 @@
+import heapq
+from unittest import TestCase, mock
+
+import numpy as np
+
+import clearance_map
+from clearance_map import ClearanceMap, distance_transform
+from planning_utils import a_star, create_grid, heuristic, valid_actions
+
+
+def dijkstra(grid, start, goal, cost_map):
+    """Reference shortest path cost over the same moves as `a_star`."""
+    costs = {start: 0.0}
+    queue = [(0.0, start)]
+    while queue:
+        cost, node = heapq.heappop(queue)
+        if node == goal:
+            return cost
+        if cost > costs[node]:
+            continue
+        for action in valid_actions(grid, node):
+            next_node = (node[0] + action.delta[0], node[1] + action.delta[1])
+            next_cost = cost + action.cost * cost_map[next_node]
+            if next_cost < costs.get(next_node, np.inf):
+                costs[next_node] = next_cost
+                heapq.heappush(queue, (next_cost, next_node))
+    return None
+
+
+# two buildings tall enough to be above any flight altitude used below
+DATA = np.array([
+    [10.0, 10.0, 20.0, 2.0, 2.0, 20.0],
+    [30.0, 25.0, 20.0, 3.0, 1.0, 20.0],
+    [0.0, 40.0, 1.0, 1.0, 1.0, 1.0],
+])
+
+
+class TestDistanceTransform(TestCase):
+
+    def test_matches_brute_force(self):
+        rng = np.random.RandomState(0)
+        for _ in range(10):
+            obstacles = rng.rand(17, 23) < 0.1
+            obstacles[0, 0] = True
+            cells = np.indices(obstacles.shape).reshape(2, -1).T
+            occupied = np.argwhere(obstacles)
+            expect = np.sqrt(((cells[:, None, :] - occupied[None, :, :]) ** 2).sum(axis=2).min(axis=1))
+            self.assertTrue(
+                np.allclose(distance_transform(obstacles), expect.reshape(obstacles.shape))
+            )
+
+    def test_empty_grid(self):
+        self.assertTrue(np.isinf(distance_transform(np.zeros((3, 4)))).all())
+
+
+class TestCostMap(TestCase):
+
+    def test_a_star_prefers_clearance(self):
+        grid = np.zeros((5, 5))
+        cost_map = np.ones((5, 5))
+        cost_map[2, 1:4] = 10.0
+        path, cost = a_star(grid, heuristic, (2, 0), (2, 4), cost_map=cost_map)
+        self.assertNotIn((2, 2), path)
+        self.assertLess(cost, 10.0)
+
+    def test_a_star_finds_cheapest_weighted_path(self):
+        rng = np.random.RandomState(0)
+        for _ in range(50):
+            grid = (rng.rand(20, 20) < 0.2).astype(np.uint8)
+            grid[0, 0] = grid[19, 19] = 0
+            cost_map = 1.0 + 5.0 * rng.rand(20, 20)
+            expect = dijkstra(grid, (0, 0), (19, 19), cost_map)
+            path, cost = a_star(grid, heuristic, (0, 0), (19, 19), cost_map=cost_map)
+            if expect is None:
+                self.assertEqual(path, [])
+                continue
+            self.assertAlmostEqual(cost, expect)
+            self.assertEqual(path[0], (0, 0))
+            self.assertEqual(path[-1], (19, 19))
+
+
+class TestClearanceMap(TestCase):
+
+    def setUp(self):
+        self.clearance = ClearanceMap(DATA, 5, vertical_margin=3)
+
+    def test_footprint_matches_create_grid(self):
+        grid, north_offset, east_offset = create_grid(DATA, 5 - 3, 0)
+        self.assertTrue(np.array_equal(self.clearance.footprint, grid != 0))
+        self.assertEqual((self.clearance.north_offset, self.clearance.east_offset), (north_offset, east_offset))
+        # the low obstacle is below the flight altitude and not part of the map
+        self.assertFalse(self.clearance.footprint[int(0 - north_offset), int(40 - east_offset)])
+
+    def test_grid_thresholds_distance(self):
+        for safety_distance in (0, 2, 3.5):
+            grid = self.clearance.grid(safety_distance)
+            self.assertEqual(grid.dtype, np.uint8)
+            self.assertEqual(grid.shape, self.clearance.shape)
+            self.assertTrue(np.array_equal(grid != 0, self.clearance.distance <= safety_distance))
+        # a larger safety distance only ever blocks more cells
+        self.assertTrue((self.clearance.grid(3) >= self.clearance.grid(1)).all())
+        self.assertTrue(np.array_equal(self.clearance.grid(0) != 0, self.clearance.footprint))
+
+    def test_cost_map_range(self):
+        cost = self.clearance.cost_map(2, influence=4.0, weight=3.0)
+        distance = self.clearance.distance
+        blocked = distance <= 2
+        self.assertTrue(np.isinf(cost[blocked]).all())
+        free = cost[~blocked]
+        self.assertTrue((free >= 1.0).all())
+        self.assertTrue((free <= 4.0).all())
+        self.assertTrue(np.allclose(cost[distance >= 6], 1.0))
+        # cost falls off with clearance
+        near = (distance > 2) & (distance < 3)
+        far = (distance > 4) & (distance < 5)
+        self.assertGreater(cost[near].min(), cost[far].max())
+
+    def test_distance_is_computed_once(self):
+        with mock.patch.object(clearance_map, 'distance_transform', wraps=distance_transform) as transform:
+            clearance = ClearanceMap(DATA, 5)
+            clearance.grid(1)
+            clearance.grid(2)
+            clearance.cost_map(1)
+            self.assertIs(clearance.distance, clearance.distance)
+        self.assertEqual(transform.call_count, 1)
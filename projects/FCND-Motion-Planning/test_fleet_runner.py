@@ -0,0 +1,125 @@
+import asyncio
+import contextlib
+import io
+import math
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase, mock, skipIf
+
+try:
+    import udacidrone
+except ImportError:
+    udacidrone = None
+
+from mavlink_simulator import MavlinkSimulator, mavlink
+
+
+@skipIf(udacidrone is None, 'udacidrone is not installed')
+class TestFleetRunner(TestCase):
+
+    def setUp(self):
+        # every drone writes Logs/TLog.txt in the working directory
+        self.cwd = os.getcwd()
+        self.directory = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.directory, 'Logs'))
+        os.chdir(self.directory)
+
+        self.sim = MavlinkSimulator(vehicles=3, port=0, speed=20.0)
+        self.thread = threading.Thread(target=self.sim.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.sim.stop()
+        self.thread.join()
+        self.sim.close()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.directory)
+
+    def test_backyard_flyers_share_one_loop(self):
+        from backyard_flyer_solution import BackyardFlyer
+        from fleet_runner import AsyncMavlinkConnection, FleetRunner
+
+        runner = FleetRunner()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for port in self.sim.ports:
+                runner.add(BackyardFlyer(AsyncMavlinkConnection(port=port)))
+            runner.run(timeout=60)
+
+        self.assertTrue(all(not drone.in_mission for drone in runner.drones))
+        self.assertFalse(self.sim.fleet.armed.any())
+        report = runner.report()
+        self.assertEqual(len(report['vehicles']), 3)
+        self.assertTrue(all(v['messages'] > 0 for v in report['vehicles']))
+        self.assertGreater(report['cpu_time'], 0.0)
+        self.assertLess(report['wall_time'], 60)
+
+    def test_plan_path_runs_in_executor(self):
+        from fleet_runner import AsyncMavlinkConnection, AsyncMotionPlanning
+        from motion_planning import MotionPlanning
+
+        release = threading.Event()
+        planner_threads = []
+        states = []
+
+        def plan_path(drone):
+            planner_threads.append(threading.get_ident())
+            release.wait(10)
+
+        async def scenario(drone):
+            task = asyncio.ensure_future(drone.connection.run())
+            while not drone.connection.open:
+                await asyncio.sleep(0.01)
+            self.assertIs(drone.connection.loop, asyncio.get_running_loop())
+            drone.plan_path()
+            plan = drone._plan
+            drone.plan_path()
+            self.assertIs(drone._plan, plan)
+            # the state machine waits while the search runs, the loop does not
+            await asyncio.sleep(0.1)
+            drone.state_callback()
+            self.assertEqual(states, [])
+            release.set()
+            await plan
+            drone.state_callback()
+            self.assertEqual(states, [drone])
+            drone.connection.stop()
+            await task
+
+        with ThreadPoolExecutor(1) as executor, contextlib.redirect_stdout(io.StringIO()), \
+                mock.patch.object(MotionPlanning, 'plan_path', plan_path), \
+                mock.patch.object(MotionPlanning, 'state_callback', states.append):
+            drone = AsyncMotionPlanning(AsyncMavlinkConnection(port=self.sim.ports[0]), executor)
+            asyncio.run(scenario(drone))
+        self.assertEqual(len(planner_threads), 1)
+        self.assertNotEqual(planner_threads[0], threading.get_ident())
+
+    def test_attitude_commands(self):
+        from fleet_runner import AsyncMavlinkConnection
+
+        connection = AsyncMavlinkConnection()
+        sent = bytearray()
+        connection._mav.file = mock.Mock(write=sent.extend)
+        connection.cmd_attitude(0.1, -0.2, 0.3, 0.5)
+        connection.cmd_attitude_rate(0.1, 0.2, 0.3, 0.6)
+        connection.cmd_moment(1.0, 2.0, 3.0, 0.7)
+        connection.local_position_target(1.0, 2.0, -3.0, t=1.5)
+        connection.body_rate_target(0.1, 0.2, 0.3)
+
+        messages = mavlink.MAVLink(None).parse_buffer(bytes(sent))
+        self.assertEqual([m.get_type() for m in messages], ['SET_ATTITUDE_TARGET'] * 3 +
+                         ['POSITION_TARGET_LOCAL_NED', 'ATTITUDE_TARGET'])
+        attitude, rate, moment, position, body_rate = messages
+        w, x, y, z = attitude.q
+        roll = math.atan2(2 * (w * x + y * z), 1 - 2 * (x * x + y * y))
+        pitch = math.asin(2 * (w * y - z * x))
+        yaw = math.atan2(2 * (w * z + x * y), 1 - 2 * (y * y + z * z))
+        self.assertEqual([round(a, 5) for a in (roll, pitch, yaw)], [0.1, -0.2, 0.3])
+        self.assertAlmostEqual(attitude.thrust, 0.5)
+        self.assertEqual([round(r, 5) for r in (rate.body_roll_rate, rate.body_pitch_rate, rate.body_yaw_rate)],
+                         [0.1, 0.2, 0.3])
+        self.assertEqual((moment.body_roll_rate, moment.body_yaw_rate), (1.0, 3.0))
+        self.assertEqual((position.time_boot_ms, position.x, position.z), (1500, 1.0, -3.0))
+        self.assertAlmostEqual(body_rate.body_pitch_rate, 0.2)
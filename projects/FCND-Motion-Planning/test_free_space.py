@@ -0,0 +1,152 @@
+from collections import deque
+from unittest import TestCase
+
+import numpy as np
+
+from free_space import FreeSpace, label_components
+from planner_stats import PlannerStats
+from planning_utils import a_star, heuristic
+
+
+def flood_labels(blocked):
+    """Reference 8-connected labeling by breadth first search."""
+    n, m = blocked.shape
+    labels = np.zeros((n, m), dtype=int)
+    label = 0
+    for x in range(n):
+        for y in range(m):
+            if blocked[x, y] or labels[x, y]:
+                continue
+            label += 1
+            labels[x, y] = label
+            queue = deque([(x, y)])
+            while queue:
+                i, j = queue.popleft()
+                for di in (-1, 0, 1):
+                    for dj in (-1, 0, 1):
+                        a, b = i + di, j + dj
+                        if 0 <= a < n and 0 <= b < m and not blocked[a, b] and not labels[a, b]:
+                            labels[a, b] = label
+                            queue.append((a, b))
+    return labels
+
+
+class TestLabelComponents(TestCase):
+
+    def test_matches_flood_fill(self):
+        rng = np.random.RandomState(0)
+        for density in (0.2, 0.4, 0.55, 0.7):
+            blocked = rng.rand(31, 37) < density
+            np.testing.assert_array_equal(label_components(blocked), flood_labels(blocked))
+
+    def test_diagonal_touch(self):
+        blocked = np.array([[0, 1, 1],
+                            [1, 0, 1],
+                            [1, 1, 1],
+                            [0, 1, 0]], dtype=bool)
+        np.testing.assert_array_equal(label_components(blocked), [[1, 0, 0], [0, 1, 0], [0, 0, 0], [2, 0, 3]])
+        self.assertFalse(label_components(np.ones((3, 3), dtype=bool)).any())
+
+
+class TestFreeSpace(TestCase):
+
+    def setUp(self):
+        # two rooms split by a wall at column 5
+        self.grid = np.zeros((10, 10), dtype=np.uint8)
+        self.grid[:, 5] = 1
+        self.grid[2:4, 1:3] = 1
+        self.free_space = FreeSpace(self.grid)
+
+    def test_sample(self):
+        rng = np.random.RandomState(1)
+        cells = [self.free_space.sample(rng) for _ in range(500)]
+        self.assertTrue(all(self.grid[c] == 0 for c in cells))
+        self.assertEqual(len(set(cells)), len(self.free_space))
+        right = self.free_space.component((0, 9))
+        self.assertTrue(all(self.free_space.sample(rng, right)[1] > 5 for _ in range(100)))
+        self.assertEqual(self.free_space.component_size(right), 40)
+        self.assertRaises(ValueError, FreeSpace(np.ones((2, 2))).sample)
+
+    def test_connected(self):
+        self.assertEqual(self.free_space.num_components, 2)
+        self.assertTrue(self.free_space.connected((0, 0), (9, 4)))
+        self.assertFalse(self.free_space.connected((0, 0), (0, 9)))
+        self.assertFalse(self.free_space.connected((0, 0), (2, 1)))
+        self.assertFalse(self.free_space.connected((0, 0), (-1, 0)))
+
+    def test_nearest_free(self):
+        self.assertEqual(self.free_space.nearest_free((0, 0)), (0, 0))
+        self.assertIn(self.free_space.nearest_free((2, 1)), [(1, 1), (2, 0)])
+        self.assertEqual(self.free_space.nearest_free((5, 5)), (5, 4))
+        left = self.free_space.component((0, 0))
+        self.assertEqual(self.free_space.nearest_free((4, 7), component=left), (4, 4))
+        self.assertEqual(self.free_space.nearest_free((-3, 2)), (0, 2))
+        self.assertIsNone(FreeSpace(np.ones((3, 3))).nearest_free((1, 1)))
+
+    def test_nearest_free_is_closest(self):
+        rng = np.random.RandomState(2)
+        blocked = rng.rand(40, 40) < 0.7
+        free_space = FreeSpace(blocked)
+        free = np.argwhere(~blocked)
+        for cell in rng.randint(0, 40, (50, 2)):
+            x, y = free_space.nearest_free(cell)
+            self.assertFalse(blocked[x, y])
+            self.assertAlmostEqual((x - cell[0]) ** 2 + (y - cell[1]) ** 2, ((free - cell) ** 2).sum(axis=1).min())
+
+
+class TestIncrementalUpdates(TestCase):
+
+    def assertSamePartition(self, labels, blocked):
+        expect = flood_labels(blocked)
+        np.testing.assert_array_equal(labels > 0, expect > 0)
+        free = expect > 0
+        pairs = set(zip(labels[free].tolist(), expect[free].tolist()))
+        self.assertEqual(len(pairs), expect.max())
+        self.assertEqual(len({a for a, _ in pairs}), expect.max())
+
+    def test_random_edits(self):
+        rng = np.random.RandomState(3)
+        for _ in range(20):
+            free_space = FreeSpace(rng.rand(25, 25) < 0.4)
+            free_space.labels
+            for _ in range(8):
+                corner = rng.randint(0, 25, 2)
+                cells = np.argwhere(np.ones(rng.randint(1, 6, 2))) + corner
+                if rng.rand() < 0.5:
+                    free_space.block(cells)
+                else:
+                    free_space.unblock(cells)
+                self.assertSamePartition(free_space.labels, free_space.blocked)
+                self.assertEqual(sorted(free_space.free.tolist()), np.flatnonzero(~free_space.blocked).tolist())
+
+    def test_wall_splits_and_door_joins(self):
+        free_space = FreeSpace(np.zeros((30, 30)))
+        self.assertTrue(free_space.connected((0, 0), (0, 29)))
+        wall = [(x, 15) for x in range(30)]
+        self.assertEqual(free_space.block(wall), 30)
+        self.assertEqual(free_space.block(wall), 0)
+        self.assertFalse(free_space.connected((0, 0), (0, 29)))
+        self.assertEqual(free_space.num_components, 2)
+        self.assertEqual(len(free_space), 870)
+        self.assertEqual(free_space.unblock([(29, 15)]), 1)
+        self.assertTrue(free_space.connected((0, 0), (0, 29)))
+        self.assertEqual(free_space.component_size(free_space.component((0, 0))), 871)
+
+    def test_edits_before_labeling(self):
+        free_space = FreeSpace(np.zeros((10, 10)))
+        free_space.block([(x, 4) for x in range(10)])
+        free_space.unblock([(9, 4)])
+        free_space.block([(9, 4), (20, 20)])
+        self.assertFalse(free_space.connected((0, 0), (0, 9)))
+
+    def test_a_star_fails_without_searching(self):
+        grid = np.zeros((40, 40), dtype=np.uint8)
+        grid[:, 20] = 1
+        stats = PlannerStats()
+        path, cost = a_star(grid, heuristic, (0, 0), (39, 39), stats=stats, free_space=FreeSpace(grid))
+        self.assertEqual((path, cost), ([], 0))
+        self.assertEqual(stats.nodes_expanded, 0)
+        self.assertFalse(stats.path_found)
+        grid[5, 20] = 0
+        path, _ = a_star(grid, heuristic, (0, 0), (39, 39), free_space=FreeSpace(grid))
+        self.assertEqual(path[-1], (39, 39))
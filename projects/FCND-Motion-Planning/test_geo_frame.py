@@ -0,0 +1,44 @@
+from unittest import TestCase
+
+import numpy as np
+import utm
+
+from geo_frame import GeoFrame
+
+
+class TestGeoFrame(TestCase):
+
+    def setUp(self):
+        self.home = (-122.397450, 37.792480, 0.0)
+        self.frame = GeoFrame(self.home, north_offset=-316, east_offset=-445)
+        self.local = np.random.RandomState(0).uniform(-400, 400, (20, 3))
+
+    def test_to_local_matches_utm(self):
+        position = (-122.39995, 37.79696712543327, 5.0)
+        east_home, north_home, _, _ = utm.from_latlon(self.home[1], self.home[0])
+        east, north, _, _ = utm.from_latlon(position[1], position[0])
+        self.assertTrue(np.allclose(self.frame.to_local(position), [north - north_home, east - east_home, -5.0]))
+
+    def test_round_trip(self):
+        geodetic = self.frame.to_global_batch(self.local)
+        self.assertTrue(np.allclose(self.frame.to_local_batch(geodetic), self.local, atol=1e-6))
+        for local, position in zip(self.local, geodetic):
+            self.assertTrue(np.allclose(self.frame.to_global(local), position))
+            self.assertTrue(np.allclose(self.frame.to_local(position), local, atol=1e-6))
+
+    def test_grid_cells(self):
+        cells = np.array([[316, 445], [0, 0], [500, 120]])
+        geodetic = self.frame.grid_to_global_batch(cells + 0.5, altitude=5.0)
+        self.assertTrue((self.frame.global_to_grid_batch(geodetic) == cells).all())
+        for cell, position in zip(cells, geodetic):
+            self.assertEqual(self.frame.global_to_grid(position), tuple(cell))
+        self.assertEqual(self.frame.global_to_grid(self.home), (316, 445))
+
+    def test_batch_matches_scalar_above_sea_level(self):
+        frame = GeoFrame((-122.397450, 37.792480, 12.5))
+        geodetic = frame.to_global_batch(self.local)
+        expect = np.array([frame.to_global(local) for local in self.local])
+        self.assertTrue(np.allclose(geodetic, expect, rtol=0, atol=1e-9))
+        self.assertTrue(np.allclose(geodetic[:, 2], 12.5 - self.local[:, 2]))
+        back = frame.to_local_batch(geodetic)
+        self.assertTrue(np.allclose(back, [frame.to_local(position) for position in geodetic], rtol=0, atol=1e-6))
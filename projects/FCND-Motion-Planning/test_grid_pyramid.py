@@ -0,0 +1,108 @@
+import contextlib
+import io
+from unittest import TestCase, mock
+
+import numpy as np
+
+from free_space import FreeSpace
+from grid_pyramid import GridPyramid, dilate, max_pool
+from planner_stats import PlannerStats
+from planning_utils import a_star, heuristic
+
+
+def quiet(fn, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+
+def valid(grid, path):
+    steps = np.abs(np.diff(np.array(path), axis=0))
+    return all(grid[cell] == 0 for cell in path) and steps.max() <= 1
+
+
+class TestGridPyramid(TestCase):
+
+    def test_max_pool(self):
+        grid = np.zeros((5, 7), dtype=np.uint8)
+        grid[0, 0] = 1
+        grid[4, 6] = 1
+        pooled = max_pool(grid)
+        self.assertEqual(pooled.shape, (3, 4))
+        self.assertEqual(np.argwhere(pooled).tolist(), [[0, 0], [2, 3]])
+        rng = np.random.RandomState(0)
+        grid = (rng.rand(16, 16) < 0.1).astype(np.uint8)
+        pooled = max_pool(grid, 4)
+        for x in range(4):
+            for y in range(4):
+                self.assertEqual(pooled[x, y], grid[4 * x:4 * x + 4, 4 * y:4 * y + 4].max())
+
+    def test_dilate(self):
+        mask = np.zeros((7, 7), dtype=bool)
+        mask[3, 3] = True
+        self.assertEqual(dilate(mask, 2).sum(), 25)
+        self.assertEqual(dilate(mask, 0).sum(), 1)
+
+    def test_plan_matches_flat_search_in_open_space(self):
+        grid = np.zeros((64, 64), dtype=np.uint8)
+        grid[8:56, 30:34] = 1
+        pyramid = GridPyramid(grid, num_levels=3)
+        stats = PlannerStats()
+        path, cost = quiet(pyramid.plan, (32, 2), (32, 61), stats=stats)
+        flat_stats = PlannerStats()
+        _, flat_cost = quiet(a_star, grid, heuristic, (32, 2), (32, 61), stats=flat_stats)
+        self.assertEqual((path[0], path[-1]), ((32, 2), (32, 61)))
+        self.assertTrue(valid(grid, path))
+        self.assertAlmostEqual(cost, flat_cost)
+        self.assertLess(stats.nodes_expanded, flat_stats.nodes_expanded)
+
+    def test_narrow_gap_falls_back(self):
+        # the only way through is a one cell gap that every coarse level closes
+        grid = np.zeros((32, 32), dtype=np.uint8)
+        grid[:, 16] = 1
+        grid[5, 16] = 0
+        pyramid = GridPyramid(grid, num_levels=3)
+        self.assertTrue(pyramid.levels[1][:, 8].all())
+        path, _ = quiet(pyramid.plan, (20, 2), (20, 30))
+        self.assertIn((5, 16), path)
+        self.assertTrue(valid(grid, path))
+
+    def test_no_path(self):
+        grid = np.zeros((16, 16), dtype=np.uint8)
+        grid[:, 8] = 1
+        self.assertEqual(quiet(GridPyramid(grid).plan, (0, 0), (0, 15)), ([], 0))
+
+    def test_prints_one_outcome_and_counts_per_level(self):
+        grid = np.zeros((64, 64), dtype=np.uint8)
+        grid[8:56, 30:34] = 1
+        pyramid = GridPyramid(grid, num_levels=3)
+        stats = PlannerStats()
+        levels = {}
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            path, _ = pyramid.plan((32, 2), (32, 61), stats=stats, level_stats=levels)
+        self.assertEqual(output.getvalue(), 'Found a path.\n')
+        self.assertEqual(sorted(levels), [0, 1, 2])
+        self.assertTrue(all(level.nodes_expanded > 0 for level in levels.values()))
+        # `stats` holds the totals over the levels
+        self.assertEqual(stats.nodes_expanded, sum(level.nodes_expanded for level in levels.values()))
+        self.assertEqual(stats.nodes_pushed, sum(level.nodes_pushed for level in levels.values()))
+        self.assertEqual(stats.peak_queue_size, max(level.peak_queue_size for level in levels.values()))
+        self.assertTrue(stats.path_found)
+
+    def test_fallback_uses_free_space(self):
+        # every coarse level closes the gap, only the full grid search finds it
+        grid = np.zeros((32, 32), dtype=np.uint8)
+        grid[:, 16] = 1
+        grid[5, 16] = 0
+        pyramid = GridPyramid(grid, num_levels=3)
+        free_space = FreeSpace(grid)
+        levels = {}
+        with mock.patch('grid_pyramid.a_star', wraps=a_star) as search:
+            path, _ = quiet(pyramid.plan, (20, 2), (20, 30), free_space=free_space, level_stats=levels)
+        self.assertIn((5, 16), path)
+        self.assertEqual(sorted(levels), [0, 1, 2])
+        self.assertFalse(levels[1].path_found or levels[2].path_found)
+        self.assertTrue(levels[0].path_found)
+        fallback = search.call_args_list[-1]
+        self.assertIs(fallback.args[0], pyramid.levels[0])
+        self.assertIs(fallback.kwargs['free_space'], free_space)
@@ -0,0 +1,114 @@
+import threading
+import time
+from unittest import TestCase
+
+import numpy as np
+
+from mavlink_simulator import MavlinkSimulator, PointMassFleet, IDLE, MASK_IS_TAKEOFF, mavlink, mavutil, _Client
+
+
+class TestPointMassFleet(TestCase):
+
+    def test_flies_to_targets_within_limits(self):
+        fleet = PointMassFleet(3, max_speed=4.0)
+        fleet.armed[:2] = True
+        fleet.takeoff(0, 5.0)
+        fleet.goto(1, 20.0, -10.0, -3.0)
+        fleet.goto(2, 20.0, -10.0, -3.0)
+        speeds = []
+        for _ in range(2000):
+            fleet.step()
+            speeds.append(np.linalg.norm(fleet.velocity, axis=1).max())
+        self.assertTrue(np.allclose(fleet.position[0], [0.0, 0.0, -5.0], atol=0.01))
+        self.assertTrue(np.allclose(fleet.position[1], [20.0, -10.0, -3.0], atol=0.01))
+        # disarmed vehicles do not move
+        self.assertTrue((fleet.position[2] == 0.0).all())
+        self.assertLessEqual(max(speeds), 4.0 + 1e-9)
+
+    def test_land_and_ground(self):
+        fleet = PointMassFleet(1)
+        fleet.armed[0] = True
+        fleet.goto(0, 5.0, 5.0, 3.0)
+        fleet.run(5.0)
+        self.assertEqual(fleet.position[0, 2], 0.0)
+        fleet.takeoff(0, 2.0)
+        fleet.run(5.0)
+        fleet.land(0)
+        fleet.run(10.0)
+        self.assertEqual(fleet.mode[0], IDLE)
+        self.assertEqual(fleet.altitude[0], 0.0)
+        self.assertTrue((fleet.velocity == 0.0).all())
+
+
+class TestHeartbeat(TestCase):
+
+    def test_late_client_gets_one_heartbeat_per_second(self):
+        sim = MavlinkSimulator(vehicles=1, port=0)
+        self.addCleanup(sim.close)
+
+        def run(seconds):
+            for _ in range(int(round(seconds / sim.fleet.dt))):
+                sim.fleet.step()
+                sim._send_telemetry()
+
+        run(10.0)
+        client = _Client(None, 0)
+        sim.clients.append(client)
+        run(3.0)
+        messages = mavlink.MAVLink(None).parse_buffer(bytes(client.outgoing))
+        heartbeats = [m for m in messages if m.get_type() == 'HEARTBEAT']
+        self.assertIn(len(heartbeats), (3, 4))
+
+
+class TestMavlinkSimulator(TestCase):
+
+    def setUp(self):
+        self.sim = MavlinkSimulator(vehicles=2, port=0, speed=20.0)
+        self.thread = threading.Thread(target=self.sim.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.sim.stop()
+        self.thread.join()
+        self.sim.close()
+
+    def connect(self, i):
+        master = mavutil.mavlink_connection('tcp:127.0.0.1:{0}'.format(self.sim.ports[i]))
+        self.addCleanup(master.close)
+        self.assertIsNotNone(master.recv_match(type='HEARTBEAT', blocking=True, timeout=5))
+        return master
+
+    def wait_for(self, master, condition, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            msg = master.recv_match(type=['HEARTBEAT', 'LOCAL_POSITION_NED'], blocking=True, timeout=1)
+            if msg is not None and condition(msg):
+                return msg
+        self.fail('condition not met within {0} s'.format(timeout))
+
+    def test_arm_takeoff_and_fly(self):
+        master = self.connect(0)
+        other = self.connect(1)
+
+        master.mav.command_long_send(1, 1, mavlink.MAV_CMD_COMPONENT_ARM_DISARM, 0, 1, 0, 0, 0, 0, 0, 0)
+        master.mav.command_long_send(1, 1, mavlink.MAV_CMD_DO_SET_MODE, 0,
+                                     mavlink.MAV_MODE_FLAG_CUSTOM_MODE_ENABLED, 6, 0, 0, 0, 0, 0)
+        self.wait_for(master, lambda m: m.get_type() == 'HEARTBEAT' and
+                      m.base_mode & mavlink.MAV_MODE_FLAG_SAFETY_ARMED and
+                      m.base_mode & mavlink.MAV_MODE_FLAG_CUSTOM_MODE_ENABLED)
+
+        master.mav.set_position_target_local_ned_send(0, 1, 1, mavlink.MAV_FRAME_LOCAL_NED, MASK_IS_TAKEOFF,
+                                                      0, 0, -3.0, 0, 0, 0, 0, 0, 0, 0, 0)
+        self.wait_for(master, lambda m: m.get_type() == 'LOCAL_POSITION_NED' and m.z < -2.9)
+
+        master.mav.set_position_target_local_ned_send(0, 1, 1, mavlink.MAV_FRAME_LOCAL_NED, 0,
+                                                      10.0, 5.0, -3.0, 0, 0, 0, 0, 0, 0, 0, 0)
+        self.wait_for(master, lambda m: m.get_type() == 'LOCAL_POSITION_NED' and
+                      abs(m.x - 10.0) < 0.2 and abs(m.y - 5.0) < 0.2)
+        position = master.recv_match(type='GLOBAL_POSITION_INT', blocking=True, timeout=5)
+        self.assertGreater(position.relative_alt, 2500)
+
+        # the second vehicle stayed on the ground
+        msg = other.recv_match(type='LOCAL_POSITION_NED', blocking=True, timeout=5)
+        self.assertEqual((msg.x, msg.y, msg.z), (0.0, 0.0, 0.0))
+        self.assertFalse(self.sim.fleet.armed[1])
@@ -0,0 +1,104 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+from unittest import TestCase, mock, skipIf
+
+import msgpack
+import numpy as np
+
+try:
+    import udacidrone
+except ImportError:
+    udacidrone = None
+
+COLLIDERS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'colliders.csv')
+
+
+class FakeMaster:
+    """Records what `send_waypoints` writes."""
+
+    def __init__(self):
+        self.writes = []
+
+    def write(self, data):
+        self.writes.append(data)
+
+
+@skipIf(udacidrone is None, 'udacidrone is not installed')
+class TestPlanPath(TestCase):
+
+    def setUp(self):
+        # plan_path reads colliders.csv and the drone writes Logs/ in the working directory
+        self.cwd = os.getcwd()
+        self.directory = tempfile.mkdtemp()
+        shutil.copy(COLLIDERS, self.directory)
+        os.makedirs(os.path.join(self.directory, 'Logs'))
+        os.chdir(self.directory)
+
+        import motion_planning
+        self.module = motion_planning
+        with open('colliders.csv') as f:
+            lat0, lon0 = [float(field.split()[1]) for field in f.readline().split(',')]
+        # the drone sits at the map home
+        self.home = np.array([lon0, lat0, 0.0])
+        position = mock.patch.object(motion_planning.MotionPlanning, 'global_position',
+                                     new_callable=mock.PropertyMock, return_value=self.home)
+        position.start()
+        self.addCleanup(position.stop)
+
+        self.connection = mock.Mock()
+        self.connection._master = FakeMaster()
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.directory)
+
+    def plan(self, drone):
+        with contextlib.redirect_stdout(io.StringIO()), \
+                mock.patch.object(self.module, 'a_star', wraps=self.module.a_star) as search, \
+                mock.patch.object(drone, 'disarming_transition') as disarm:
+            drone.plan_path()
+        return search.call_count, disarm.call_count
+
+    def test_plan_twice_and_unreachable_goal(self):
+        drone = self.module.MotionPlanning(self.connection)
+
+        searches, disarms = self.plan(drone)
+        self.assertEqual((searches, disarms), (1, 0))
+        self.assertEqual(drone.planner_stats.cache, 'miss')
+        self.assertTrue(drone.planner_stats.path_found)
+        self.assertGreater(len(drone.waypoints), 1)
+        self.assertEqual(msgpack.loads(self.connection._master.writes[-1]), drone.waypoints)
+
+        first = drone.waypoints
+        searches, disarms = self.plan(drone)
+        self.assertEqual((searches, disarms), (0, 0))
+        self.assertEqual(drone.planner_stats.cache, 'hit')
+        self.assertNotIn('search', drone.planner_stats.phase_times)
+        self.assertEqual(drone.waypoints, first)
+        self.assertEqual(len(self.connection._master.writes), 2)
+
+        # a goal in another component of free space than the start
+        grid, _, _, free_space, _ = next(iter(drone.grids.values()))
+        start = drone.geo_frame.global_to_grid(self.home)
+        labels = np.unique(free_space.labels[grid == 0]).tolist()
+        other = next(label for label in labels if label != free_space.component(start))
+        cell = free_space.sample(np.random.RandomState(0), component=other)
+        drone.goal = tuple(drone.geo_frame.grid_to_global((cell[0] + 0.5, cell[1] + 0.5)))
+        searches, disarms = self.plan(drone)
+        self.assertEqual((searches, disarms), (0, 1))
+        self.assertFalse(drone.planner_stats.path_found)
+        self.assertEqual(len(self.connection._master.writes), 2)
+
+    def test_drones_share_grids_and_routes(self):
+        first = self.module.MotionPlanning(self.connection)
+        self.assertEqual(self.plan(first), (1, 0))
+
+        second = self.module.MotionPlanning(self.connection, route_cache=first.route_cache, grids=first.grids)
+        with mock.patch.object(self.module, 'create_grid') as create_grid:
+            self.assertEqual(self.plan(second), (0, 0))
+        create_grid.assert_not_called()
+        self.assertEqual(second.planner_stats.cache, 'hit')
+        self.assertEqual(second.waypoints, first.waypoints)
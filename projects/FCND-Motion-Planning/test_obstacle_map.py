@@ -0,0 +1,115 @@
+from unittest import TestCase
+
+import numpy as np
+
+from free_space import FreeSpace, label_components
+from obstacle_map import ObstacleMap
+from planning_utils import create_grid
+
+
+class TestObstacleMap(TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        centers = rng.uniform(0, 100, (30, 2))
+        sizes = rng.uniform(1, 5, (30, 2))
+        heights = rng.uniform(1, 20, 30)
+        self.data = np.column_stack((centers, heights / 2, sizes, heights / 2))
+        self.obstacles = ObstacleMap(self.data, 5, 3)
+
+    def rasterize(self):
+        """Reference grid of the current obstacles on the map's extent."""
+        grid = np.zeros(self.obstacles.shape, dtype=np.uint8)
+        north_min, east_min, _, _ = self.obstacles.extent
+        for north, east, alt, d_north, d_east, d_alt in self.obstacles.obstacles.values():
+            if alt + d_alt + 3 > 5:
+                # slicing clips the box to the grid, a box outside it selects nothing
+                north_from = int(north - d_north - 3 - north_min)
+                north_to = int(north + d_north + 3 - north_min)
+                east_from = int(east - d_east - 3 - east_min)
+                east_to = int(east + d_east + 3 - east_min)
+                if north_to >= 0 and east_to >= 0:
+                    grid[max(north_from, 0):north_to + 1, max(east_from, 0):east_to + 1] = 1
+        return grid
+
+    def test_matches_create_grid(self):
+        grid, north_offset, east_offset = create_grid(self.data, 5, 3)
+        np.testing.assert_array_equal(self.obstacles.grid, grid)
+        self.assertEqual((self.obstacles.north_offset, self.obstacles.east_offset), (north_offset, east_offset))
+
+    def test_overlap_survives_removal(self):
+        a, _ = self.obstacles.add([50, 50, 10, 4, 4, 10])
+        b, _ = self.obstacles.add([54, 50, 10, 4, 4, 10])
+        changes = self.obstacles.remove(a)
+        cell = (54 - self.obstacles.north_offset, 50 - self.obstacles.east_offset)
+        self.assertEqual(self.obstacles.grid[cell], 1)
+        self.assertNotIn(list(cell), changes.freed.tolist())
+        self.obstacles.remove(b)
+        np.testing.assert_array_equal(self.obstacles.grid, self.rasterize())
+        self.assertRaises(KeyError, self.obstacles.remove, b)
+
+    def test_change_sets(self):
+        received = []
+        self.obstacles.subscribe(received.append)
+        version = self.obstacles.version
+        before = self.obstacles.grid.copy()
+        low, changes = self.obstacles.add([20, 20, 0.5, 2, 2, 0.5])
+        self.assertEqual(received, [])
+        self.assertEqual((len(changes.blocked), len(changes.freed)), (0, 0))
+        tower, changes = self.obstacles.add([80, 20, 10, 2, 2, 10])
+        self.assertEqual(received, [changes])
+        self.obstacles.update(tower, [80, 24, 10, 2, 2, 10])
+        self.obstacles.remove(low)
+        self.assertEqual(self.obstacles.version, version + 4)
+        self.assertEqual([c.version for c in received], [version + 2, version + 3])
+
+        # replaying the change sets on the old grid gives the new one
+        for changes in received:
+            self.assertEqual(len(changes.blocked) + len(changes.freed),
+                             len(np.unique(np.vstack((changes.blocked, changes.freed)), axis=0)))
+            before[tuple(changes.blocked.T)] = 1
+            before[tuple(changes.freed.T)] = 0
+        np.testing.assert_array_equal(before, self.obstacles.grid)
+
+    def test_outside_the_extent(self):
+        north_min, east_min, north_size, east_size = self.obstacles.extent
+        before = self.obstacles.grid.copy()
+        outside = [
+            [north_min - 50, east_min + 60, 10, 2, 2, 10],
+            [north_min + 60, east_min + east_size + 400, 10, 2, 2, 10],
+            [north_min + north_size + 10, east_min - 10, 10, 2, 2, 10],
+        ]
+        for obstacle in outside:
+            obstacle_id, changes = self.obstacles.add(obstacle)
+            self.assertIsNone(self.obstacles.footprint(obstacle))
+            self.assertEqual((len(changes.blocked), len(changes.freed)), (0, 0))
+            self.obstacles.remove(obstacle_id)
+        np.testing.assert_array_equal(self.obstacles.grid, before)
+
+        # an obstacle straddling the edge is still clipped to it
+        _, changes = self.obstacles.add([north_min - 3, east_min + 60, 10, 2, 2, 10])
+        self.assertTrue(len(changes.blocked))
+        self.assertEqual(changes.blocked[:, 0].min(), 0)
+        np.testing.assert_array_equal(self.obstacles.grid, self.rasterize())
+
+    def test_random_edits(self):
+        rng = np.random.RandomState(1)
+        free_space = FreeSpace(self.obstacles.grid)
+        free_space.labels
+        self.obstacles.subscribe(free_space.apply)
+        for _ in range(60):
+            ids = list(self.obstacles.obstacles)
+            action = rng.randint(3)
+            obstacle = np.concatenate((rng.uniform(-20, 120, 2), [8], rng.uniform(1, 6, 2), [8]))
+            if action == 0:
+                self.obstacles.add(obstacle)
+            elif action == 1:
+                self.obstacles.update(ids[rng.randint(len(ids))], obstacle)
+            else:
+                self.obstacles.remove(ids[rng.randint(len(ids))])
+            np.testing.assert_array_equal(self.obstacles.grid, self.rasterize())
+        np.testing.assert_array_equal(free_space.blocked, self.obstacles.grid != 0)
+        labels = free_space.labels
+        expect = label_components(self.obstacles.grid != 0)
+        free = expect > 0
+        self.assertEqual(len(set(zip(labels[free].tolist(), expect[free].tolist()))), expect.max())
@@ -0,0 +1,29 @@
+from unittest import TestCase
+
+import numpy as np
+
+from occupancy_grid import OccupancyGrid
+
+
+class TestOccupancyGrid(TestCase):
+
+    def setUp(self):
+        self.grid = (np.random.RandomState(1).rand(13, 21) < 0.3).astype(np.float64)
+
+    def test_scalar_lookup(self):
+        for packed in (False, True):
+            occupancy = OccupancyGrid(self.grid, packed=packed)
+            for x in range(self.grid.shape[0]):
+                for y in range(self.grid.shape[1]):
+                    self.assertEqual(occupancy[x, y], self.grid[x, y])
+
+    def test_batch_lookup_and_to_array(self):
+        xs, ys = np.nonzero(np.ones(self.grid.shape))
+        for packed in (False, True):
+            occupancy = OccupancyGrid(self.grid, packed=packed)
+            self.assertTrue((occupancy.lookup(xs, ys) == self.grid[xs, ys]).all())
+            self.assertTrue((occupancy.to_array() == self.grid).all())
+
+    def test_packed_is_smaller(self):
+        self.assertEqual(OccupancyGrid(self.grid, packed=True).nbytes, 13 * 3)
+        self.assertEqual(OccupancyGrid(self.grid).nbytes, 13 * 21)
@@ -0,0 +1,53 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from planner_stats import PlannerStats, JsonLinesSink
+from planning_utils import a_star, heuristic
+
+
+class TestPlannerStats(TestCase):
+
+    def test_a_star_counters(self):
+        stats = PlannerStats()
+        path, _ = a_star(np.zeros((10, 10)), heuristic, (0, 0), (9, 9), stats=stats)
+        self.assertEqual(len(path), 10)
+        self.assertTrue(stats.path_found)
+        self.assertGreaterEqual(stats.nodes_expanded, 10)
+        self.assertGreaterEqual(stats.nodes_pushed, stats.nodes_expanded)
+        self.assertGreater(stats.peak_queue_size, 0)
+        self.assertGreater(stats.heuristic_calls, 0)
+        self.assertIn('search', stats.phase_times)
+
+    def test_profiler_and_sink(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        log = os.path.join(directory, 'stats.jsonl')
+
+        class Profiler:
+            calls = []
+
+            def start(self):
+                self.calls.append('start')
+
+            def stop(self):
+                self.calls.append('stop')
+
+        stats = PlannerStats(profiler=Profiler(), sink=JsonLinesSink(log))
+        with stats.phase('create_grid'):
+            pass
+        a_star(np.ones((3, 3)), heuristic, (0, 0), (2, 2), stats=stats)
+        stats.emit(goal=(np.int64(2), 2))
+        stats.emit()
+
+        self.assertEqual(Profiler.calls, ['start', 'stop'] * 2)
+        with open(log) as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0]['goal'], [2, 2])
+        self.assertFalse(records[0]['path_found'])
+        self.assertEqual(set(records[0]['phase_times']), {'create_grid', 'search'})
@@ -0,0 +1,83 @@
+import contextlib
+import io
+from unittest import TestCase
+
+import numpy as np
+
+from planning_benchmark import compare, run, sample_pairs, summarize
+
+
+class TestSummary(TestCase):
+
+    def test_summarize(self):
+        summary = summarize([0.3, 0.1, 0.2], pairs=4)
+        self.assertEqual(summary, {'min': 0.1, 'median': 0.2, 'max': 0.3, 'repeat': 3, 'pairs': 4})
+
+    def test_compare_flags_slower_stages_only(self):
+        baseline = {
+            'a_star': {'median': 1.0},
+            'prune_path': {'median': 1.0},
+            'create_grid': {'median': 1.0},
+            'zero': {'median': 0.0},
+        }
+        results = {
+            'a_star': {'median': 1.3},
+            'prune_path': {'median': 1.1},
+            'create_grid': {'median': 0.5},
+            'zero': {'median': 0.2},
+            'new_stage': {'median': 9.0},
+        }
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            regressions = compare(results, baseline, tolerance=0.2)
+        self.assertEqual(regressions, ['a_star'])
+        self.assertIn('REGRESSION', output.getvalue())
+        self.assertIn('new_stage', output.getvalue())
+
+    def test_compare_against_itself(self):
+        results = {'a_star': {'median': 0.5}}
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(compare(results, results, tolerance=0.0), [])
+
+
+class TestSamplePairs(TestCase):
+
+    def test_pairs_are_free_near_and_reproducible(self):
+        grid = np.zeros((30, 30), dtype=np.uint8)
+        grid[10:20, 5:25] = 1
+        pairs = sample_pairs(grid, 20, 4, np.random.RandomState(0))
+        self.assertEqual(pairs, sample_pairs(grid, 20, 4, np.random.RandomState(0)))
+        self.assertEqual(len(pairs), 20)
+        for start, goal in pairs:
+            self.assertNotEqual(start, goal)
+            self.assertEqual(grid[start], 0)
+            self.assertEqual(grid[goal], 0)
+            self.assertLessEqual(max(abs(start[0] - goal[0]), abs(start[1] - goal[1])), 4)
+
+    def test_raises_instead_of_looping(self):
+        rng = np.random.RandomState(0)
+        grid = np.ones((5, 5), dtype=np.uint8)
+        grid[2, 2] = 0
+        self.assertRaises(ValueError, sample_pairs, grid, 1, 10, rng)
+        # two free cells further apart than max_distance
+        grid[0, 0] = 0
+        self.assertRaises(ValueError, sample_pairs, grid, 1, 1, rng, max_attempts=50)
+
+
+class TestRun(TestCase):
+
+    def test_stages(self):
+        data = np.array([
+            [10.0, 10.0, 10.0, 3.0, 3.0, 10.0],
+            [30.0, 20.0, 2.0, 4.0, 2.0, 2.0],
+            [0.0, 40.0, 10.0, 2.0, 2.0, 10.0],
+        ])
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            results = run(data, [5], [1], num_pairs=2, max_distance=10, repeat=2, seed=0, num_samples=20)
+        self.assertEqual(output.getvalue(), '')
+        self.assertEqual(set(results), {
+            'create_grid[alt=5,safety=1]', 'a_star[alt=5,safety=1]', 'prune_path[alt=5,safety=1]',
+            'create_voxmap[voxel_size=5]', 'extract_polygons', 'collides[samples=20]'})
+        self.assertTrue(all(r['repeat'] == 2 for r in results.values()))
+        self.assertGreater(results['a_star[alt=5,safety=1]']['nodes_expanded'], 0)
@@ -0,0 +1,69 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase, skipIf
+
+try:
+    import udacidrone
+except ImportError:
+    udacidrone = None
+
+LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Logs', 'TLog.txt')
+
+
+@skipIf(udacidrone is None, 'udacidrone is not installed')
+class TestReplayConnection(TestCase):
+
+    def setUp(self):
+        # the drone writes Logs/TLog.txt and Logs/NavLog.txt in the working directory
+        self.cwd = os.getcwd()
+        self.directory = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.directory, 'Logs'))
+        self.log = os.path.join(self.directory, 'recorded.txt')
+        shutil.copy(LOG, self.log)
+        os.chdir(self.directory)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.directory)
+
+    def fly(self, messages, speed=None):
+        from backyard_flyer_solution import BackyardFlyer
+        from replay_connection import ReplayConnection
+
+        connection = ReplayConnection(messages, speed=speed)
+        with contextlib.redirect_stdout(io.StringIO()):
+            drone = BackyardFlyer(connection)
+            drone.start()
+        return drone, connection
+
+    def test_backyard_flyer_commands(self):
+        from replay_connection import replay_messages
+
+        messages = replay_messages(self.log)
+        self.assertEqual(len(messages), 360)
+        self.assertEqual([m[0] for m in messages], sorted(m[0] for m in messages))
+
+        drone, connection = self.fly(messages)
+        self.assertEqual(connection.messages_sent, 360)
+        self.assertEqual(connection.command_names()[:5],
+                         ['take_control', 'arm', 'set_home_position', 'takeoff', 'cmd_position'])
+        self.assertEqual(connection.commands[3].args[2], 3.0)
+        self.assertEqual(connection.commands[4].args, (10.0, 0.0, 3.0, 0.0))
+        self.assertEqual(drone.local_position[0], messages[-1][2].north)
+
+        # replays are deterministic
+        _, again = self.fly(messages)
+        self.assertEqual(again.commands, connection.commands)
+
+    def test_real_time_multiple(self):
+        from replay_connection import replay_messages
+
+        messages = replay_messages(self.log)
+        duration = messages[-1][0] - messages[0][0]
+        t0 = time.monotonic()
+        self.fly(messages, speed=100.0)
+        self.assertGreaterEqual(time.monotonic() - t0, duration / 100.0)
@@ -0,0 +1,90 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from planner_stats import PlannerStats
+from route_cache import RouteCache, map_hash, segment_free
+
+
+class TestRouteCache(TestCase):
+
+    def setUp(self):
+        self.grid = np.zeros((50, 50), dtype=np.uint8)
+        self.grid[10:40, 20:30] = 1
+        self.version = map_hash(self.grid)
+        self.path = [(5, 5), (5, 35), (45, 35)]
+
+    def test_map_hash(self):
+        self.assertEqual(map_hash(self.grid.astype(np.float64)), self.version)
+        edited = self.grid.copy()
+        edited[0, 0] = 1
+        self.assertNotEqual(map_hash(edited), self.version)
+        self.assertNotEqual(map_hash(self.grid.reshape(25, 100)), self.version)
+
+    def test_hit_and_miss(self):
+        cache = RouteCache()
+        stats = PlannerStats()
+        self.assertIsNone(cache.get(self.version, (5, 5), (45, 35), ('a_star',), stats=stats))
+        self.assertEqual(stats.cache, 'miss')
+        cache.put(self.version, (5, 5), (45, 35), ('a_star',), self.path, plan_time=2.0)
+
+        stats = PlannerStats()
+        self.assertEqual(cache.get(self.version, (5, 5), (45, 35), ('a_star',), stats=stats), self.path)
+        self.assertEqual(stats.cache, 'hit')
+        self.assertGreater(stats.cache_saved_time, 1.9)
+        self.assertEqual(stats.as_dict()['cache'], 'hit')
+        # other parameters or another map version are different routes
+        self.assertIsNone(cache.get(self.version, (5, 5), (45, 35), ('a_star', 'coarse')))
+        self.assertIsNone(cache.get('other', (5, 5), (45, 35), ('a_star',)))
+        self.assertEqual(cache.info()['hits'], 1)
+        self.assertEqual(cache.info()['misses'], 3)
+        self.assertAlmostEqual(cache.hit_rate, 0.25)
+
+    def test_lru_eviction(self):
+        cache = RouteCache(capacity=2)
+        for goal in range(3):
+            cache.put(self.version, (0, 0), (goal, 49), (), [(0, 0), (goal, 49)])
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get(self.version, (0, 0), (0, 49)))
+        cache.get(self.version, (0, 0), (1, 49))
+        cache.put(self.version, (0, 0), (3, 49), (), [(0, 0), (3, 49)])
+        self.assertIsNotNone(cache.get(self.version, (0, 0), (1, 49)))
+        self.assertIsNone(cache.get(self.version, (0, 0), (2, 49)))
+
+    def test_subpath_for_nearby_start(self):
+        cache = RouteCache(reuse_radius=5)
+        cache.put(self.version, (5, 5), (45, 35), (), self.path, plan_time=1.0)
+        stats = PlannerStats()
+        path = cache.get(self.version, (7, 8), (45, 35), (), grid=self.grid, stats=stats)
+        self.assertEqual(path, [(7, 8), (5, 5), (5, 35), (45, 35)])
+        self.assertEqual(stats.cache, 'subpath')
+        # a start on the route joins it at that waypoint
+        self.assertEqual(cache.get(self.version, (5, 35), (45, 35), (), grid=self.grid), [(5, 35), (45, 35)])
+        # out of the reuse radius, or without the grid to check the way to the route
+        self.assertIsNone(cache.get(self.version, (15, 5), (45, 35), (), grid=self.grid))
+        self.assertIsNone(cache.get(self.version, (7, 8), (45, 35), ()))
+
+    def test_subpath_needs_line_of_sight(self):
+        cache = RouteCache(reuse_radius=15)
+        cache.put(self.version, (25, 32), (45, 45), (), [(25, 32), (45, 45)])
+        self.assertFalse(segment_free(self.grid, (25, 18), (25, 32)))
+        self.assertIsNone(cache.get(self.version, (25, 18), (45, 45), (), grid=self.grid))
+        self.assertTrue(segment_free(self.grid, (38, 33), (25, 32)))
+        self.assertEqual(cache.get(self.version, (38, 33), (45, 45), (), grid=self.grid),
+                         [(38, 33), (25, 32), (45, 45)])
+
+    def test_disk_store(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        RouteCache(directory=directory).put(self.version, (5, 5), (45, 35), ('a_star',), self.path, 0.5)
+        self.assertTrue(os.path.isdir(os.path.join(directory, self.version)))
+
+        cache = RouteCache(directory=directory)
+        self.assertEqual(cache.get(self.version, (5, 5), (45, 35), ('a_star',)), self.path)
+        self.assertEqual(len(cache), 1)
+        cache.invalidate(self.version)
+        self.assertEqual(len(cache), 0)
+        self.assertIsNone(RouteCache(directory=directory).get(self.version, (5, 5), (45, 35), ('a_star',)))
@@ -0,0 +1,44 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from planning_utils import a_star, heuristic
+from tiled_grid import TiledGrid
+
+
+class TestTiledGrid(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.grid = np.zeros((40, 50))
+        self.grid[5:30, 20:23] = 1
+        self.grid[35, 45] = 1
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        path = os.path.join(self.directory, 'grid.npy')
+        tiled = TiledGrid.from_array(self.grid, path, tile_size=16, cache_size=2)
+        self.assertEqual(tiled.shape, self.grid.shape)
+        self.assertTrue((tiled.to_array() == self.grid).all())
+        self.assertTrue((TiledGrid(path).to_array() == self.grid).all())
+
+    def test_fill_survives_eviction(self):
+        path = os.path.join(self.directory, 'grid.npy')
+        tiled = TiledGrid.create(path, self.grid.shape, tile_size=8, cache_size=1)
+        tiled.fill(5, 30, 20, 23)
+        tiled.fill(35, 36, 45, 46)
+        tiled.flush()
+        self.assertTrue((TiledGrid(path).to_array() == self.grid).all())
+
+    def test_a_star_pages_touched_tiles(self):
+        path = os.path.join(self.directory, 'grid.npy')
+        TiledGrid.from_array(self.grid, path, tile_size=8)
+        tiled = TiledGrid(path, cache_size=4)
+        expect = a_star(self.grid, heuristic, (0, 0), (3, 3))
+        self.assertEqual(a_star(tiled, heuristic, (0, 0), (3, 3)), expect)
+        self.assertLess(tiled.tiles_loaded, 5 * 7)
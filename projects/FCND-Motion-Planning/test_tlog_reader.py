@@ -0,0 +1,85 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from tlog_reader import TLog, parse_tlog
+
+LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Logs', 'TLog.txt')
+
+
+class TestTLog(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.log = os.path.join(self.directory, 'TLog.txt')
+        shutil.copy(LOG, self.log)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_columns_match_rows(self):
+        tlog = TLog(self.log)
+        self.assertEqual(len(tlog), 360)
+        self.assertEqual(set(tlog.message_types),
+                         {'STATE', 'GLOBAL_HOME', 'GLOBAL_POSITION', 'LOCAL_POSITION', 'LOCAL_VELOCITY'})
+
+        with open(self.log) as f:
+            rows = [line.strip().split(',') for line in f if line.startswith('MsgID.LOCAL_POSITION,')]
+        position = tlog['LOCAL_POSITION']
+        self.assertEqual(list(position), ['time', 'north', 'east', 'down'])
+        self.assertTrue(np.array_equal(position['time'], [float(r[1]) for r in rows]))
+        self.assertTrue(np.array_equal(position['down'], [float(r[4]) for r in rows]))
+
+        state = tlog['STATE']
+        self.assertEqual(state['armed'][0], 0.0)
+        self.assertTrue(set(np.unique(state['guided'])) <= {0.0, 1.0})
+
+    def test_no_cache_by_default(self):
+        TLog(self.log)
+        self.assertEqual(os.listdir(self.directory), ['TLog.txt'])
+
+    def test_cache_is_reused_until_the_log_changes(self):
+        first = TLog(self.log, cache=True)
+        self.assertTrue(os.path.exists(os.path.join(self.log + '.cache', 'index.json')))
+
+        cached = TLog(self.log, cache=True)
+        self.assertEqual(cached._arrays, {})
+        self.assertIsInstance(cached.columns('GLOBAL_POSITION'), np.memmap)
+        self.assertTrue(np.array_equal(cached.columns('GLOBAL_POSITION'), first.columns('GLOBAL_POSITION')))
+
+        with open(self.log, 'a') as f:
+            f.write('MsgID.LOCAL_POSITION,1529058564.0,1.0,2.0,-3.0\n')
+        changed = TLog(self.log, cache=True)
+        self.assertEqual(changed.count('LOCAL_POSITION'), 81)
+        self.assertEqual(changed.time_range(), (changed.time_range('STATE')[0], 1529058564.0))
+
+    def test_cache_dir(self):
+        cache_dir = os.path.join(self.directory, 'cache')
+        TLog(self.log, cache=True, cache_dir=cache_dir)
+        self.assertTrue(os.path.exists(os.path.join(cache_dir, 'index.json')))
+        self.assertFalse(os.path.exists(self.log + '.cache'))
+        cached = TLog(self.log, cache=True, cache_dir=cache_dir)
+        self.assertEqual(cached._arrays, {})
+        self.assertEqual(cached.count('LOCAL_POSITION'), 80)
+
+    def test_window(self):
+        tlog = TLog(self.log, cache=False)
+        time = tlog['LOCAL_VELOCITY']['time']
+        start, end = time[10], time[20]
+        window = tlog.window('LOCAL_VELOCITY', start, end)
+        self.assertTrue(np.array_equal(window['time'], time[(time >= start) & (time < end)]))
+        self.assertEqual(len(window['velocity_north']), len(window['time']))
+
+    def test_unknown_message_and_bad_rows(self):
+        with open(self.log, 'w') as f:
+            f.write('MsgID.CUSTOM,1.0,2.0\nMsgID.CUSTOM,2.0,3.5\n')
+        arrays = parse_tlog(self.log)
+        self.assertTrue(np.array_equal(arrays['CUSTOM'], [[1.0, 2.0], [2.0, 3.5]]))
+        self.assertEqual(list(TLog(self.log)['CUSTOM']), ['time', 'field0'])
+
+        with open(self.log, 'a') as f:
+            f.write('MsgID.CUSTOM,3.0\n')
+        self.assertRaises(ValueError, parse_tlog, self.log)
@@ -0,0 +1,67 @@
+from unittest import TestCase
+
+from mavlink_simulator import PointMassFleet
+from waypoint_dispatcher import WaypointDispatcher
+
+
+def fly(route, steps=6000):
+    """Flies a point mass along the route, returns the number of steps to the last waypoint."""
+    fleet = PointMassFleet(1)
+    fleet.armed[0] = True
+    fleet.position[0, 2] = -3.0
+    target = route.next()
+    fleet.goto(0, target[0], target[1], -target[2])
+    for step in range(steps):
+        fleet.step()
+        if route.reached(fleet.position[0]):
+            if not route:
+                return step
+            target = route.next()
+            fleet.goto(0, target[0], target[1], -target[2])
+    raise AssertionError('route not finished')
+
+
+class TestWaypointDispatcher(TestCase):
+
+    def setUp(self):
+        self.path = [[0, 0, 5, 0], [10, 0, 5, 0], [20, 5, 5, 0], [30, 5, 5, 0], [40, 0, 5, 0]]
+
+    def test_cursor(self):
+        route = WaypointDispatcher(self.path)
+        self.assertEqual(len(route), 5)
+        self.assertFalse(route.reached((0, 0)))
+        first = route.next()
+        self.assertTrue((first == self.path[0]).all())
+        self.assertTrue((route.peek() == self.path[1]).all())
+        self.assertEqual(route.remaining.shape, (4, 4))
+        for _ in range(4):
+            route.next()
+        self.assertFalse(route)
+        self.assertIsNone(route.peek())
+        self.assertRaises(IndexError, route.next)
+        self.assertEqual(route.dispatched, 5)
+
+    def test_lookahead_radius_except_last(self):
+        route = WaypointDispatcher(self.path[:2], acceptance_radius=1.0, lookahead_radius=3.0)
+        route.next()
+        self.assertTrue(route.reached((2.0, 1.0, -5.0)))
+        route.next()
+        self.assertFalse(route.reached((8.0, 1.0, -5.0)))
+        self.assertTrue(route.reached((9.5, 0.5, -5.0)))
+
+    def test_replace_keeps_current_target(self):
+        route = WaypointDispatcher(self.path)
+        route.next()
+        current = route.next()
+        route.replace([[10, 10, 5, 0], [0, 10, 5, 0]])
+        self.assertTrue((route.current == [10, 0, 5, 0]).all())
+        self.assertTrue((current == [10, 0, 5, 0]).all())
+        self.assertEqual(len(route), 2)
+        self.assertTrue((route.next() == [10, 10, 5, 0]).all())
+        route.replace([])
+        self.assertEqual(len(route), 0)
+
+    def test_lookahead_flies_through_waypoints(self):
+        stop_and_go = fly(WaypointDispatcher(self.path, acceptance_radius=1.0))
+        blended = fly(WaypointDispatcher(self.path, acceptance_radius=1.0, lookahead_radius=3.0))
+        self.assertLess(blended, 0.9 * stop_and_go)
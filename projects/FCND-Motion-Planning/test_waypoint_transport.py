@@ -0,0 +1,107 @@
+from unittest import TestCase
+
+import numpy as np
+
+from waypoint_transport import (HEADER, WaypointReceiver, WaypointUploader, decode_chunk, encode_chunk,
+                                encode_route, quantize)
+
+
+class TestWaypointTransport(TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        path = np.cumsum(rng.randint(-1, 2, (1000, 2)), axis=0) + [-316.0, -445.0]
+        self.waypoints = [[n, e, 5, 0] for n, e in path.tolist()]
+
+    def receive(self, frames):
+        receiver = WaypointReceiver()
+        for frame in frames:
+            receiver.feed(frame)
+        return receiver
+
+    def test_round_trip(self):
+        frames = encode_route(self.waypoints, resolution=0.01, chunk_size=100)
+        self.assertEqual(len(frames), 10)
+        receiver = self.receive(frames)
+        self.assertTrue(receiver.complete)
+        np.testing.assert_allclose(receiver.waypoints(), self.waypoints, atol=0.005)
+
+    def test_quantization_error(self):
+        waypoints = np.random.RandomState(1).uniform(-900, 900, (300, 4))
+        receiver = self.receive(encode_route(waypoints, resolution=0.05, chunk_size=64))
+        self.assertLessEqual(np.abs(receiver.waypoints() - waypoints).max(), 0.025 + 1e-9)
+        self.assertRaises(ValueError, quantize, [[1e9, 0, 0, 0]], 0.01)
+
+    def test_delta_width(self):
+        steps = quantize(self.waypoints[:50])
+        self.assertEqual(len(encode_chunk(steps, 0, 50, 0.01)), HEADER.size + 4 * 4 + 49 * 4 * 1)
+        jumps = quantize([[0, 0, 5, 0], [400, 0, 5, 0], [400, 1000, 5, 0]])
+        frame = encode_chunk(jumps, 7, 20, 0.01, route_id=3)
+        self.assertEqual(len(frame), HEADER.size + 4 * 4 + 2 * 4 * 4)
+        route_id, first, total, rows, resolution = decode_chunk(frame)
+        self.assertEqual((route_id, first, total, resolution), (3, 7, 20, 0.01))
+        np.testing.assert_array_equal(rows, jumps)
+        self.assertRaises(ValueError, decode_chunk, b'XX' + frame[2:])
+
+    def test_bounded_frames(self):
+        receiver = WaypointReceiver()
+        uploader = WaypointUploader(receiver, chunk_size=128)
+        uploader.send(self.waypoints)
+        self.assertEqual(uploader.pending, 8)
+        self.assertEqual(uploader.pump(), 1)
+        self.assertFalse(receiver.complete)
+        self.assertEqual(uploader.pump(max_frames=3), 3)
+        uploader.flush()
+        self.assertTrue(receiver.complete)
+        self.assertLess(uploader.bytes_sent / len(self.waypoints), 6)
+
+    def test_tail_resend(self):
+        receiver = WaypointReceiver()
+        uploader = WaypointUploader(receiver, chunk_size=100)
+        uploader.send(self.waypoints, flush=True)
+        full = uploader.bytes_sent
+
+        replanned = self.waypoints[:900] + [[n + 2, e, 5, 0] for n, e, _, _ in self.waypoints[900:950]]
+        self.assertEqual(uploader.send(replanned, flush=True), 900)
+        self.assertLess(uploader.bytes_sent - full, full / 10)
+        self.assertEqual(len(receiver), 950)
+        np.testing.assert_allclose(receiver.waypoints(), replanned, atol=0.005)
+
+        sent = uploader.bytes_sent
+        self.assertEqual(uploader.send(replanned, flush=True), 950)
+        self.assertEqual(uploader.bytes_sent, sent)
+        uploader.send(replanned[:10], flush=True)
+        np.testing.assert_allclose(receiver.waypoints(), replanned[:10], atol=0.005)
+
+    def test_replan_before_the_route_went_out(self):
+        receiver = WaypointReceiver()
+        uploader = WaypointUploader(receiver, chunk_size=100)
+        uploader.send(self.waypoints)
+        uploader.pump(max_frames=2)
+        replanned = self.waypoints[:900] + [[0, 0, 5, 0]]
+        self.assertEqual(uploader.send(replanned, flush=True), 200)
+        self.assertTrue(receiver.complete)
+        np.testing.assert_allclose(receiver.waypoints(), replanned, atol=0.005)
+
+    def test_new_route(self):
+        receiver = WaypointReceiver()
+        uploader = WaypointUploader(receiver)
+        uploader.send(self.waypoints, flush=True)
+        uploader.new_route()
+        self.assertEqual(uploader.send(self.waypoints[:5], flush=True), 0)
+        self.assertEqual(receiver.route_id, 1)
+        np.testing.assert_allclose(receiver.waypoints(), self.waypoints[:5])
+
+    def test_header_limits(self):
+        receiver = WaypointReceiver()
+        for chunk_size in (0, 65536):
+            with self.assertRaises(ValueError):
+                WaypointUploader(receiver, chunk_size=chunk_size)
+        for route_id in (-1, 65536):
+            with self.assertRaises(ValueError):
+                WaypointUploader(receiver, route_id=route_id)
+        uploader = WaypointUploader(receiver, chunk_size=65535, route_id=65535)
+        with self.assertRaises(ValueError):
+            uploader.new_route(65536)
+        uploader.new_route()
+        self.assertEqual(uploader.route_id, 0)
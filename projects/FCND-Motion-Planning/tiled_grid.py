@@ -0,0 +1,166 @@
+import json
+from collections import OrderedDict
+
+import numpy as np
+
+from planning_utils import grid_extent, obstacle_footprint
+
+
+class TiledGrid:
+    """
+    Occupancy grid stored as fixed-size, bit-packed tiles in a
+    memory-mapped file.
+
+    Only the tiles that are actually read or written are unpacked, and
+    at most `cache_size` of them are kept in memory (least recently used
+    tiles are evicted first and written back if they changed). Lookups
+    follow the `grid[x, y]` / `grid.shape` conventions of the dense
+    grids, so a `TiledGrid` can be passed to `a_star` as it is and the
+    search pages in only the tiles it expands into.
+
+    The tiles live in `<path>` (a `.npy` file of shape
+    `(north_tiles, east_tiles, tile_bytes)`); shape, tile size and grid
+    offsets are kept next to it in `<path>.json`.
+    """
+
+    def __init__(self, path, cache_size=64):
+        with open(path + '.json', 'r') as f:
+            meta = json.load(f)
+        self.path = path
+        self.shape = tuple(meta['shape'])
+        self.tile_size = meta['tile_size']
+        self.north_offset = meta['north_offset']
+        self.east_offset = meta['east_offset']
+        self.cache_size = cache_size
+
+        self._tiles = np.load(path, mmap_mode='r+')
+        self._cache = OrderedDict()
+        self._dirty = set()
+        self._last_key = None
+        self._last_tile = None
+
+        self.tiles_loaded = 0
+        self.tiles_evicted = 0
+
+    @classmethod
+    def create(cls, path, shape, tile_size=256, north_offset=0, east_offset=0, cache_size=64):
+        """
+        Creates an empty (all free) tiled grid at `path`.
+
+        `tile_size` must be a multiple of 8 so that tile rows pack into
+        whole bytes.
+        """
+        if tile_size % 8 != 0:
+            raise ValueError('tile_size must be a multiple of 8, got {0}'.format(tile_size))
+        north_tiles = -(-shape[0] // tile_size)
+        east_tiles = -(-shape[1] // tile_size)
+        tiles = np.lib.format.open_memmap(
+            path, mode='w+', dtype=np.uint8,
+            shape=(north_tiles, east_tiles, tile_size * tile_size // 8))
+        tiles.flush()
+        del tiles
+        with open(path + '.json', 'w') as f:
+            json.dump({
+                'shape': [int(shape[0]), int(shape[1])],
+                'tile_size': tile_size,
+                'north_offset': int(north_offset),
+                'east_offset': int(east_offset),
+            }, f)
+        return cls(path, cache_size)
+
+    @classmethod
+    def from_obstacles(cls, data, drone_altitude, safety_distance, path, tile_size=256, cache_size=64):
+        """
+        Rasterizes obstacle data straight into a tiled grid, the same way
+        `create_grid` does, without ever allocating the dense grid.
+        """
+        extent = grid_extent(data)
+        north_min, east_min, north_size, east_size = extent
+        grid = cls.create(path, (north_size, east_size), tile_size, north_min, east_min, cache_size)
+        for i in range(data.shape[0]):
+            north, east, alt, d_north, d_east, d_alt = data[i, :]
+            if alt + d_alt + safety_distance > drone_altitude:
+                obstacle = obstacle_footprint(data[i, :], safety_distance, extent)
+                grid.fill(obstacle[0], obstacle[1] + 1, obstacle[2], obstacle[3] + 1)
+        grid.flush()
+        return grid
+
+    @classmethod
+    def from_array(cls, array, path, tile_size=256, north_offset=0, east_offset=0, cache_size=64):
+        """Stores a dense grid as a tiled grid."""
+        grid = cls.create(path, array.shape, tile_size, north_offset, east_offset, cache_size)
+        ts = tile_size
+        for tn in range(grid._tiles.shape[0]):
+            for te in range(grid._tiles.shape[1]):
+                block = array[tn * ts:(tn + 1) * ts, te * ts:(te + 1) * ts]
+                if block.any():
+                    tile = np.zeros((ts, ts), dtype=np.uint8)
+                    tile[:block.shape[0], :block.shape[1]] = block != 0
+                    grid._tiles[tn, te] = np.packbits(tile)
+        grid._tiles.flush()
+        return grid
+
+    def __getitem__(self, key):
+        x, y = key
+        ts = self.tile_size
+        tile_key = (x // ts, y // ts)
+        if tile_key != self._last_key:
+            self._last_tile = self._tile(tile_key)
+            self._last_key = tile_key
+        return self._last_tile[x % ts, y % ts]
+
+    def fill(self, north_from, north_to, east_from, east_to, value=1):
+        """Sets the cells of the half-open rectangle to `value`."""
+        ts = self.tile_size
+        for tn in range(north_from // ts, (north_to - 1) // ts + 1):
+            for te in range(east_from // ts, (east_to - 1) // ts + 1):
+                tile = self._tile((tn, te))
+                tile[max(north_from - tn * ts, 0):min(north_to - tn * ts, ts),
+                     max(east_from - te * ts, 0):min(east_to - te * ts, ts)] = value
+                self._dirty.add((tn, te))
+
+    def flush(self):
+        """Writes every modified tile back to the memory-mapped file."""
+        for tile_key in self._dirty:
+            self._store(tile_key, self._cache[tile_key])
+        self._dirty.clear()
+        self._tiles.flush()
+
+    def to_array(self):
+        """Returns the whole grid as a dense array, e.g. for plotting."""
+        ts = self.tile_size
+        north_tiles, east_tiles = self._tiles.shape[:2]
+        array = np.zeros((north_tiles * ts, east_tiles * ts), dtype=np.uint8)
+        for tn in range(north_tiles):
+            for te in range(east_tiles):
+                array[tn * ts:(tn + 1) * ts, te * ts:(te + 1) * ts] = self._tile((tn, te))
+        return array[:self.shape[0], :self.shape[1]]
+
+    def cache_info(self):
+        return {
+            'cached': len(self._cache),
+            'loaded': self.tiles_loaded,
+            'evicted': self.tiles_evicted,
+        }
+
+    def _tile(self, tile_key):
+        tile = self._cache.get(tile_key)
+        if tile is not None:
+            self._cache.move_to_end(tile_key)
+            return tile
+        ts = self.tile_size
+        tile = np.unpackbits(self._tiles[tile_key]).reshape(ts, ts)
+        self.tiles_loaded += 1
+        self._cache[tile_key] = tile
+        if len(self._cache) > self.cache_size:
+            old_key, old_tile = self._cache.popitem(last=False)
+            if old_key in self._dirty:
+                self._store(old_key, old_tile)
+                self._dirty.discard(old_key)
+            if old_key == self._last_key:
+                self._last_key = None
+            self.tiles_evicted += 1
+        return tile
+
+    def _store(self, tile_key, tile):
+        self._tiles[tile_key] = np.packbits(tile)
@@ -0,0 +1,197 @@
+import json
+import os
+
+import numpy as np
+
+# column names of the udacidrone messages, after the timestamp
+FIELDS = {
+    'STATE': ('armed', 'guided'),
+    'GLOBAL_HOME': ('longitude', 'latitude', 'altitude'),
+    'GLOBAL_POSITION': ('longitude', 'latitude', 'altitude'),
+    'LOCAL_POSITION': ('north', 'east', 'down'),
+    'LOCAL_VELOCITY': ('velocity_north', 'velocity_east', 'velocity_down'),
+}
+
+_PREFIX = 'MsgID.'
+
+
+class TLog:
+    """
+    Columnar view of a udacidrone telemetry log (`Logs/TLog.txt`).
+
+    The log is split in a single pass into one float64 array per message
+    type, with the timestamp as the first row and one row per field
+    (booleans become 0 / 1), so every column is contiguous:
+
+        tlog = TLog('Logs/TLog.txt')
+        position = tlog['LOCAL_POSITION']
+        plt.plot(position['east'], position['north'])
+
+    With `cache=True` the parsed arrays are cached in `cache_dir`
+    (`<filename>.cache` by default) as `.npy` files next to an
+    `index.json` holding the row counts and time range of every message
+    type. As long as the log does not change, later loads memory-map the
+    cache instead of parsing the text, and reading one message type or
+    time window only touches those pages:
+
+        tlog = TLog('Logs/TLog.txt', cache=True, cache_dir='/tmp/tlog-cache')
+    """
+
+    def __init__(self, filename, cache=False, cache_dir=None):
+        self.filename = filename
+        self.cache_dir = filename + '.cache' if cache_dir is None else cache_dir
+        source = _source_stamp(filename)
+
+        # message type -> columns, filled from the cache on first use
+        self._arrays = {}
+        self.index = self._load_index(source) if cache else None
+        if self.index is None:
+            self._arrays = parse_tlog(filename)
+            self.index = _build_index(self._arrays, source)
+            if cache:
+                self._write_cache(self._arrays)
+
+    @property
+    def message_types(self):
+        return list(self.index['messages'])
+
+    def __contains__(self, name):
+        return name in self.index['messages']
+
+    def __len__(self):
+        return sum(entry['count'] for entry in self.index['messages'].values())
+
+    def count(self, name):
+        return self.index['messages'][name]['count']
+
+    def time_range(self, name=None):
+        """(first, last) timestamp of one message type, or of the whole log."""
+        if name is not None:
+            entry = self.index['messages'][name]
+            return entry['start'], entry['end']
+        return self.index['start'], self.index['end']
+
+    def columns(self, name):
+        """The raw (1 + fields, count) array of a message type."""
+        array = self._arrays.get(name)
+        if array is None:
+            array = np.load(os.path.join(self.cache_dir, name + '.npy'), mmap_mode='r')
+            self._arrays[name] = array
+        return array
+
+    def __getitem__(self, name):
+        """Returns the columns of a message type as a dict, 'time' first."""
+        return _named(self.columns(name), self.index['messages'][name]['fields'])
+
+    def window(self, name, start, end):
+        """
+        Columns of the messages with start <= time < end. The time
+        column is sorted, so the window is found by binary search.
+        """
+        array = self.columns(name)
+        first, last = np.searchsorted(array[0], [start, end])
+        return _named(array[:, first:last], self.index['messages'][name]['fields'])
+
+    def _load_index(self, source):
+        try:
+            with open(os.path.join(self.cache_dir, 'index.json'), 'r') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if index.get('source') != source:
+            return None
+        return index
+
+    def _write_cache(self, arrays):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for name, array in arrays.items():
+            np.save(os.path.join(self.cache_dir, name + '.npy'), array)
+        # the index goes last, a partially written cache is never used
+        with open(os.path.join(self.cache_dir, 'index.json'), 'w') as f:
+            json.dump(self.index, f)
+
+
+def parse_tlog(filename):
+    """
+    Parses a TLog file into a {message type: (1 + fields, count) array}
+    dict. Rows are grouped by type while the file is read, and each
+    group is converted to floats in one call.
+    """
+    groups = {}
+    with open(filename, 'r') as f:
+        for line in f:
+            name, _, values = line.partition(',')
+            if not values:
+                continue
+            group = groups.get(name)
+            if group is None:
+                group = groups[name] = []
+            group.append(values)
+
+    arrays = {}
+    for name, rows in groups.items():
+        text = ''.join(rows)
+        if 'True' in text or 'False' in text:
+            text = text.replace('True', '1').replace('False', '0')
+        columns = rows[0].count(',') + 1
+        values = np.fromstring(text.replace('\n', ','), sep=',')
+        if values.size != len(rows) * columns:
+            raise ValueError('{0} rows of {1} do not all have {2} columns'.format(name, filename, columns))
+        arrays[name[len(_PREFIX):] if name.startswith(_PREFIX) else name] = \
+            np.ascontiguousarray(values.reshape(len(rows), columns).T)
+    return arrays
+
+
+def _source_stamp(filename):
+    stat = os.stat(filename)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _fields(name, columns):
+    fields = FIELDS.get(name)
+    if fields is None or len(fields) != columns - 1:
+        fields = tuple('field{0}'.format(i) for i in range(columns - 1))
+    return list(fields)
+
+
+def _build_index(arrays, source):
+    messages = {}
+    for name, array in arrays.items():
+        messages[name] = {
+            'count': int(array.shape[1]),
+            'fields': _fields(name, array.shape[0]),
+            'start': float(array[0, 0]),
+            'end': float(array[0, -1]),
+        }
+    return {
+        'source': source,
+        'messages': messages,
+        'start': min((m['start'] for m in messages.values()), default=None),
+        'end': max((m['end'] for m in messages.values()), default=None),
+    }
+
+
+def _named(array, fields):
+    columns = {'time': array[0]}
+    for i, field in enumerate(fields):
+        columns[field] = array[i + 1]
+    return columns
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('log', nargs='?', default='Logs/TLog.txt', help='TLog file to index')
+    parser.add_argument('--cache', action='store_true', help='read and write the parsed arrays in a cache')
+    parser.add_argument('--cache-dir', type=str, default=None, help='cache directory, <log>.cache by default')
+    args = parser.parse_args()
+
+    t0 = time.time()
+    tlog = TLog(args.log, cache=args.cache, cache_dir=args.cache_dir)
+    elapsed = time.time() - t0
+    print('{0}: {1} messages in {2:.3f} s'.format(args.log, len(tlog), elapsed))
+    for name in tlog.message_types:
+        start, end = tlog.time_range(name)
+        print('  {0:<16} {1:>9} rows  {2:.3f} .. {3:.3f}'.format(name, tlog.count(name), start, end))
@@ -0,0 +1,79 @@
+import math
+
+import numpy as np
+
+from arrival_check import as_floats
+
+
+class WaypointDispatcher:
+    """
+    Route of waypoints handed out one at a time through a cursor.
+
+    The route is one (N, k) float array, [north, east, altitude] or
+    [north, east, altitude, heading] rows; `next()` moves the cursor and
+    returns the row, so dispatching a waypoint never copies the rest of
+    the route the way `list.pop(0)` does.
+
+    `reached(position)` tells when to dispatch the next waypoint, by the
+    horizontal distance to the current target. With a
+    `lookahead_radius` larger than the `acceptance_radius` the next
+    `cmd_position` is sent while the vehicle is still closing in on a
+    waypoint, so it blends into the next leg instead of stopping; the
+    last waypoint always uses the acceptance radius.
+
+    After a replan, `replace()` swaps in the new remaining route without
+    touching the waypoint currently being flown to.
+    """
+
+    def __init__(self, waypoints=(), acceptance_radius=1.0, lookahead_radius=None):
+        self.acceptance_radius = acceptance_radius
+        self.lookahead_radius = acceptance_radius if lookahead_radius is None else lookahead_radius
+        self.current = None
+        self.dispatched = 0
+        self.replace(waypoints)
+
+    def replace(self, waypoints):
+        """Replaces the waypoints that have not been dispatched yet."""
+        route = np.array(waypoints, dtype=np.float64)
+        if route.size == 0:
+            route = route.reshape(0, 3)
+        self._route = route
+        self._cursor = 0
+
+    def next(self):
+        """Returns the next waypoint and makes it the current target."""
+        if self._cursor >= len(self._route):
+            raise IndexError('no waypoints left')
+        self.current = self._route[self._cursor]
+        self._north, self._east = self.current[:2].tolist()
+        self._cursor += 1
+        self.dispatched += 1
+        return self.current
+
+    def peek(self):
+        """The next waypoint, without dispatching it, or None."""
+        return self._route[self._cursor] if self._cursor < len(self._route) else None
+
+    @property
+    def remaining(self):
+        """View of the waypoints not dispatched yet."""
+        return self._route[self._cursor:]
+
+    def __len__(self):
+        return len(self._route) - self._cursor
+
+    def __bool__(self):
+        return self._cursor < len(self._route)
+
+    def radius(self):
+        """The switching radius around the current target."""
+        if self._cursor < len(self._route):
+            return max(self.lookahead_radius, self.acceptance_radius)
+        return self.acceptance_radius
+
+    def reached(self, position):
+        """True once `position` (north, east, ...) is within the radius of the current target."""
+        if self.current is None:
+            return False
+        north, east = as_floats(position)[:2]
+        return math.hypot(self._north - north, self._east - east) < self.radius()
@@ -0,0 +1,271 @@
+import struct
+from collections import deque
+
+import numpy as np
+
+# magic, version, delta width in bytes, route id, first waypoint, route length, rows, columns, resolution
+HEADER = struct.Struct('<2sBBHIIHBd')
+MAGIC = b'WP'
+VERSION = 1
+
+_WIDTHS = ((1, np.dtype('<i1')), (2, np.dtype('<i2')), (4, np.dtype('<i4')))
+_INT32 = np.iinfo(np.int32)
+_UINT16 = np.iinfo(np.uint16)
+
+
+def quantize(waypoints, resolution=0.01):
+    """Rounds the waypoints to multiples of `resolution`, as an (N, columns) int32 array."""
+    route = np.asarray(waypoints, dtype=np.float64)
+    if route.size == 0:
+        return np.zeros((0, route.shape[1] if route.ndim == 2 else 4), dtype=np.int32)
+    quantized = np.rint(route / resolution)
+    if quantized.min() < _INT32.min or quantized.max() > _INT32.max:
+        raise ValueError('waypoints do not fit int32 at a resolution of {0}'.format(resolution))
+    return quantized.astype(np.int32)
+
+
+def encode_chunk(quantized, first, total, resolution, route_id=0):
+    """
+    Encodes rows `quantized` of a route starting at waypoint `first`
+    into one frame. The first row is stored as absolute int32 values,
+    the rest as the differences to the previous row in the narrowest
+    of int8, int16 or int32 that holds them, so every frame decodes on
+    its own.
+    """
+    rows, columns = quantized.shape
+    deltas = np.diff(quantized.astype(np.int64), axis=0)
+    largest = int(np.abs(deltas).max()) if deltas.size else 0
+    for width, dtype in _WIDTHS:
+        if largest <= np.iinfo(dtype).max:
+            break
+    header = HEADER.pack(MAGIC, VERSION, width, route_id, first, total, rows, columns, resolution)
+    return b''.join((header, quantized[:1].astype('<i4').tobytes(), deltas.astype(dtype).tobytes()))
+
+
+def decode_chunk(frame):
+    """
+    Decodes a frame into (route id, first waypoint, route length,
+    (rows, columns) int32 array of quantized waypoints, resolution).
+    """
+    magic, version, width, route_id, first, total, rows, columns, resolution = HEADER.unpack_from(frame)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('not a waypoint frame')
+    dtype = dict(_WIDTHS)[width]
+    offset = HEADER.size
+    quantized = np.zeros((rows, columns), dtype=np.int64)
+    if rows:
+        quantized[0] = np.frombuffer(frame, dtype='<i4', count=columns, offset=offset)
+        offset += 4 * columns
+        deltas = np.frombuffer(frame, dtype=dtype, count=(rows - 1) * columns, offset=offset)
+        quantized[1:] = deltas.reshape(rows - 1, columns)
+        np.cumsum(quantized, axis=0, out=quantized)
+    return route_id, first, total, quantized.astype(np.int32), resolution
+
+
+def encode_route(waypoints, resolution=0.01, chunk_size=256, route_id=0, first=0):
+    """Encodes the waypoints from index `first` on into a list of frames of at most `chunk_size` rows."""
+    quantized = quantize(waypoints, resolution)
+    return _frames(quantized, first, resolution, chunk_size, route_id)
+
+
+def _frames(quantized, first, resolution, chunk_size, route_id):
+    total = len(quantized)
+    if first >= total:
+        # nothing left to send, a single empty frame carries the new length
+        return [encode_chunk(quantized[:0], total, total, resolution, route_id)]
+    return [encode_chunk(quantized[start:start + chunk_size], start, total, resolution, route_id)
+            for start in range(first, total, chunk_size)]
+
+
+class WaypointUploader:
+    """
+    Sends a route to the simulator as compact frames instead of one
+    msgpack blob of float lists.
+
+    Waypoints are quantized to `resolution` meters and delta encoded
+    (see `encode_chunk`), at most `chunk_size` waypoints per frame.
+    `send()` only queues frames; `pump()` writes at most `max_frames` of
+    them to `sink` (anything with `write(bytes)`, such as the
+    connection's `_master`), so a long route goes out a frame per
+    telemetry callback instead of blocking the loop in one write.
+
+    After a replan `send()` compares the new route with the last one and
+    only queues frames from the first waypoint that changed, the
+    receiver keeps the unchanged head.
+
+    The frame header stores the route id and the rows of a frame as
+    uint16, so `chunk_size` must lie in 1..65535 and `route_id` in
+    0..65535.
+    """
+
+    def __init__(self, sink, resolution=0.01, chunk_size=256, max_frames=1, route_id=0):
+        if not 0 < chunk_size <= _UINT16.max:
+            raise ValueError('chunk_size must be in 1..{0}, got {1}'.format(_UINT16.max, chunk_size))
+        if not 0 <= route_id <= _UINT16.max:
+            raise ValueError('route_id must be in 0..{0}, got {1}'.format(_UINT16.max, route_id))
+        self.sink = sink
+        self.resolution = resolution
+        self.chunk_size = chunk_size
+        self.max_frames = max_frames
+        self.route_id = route_id
+        self.queue = deque()
+        self.bytes_sent = 0
+        self.frames_sent = 0
+        self._sent = None
+        self._queued_from = 0
+
+    @property
+    def pending(self):
+        return len(self.queue)
+
+    def send(self, waypoints, flush=False):
+        """Queues the frames for the changed tail of the route, returns the first waypoint resent."""
+        quantized = quantize(waypoints, self.resolution)
+        first = self._first_change(quantized)
+        if first is None:
+            return len(quantized)
+        if self.queue:
+            # frames of the previous route that have not gone out yet are
+            # superseded, the new ones start at the earliest of them
+            first = min(first, self._queued_from)
+            self.queue.clear()
+        self.queue.extend(_frames(quantized, first, self.resolution, self.chunk_size, self.route_id))
+        self._queued_from = first
+        self._sent = quantized
+        if flush:
+            self.flush()
+        return first
+
+    def new_route(self, route_id=None):
+        """Starts an unrelated route, the next `send()` resends it whole."""
+        if route_id is None:
+            route_id = (self.route_id + 1) % (_UINT16.max + 1)
+        elif not 0 <= route_id <= _UINT16.max:
+            raise ValueError('route_id must be in 0..{0}, got {1}'.format(_UINT16.max, route_id))
+        self.route_id = route_id
+        self._sent = None
+
+    def pump(self, max_frames=None):
+        """Writes up to `max_frames` queued frames, returns the number written."""
+        count = 0
+        limit = self.max_frames if max_frames is None else max_frames
+        while self.queue and count < limit:
+            frame = self.queue.popleft()
+            self._queued_from += self.chunk_size
+            self.sink.write(frame)
+            self.bytes_sent += len(frame)
+            self.frames_sent += 1
+            count += 1
+        return count
+
+    def flush(self):
+        return self.pump(len(self.queue))
+
+    def _first_change(self, quantized):
+        sent = self._sent
+        if sent is None or sent.shape[1:] != quantized.shape[1:]:
+            return 0
+        common = min(len(sent), len(quantized))
+        changed = np.flatnonzero((sent[:common] != quantized[:common]).any(axis=1))
+        if changed.size:
+            return int(changed[0])
+        if len(sent) == len(quantized):
+            return None
+        return common
+
+
+class WaypointReceiver:
+    """
+    Reassembles a route from frames, the receiving end of
+    `WaypointUploader`:
+
+        receiver = WaypointReceiver()
+        for frame in frames:
+            receiver.feed(frame)
+        if receiver.complete:
+            waypoints = receiver.waypoints()
+    """
+
+    def __init__(self):
+        self.route_id = None
+        self.resolution = None
+        self._quantized = np.zeros((0, 0), dtype=np.int32)
+        self._received = np.zeros(0, dtype=bool)
+
+    def feed(self, frame):
+        route_id, first, total, rows, resolution = decode_chunk(frame)
+        if route_id != self.route_id or rows.shape[1] != self._quantized.shape[1]:
+            self.route_id = route_id
+            self._quantized = np.zeros((0, rows.shape[1]), dtype=np.int32)
+            self._received = np.zeros(0, dtype=bool)
+        self.resolution = resolution
+        if total != len(self._quantized):
+            keep = min(total, len(self._quantized))
+            quantized = np.zeros((total, rows.shape[1]), dtype=np.int32)
+            received = np.zeros(total, dtype=bool)
+            quantized[:keep] = self._quantized[:keep]
+            received[:keep] = self._received[:keep]
+            self._quantized, self._received = quantized, received
+        self._quantized[first:first + len(rows)] = rows
+        self._received[first:first + len(rows)] = True
+
+    # a receiver can stand in for the sink of an uploader
+    write = feed
+
+    def __len__(self):
+        return len(self._quantized)
+
+    @property
+    def complete(self):
+        return bool(self._received.all())
+
+    def waypoints(self):
+        """The route as an (N, columns) float array."""
+        return self._quantized * self.resolution
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    import msgpack
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--waypoints', type=int, default=2000, help='length of the unpruned test route')
+    parser.add_argument('--resolution', type=float, default=0.01, help='quantization step in meters')
+    parser.add_argument('--chunk-size', type=int, default=256, help='waypoints per frame')
+    args = parser.parse_args()
+
+    # an unpruned grid path: unit and diagonal steps from a map offset, at altitude 5, heading 0
+    rng = np.random.RandomState(0)
+    steps = rng.randint(-1, 2, (args.waypoints, 2))
+    path = np.cumsum(steps, axis=0) + [-316.0, -445.0]
+    waypoints = [[n, e, 5, 0] for n, e in path.tolist()]
+
+    t0 = time.perf_counter()
+    blob = msgpack.dumps(waypoints)
+    packed = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    frames = encode_route(waypoints, args.resolution, args.chunk_size)
+    encoded = time.perf_counter() - t0
+    compact = sum(len(frame) for frame in frames)
+
+    receiver = WaypointReceiver()
+    for frame in frames:
+        receiver.feed(frame)
+    error = np.abs(receiver.waypoints() - waypoints).max()
+
+    # replan the last tenth of the route
+    replanned = list(waypoints)
+    replanned[-len(waypoints) // 10:] = [[n + 1, e, 5, 0] for n, e, _, _ in replanned[-len(waypoints) // 10:]]
+    uploader = WaypointUploader(receiver, args.resolution, args.chunk_size)
+    uploader.send(waypoints, flush=True)
+    first_sent = uploader.bytes_sent
+    uploader.send(replanned, flush=True)
+
+    print('{0} waypoints'.format(len(waypoints)))
+    print('msgpack  {0:>8} bytes  {1:6.2f} bytes/waypoint  {2:.2f} ms'.format(
+        len(blob), len(blob) / len(waypoints), packed * 1000))
+    print('frames   {0:>8} bytes  {1:6.2f} bytes/waypoint  {2:.2f} ms  {3} frames, max error {4:.3f} m'.format(
+        compact, compact / len(waypoints), encoded * 1000, len(frames), error))
+    print('replan   {0:>8} bytes for the changed tail'.format(uploader.bytes_sent - first_sent))